@@ -0,0 +1,90 @@
+# Copyright cocotb contributors
+# Licensed under the Revised BSD License, see LICENSE for details.
+# SPDX-License-Identifier: BSD-3-Clause
+
+"""Measure the per-call overhead of the simulator module.
+
+The module is expected to have been built against ``stub_gpi.c`` by the
+Makefile in this directory, so the time measured is that of the argument
+handling in the module and of the call from Python, not of any simulator.
+
+Usage: ``bench_simulator_module.py BUILD_DIR [ITERATIONS]``
+"""
+
+import sys
+import time
+
+sys.path.insert(0, sys.argv[1])
+import simulator  # noqa: E402
+
+ITERATIONS = int(sys.argv[2]) if len(sys.argv) > 2 else 1000000
+REPEATS = 5
+
+# The value of Deposit in cocotb.handle
+DEPOSIT = 0
+RISING = 1
+
+
+def _callback():
+    pass
+
+
+def loop_overhead(n):
+    start = time.perf_counter()
+    for _ in range(n):
+        pass
+    return time.perf_counter() - start
+
+
+def get_signal_val_long(n, hdl):
+    f = simulator.get_signal_val_long
+    start = time.perf_counter()
+    for _ in range(n):
+        f(hdl)
+    return time.perf_counter() - start
+
+
+def set_signal_val_long(n, hdl):
+    f = simulator.set_signal_val_long
+    start = time.perf_counter()
+    for _ in range(n):
+        f(hdl, DEPOSIT, 5)
+    return time.perf_counter() - start
+
+
+def register_value_change_callback(n, hdl):
+    # The stub never fires callbacks, so the callback data of each one is
+    # leaked. Keep the number of iterations down to limit the memory used.
+    n = min(n, 100000)
+    f = simulator.register_value_change_callback
+    start = time.perf_counter()
+    for _ in range(n):
+        f(hdl, _callback, RISING, None)
+    return time.perf_counter() - start, n
+
+
+def best_of(bench, *args):
+    best = None
+    n = ITERATIONS
+    for _ in range(REPEATS):
+        result = bench(ITERATIONS, *args)
+        if isinstance(result, tuple):
+            result, n = result
+        best = result if best is None else min(best, result)
+    return best, n
+
+
+def main():
+    hdl = simulator.get_root_handle("stub")
+
+    per_loop = best_of(loop_overhead)[0] / ITERATIONS
+
+    print("{:<34} {:>10}".format("function", "ns/call"))
+    for bench in (get_signal_val_long, set_signal_val_long, register_value_change_callback):
+        elapsed, n = best_of(bench, hdl)
+        ns = (elapsed / n - per_loop) * 1e9
+        print("{:<34} {:>10.1f}".format(bench.__name__, ns))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,185 @@
+// Copyright cocotb contributors
+// Licensed under the Revised BSD License, see LICENSE for details.
+// SPDX-License-Identifier: BSD-3-Clause
+
+/*
+ * A GPI that does no work, so that the simulator module can be loaded outside
+ * of a simulator and the time spent in the module itself can be measured.
+ *
+ * There is a single signal, which holds a long, and callbacks are accepted but
+ * never fire.
+ */
+
+#include <gpi.h>
+#include <gpi_logging.h>
+#include <stdarg.h>
+#include <stddef.h>
+#include <stdio.h>
+
+static long signal_value = 0;
+static int signal;
+static int callback;
+
+#define SIGNAL_HDL ((gpi_sim_hdl)&signal)
+#define CALLBACK_HDL ((gpi_sim_hdl)&callback)
+
+void gpi_log(const char *name, enum gpi_log_levels level, const char *pathname,
+             const char *funcname, long lineno, const char *msg, ...)
+{
+    (void)level; (void)pathname; (void)funcname; (void)lineno;
+    va_list ap;
+    fprintf(stderr, "%s: ", name);
+    va_start(ap, msg);
+    vfprintf(stderr, msg, ap);
+    va_end(ap);
+    fputc('\n', stderr);
+}
+
+void set_log_level(enum gpi_log_levels new_level) { (void)new_level; }
+
+void gpi_sim_end(void) { }
+void gpi_cleanup(void) { }
+
+void gpi_get_sim_time(uint32_t *high, uint32_t *low)
+{
+    *high = 0;
+    *low = 0;
+}
+
+void gpi_get_sim_precision(int32_t *precision) { *precision = -12; }
+
+gpi_sim_hdl gpi_get_root_handle(const char *name) { (void)name; return SIGNAL_HDL; }
+
+gpi_sim_hdl gpi_get_handle_by_name(gpi_sim_hdl parent, const char *name)
+{
+    (void)parent; (void)name;
+    return SIGNAL_HDL;
+}
+
+gpi_sim_hdl gpi_get_handle_by_index(gpi_sim_hdl parent, int32_t index)
+{
+    (void)parent; (void)index;
+    return SIGNAL_HDL;
+}
+
+gpi_iterator_hdl gpi_iterate(gpi_sim_hdl base, gpi_iterator_sel_t type)
+{
+    (void)base; (void)type;
+    return NULL;
+}
+
+gpi_sim_hdl gpi_next(gpi_iterator_hdl iterator) { (void)iterator; return NULL; }
+
+int gpi_get_num_elems(gpi_sim_hdl hdl) { (void)hdl; return 0; }
+int gpi_get_range_left(gpi_sim_hdl hdl) { (void)hdl; return 0; }
+int gpi_get_range_right(gpi_sim_hdl hdl) { (void)hdl; return 0; }
+
+const char *gpi_get_signal_value_binstr(gpi_sim_hdl hdl) { (void)hdl; return "0"; }
+const char *gpi_get_signal_value_str(gpi_sim_hdl hdl) { (void)hdl; return ""; }
+double gpi_get_signal_value_real(gpi_sim_hdl hdl) { (void)hdl; return (double)signal_value; }
+long gpi_get_signal_value_long(gpi_sim_hdl hdl) { (void)hdl; return signal_value; }
+const char *gpi_get_signal_name_str(gpi_sim_hdl hdl) { (void)hdl; return "signal"; }
+const char *gpi_get_signal_type_str(gpi_sim_hdl hdl) { (void)hdl; return "vpiReg"; }
+gpi_objtype_t gpi_get_object_type(gpi_sim_hdl hdl) { (void)hdl; return GPI_REGISTER; }
+const char *gpi_get_definition_name(gpi_sim_hdl hdl) { (void)hdl; return ""; }
+const char *gpi_get_definition_file(gpi_sim_hdl hdl) { (void)hdl; return ""; }
+int gpi_is_constant(gpi_sim_hdl hdl) { (void)hdl; return 0; }
+int gpi_is_indexable(gpi_sim_hdl hdl) { (void)hdl; return 0; }
+
+void gpi_set_signal_value_real(gpi_sim_hdl hdl, double value, gpi_set_action_t action)
+{
+    (void)hdl; (void)action;
+    signal_value = (long)value;
+}
+
+void gpi_set_signal_value_long(gpi_sim_hdl hdl, long value, gpi_set_action_t action)
+{
+    (void)hdl; (void)action;
+    signal_value = value;
+}
+
+void gpi_set_signal_value_binstr(gpi_sim_hdl hdl, const char *str, gpi_set_action_t action)
+{
+    (void)hdl; (void)str; (void)action;
+}
+
+void gpi_set_signal_value_str(gpi_sim_hdl hdl, const char *str, gpi_set_action_t action)
+{
+    (void)hdl; (void)str; (void)action;
+}
+
+gpi_sim_hdl gpi_register_timed_callback(int (*gpi_function)(const void *), void *gpi_cb_data,
+                                        uint64_t time_ps)
+{
+    (void)gpi_function; (void)gpi_cb_data; (void)time_ps;
+    return CALLBACK_HDL;
+}
+
+gpi_sim_hdl gpi_register_value_change_callback(int (*gpi_function)(const void *), void *gpi_cb_data,
+                                               gpi_sim_hdl hdl, int edge)
+{
+    (void)gpi_function; (void)gpi_cb_data; (void)hdl; (void)edge;
+    return CALLBACK_HDL;
+}
+
+gpi_sim_hdl gpi_register_persistent_value_change_callback(int (*gpi_function)(const void *),
+                                                          void *gpi_cb_data,
+                                                          gpi_sim_hdl hdl, int edge)
+{
+    (void)gpi_function; (void)gpi_cb_data; (void)hdl; (void)edge;
+    return CALLBACK_HDL;
+}
+
+gpi_sim_hdl gpi_register_readonly_callback(int (*gpi_function)(const void *), void *gpi_cb_data)
+{
+    (void)gpi_function; (void)gpi_cb_data;
+    return CALLBACK_HDL;
+}
+
+gpi_sim_hdl gpi_register_nexttime_callback(int (*gpi_function)(const void *), void *gpi_cb_data)
+{
+    (void)gpi_function; (void)gpi_cb_data;
+    return CALLBACK_HDL;
+}
+
+gpi_sim_hdl gpi_register_readwrite_callback(int (*gpi_function)(const void *), void *gpi_cb_data)
+{
+    (void)gpi_function; (void)gpi_cb_data;
+    return CALLBACK_HDL;
+}
+
+void gpi_set_callback_enabled(gpi_sim_hdl hdl, int enabled) { (void)hdl; (void)enabled; }
+
+void gpi_register_batch_handler(int (*batch_function)(const void *),
+                                int (*batch_handler)(const void **, size_t))
+{
+    (void)batch_function; (void)batch_handler;
+}
+
+void gpi_deregister_callback(gpi_sim_hdl hdl) { (void)hdl; }
+
+void *gpi_get_callback_data(gpi_sim_hdl hdl) { (void)hdl; return NULL; }
+
+size_t gpi_get_stats(const gpi_stat_t **stats) { (void)stats; return 0; }
+
+uint64_t gpi_get_stats_time_ns(void) { return 0; }
+
+void gpi_add_stat(gpi_stat_t *stat, uint64_t elapsed_ns) { (void)stat; (void)elapsed_ns; }
+
+int gpi_has_trace_control(void) { return 0; }
+
+int gpi_trace_on(void) { return -1; }
+
+int gpi_trace_off(void) { return -1; }
+
+int gpi_set_trace_depth(int levels) { (void)levels; return -1; }
+
+int gpi_has_snapshot_control(void) { return 0; }
+
+int gpi_save_snapshot(const char *filename) { (void)filename; return -1; }
+
+int gpi_restore_snapshot(const char *filename) { (void)filename; return -1; }
+
+int gpi_has_fork_control(void) { return 0; }
+
+int gpi_fork(void) { return -1; }
@@ -0,0 +1,63 @@
+# Copyright cocotb contributors
+# Licensed under the Revised BSD License, see LICENSE for details.
+# SPDX-License-Identifier: BSD-3-Clause
+
+"""Measure the time taken by cocotb to start up.
+
+Each run is a fresh interpreter which imports :mod:`cocotb` against the stub
+``simulator`` module in this directory and initialises the regression manager
+with a single empty test, so the time measured is that of the Python side of
+startup only. Run with :envvar:`COCOTB_STARTUP_REPORT` set to see where the
+time goes.
+
+Usage: ``bench_startup.py [RUNS]``
+"""
+
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+RUNS = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+COCOTB_ROOT = os.path.dirname(os.path.dirname(HERE))
+
+STARTUP = "import cocotb; cocotb.argv = []; cocotb._initialise_testbench('top')"
+
+
+def run(code, env, cwd):
+    start = time.perf_counter()
+    subprocess.run([sys.executable, "-c", code], env=env, cwd=cwd, check=True,
+                   stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    return time.perf_counter() - start
+
+
+def median_of(code, env, cwd):
+    return statistics.median(run(code, env, cwd) for _ in range(RUNS))
+
+
+def main():
+    env = dict(os.environ)
+    env["COCOTB_SIM"] = "1"
+    env["MODULE"] = "startup_tests"
+    env["RANDOM_SEED"] = "1"
+    env["PYTHONPATH"] = os.pathsep.join([HERE, COCOTB_ROOT, env.get("PYTHONPATH", "")])
+
+    with tempfile.TemporaryDirectory() as cwd:
+        # Populate the bytecode caches before measuring anything
+        run(STARTUP, env, cwd)
+
+        interpreter = median_of("pass", env, cwd)
+        startup = median_of(STARTUP, env, cwd)
+
+    print("{:<34} {:>10}".format("", "ms"))
+    print("{:<34} {:>10.1f}".format("interpreter", interpreter * 1e3))
+    print("{:<34} {:>10.1f}".format("interpreter + cocotb startup", startup * 1e3))
+    print("{:<34} {:>10.1f}".format("cocotb startup", (startup - interpreter) * 1e3))
+
+
+if __name__ == "__main__":
+    main()
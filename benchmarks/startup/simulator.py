@@ -0,0 +1,125 @@
+# Copyright cocotb contributors
+# Licensed under the Revised BSD License, see LICENSE for details.
+# SPDX-License-Identifier: BSD-3-Clause
+
+"""Minimal stand-in for the ``simulator`` extension module.
+
+Only provides enough of the interface for :mod:`cocotb` to import and for the
+regression manager to initialise against a single empty root module, so that
+the Python side of startup can be measured without an HDL simulator.
+"""
+
+import logging
+
+MODULE, STRUCTURE, REG, NET, NETARRAY, REAL, INTEGER, ENUM, STRING, GENARRAY = range(2, 12)
+UNKNOWN, MEMORY = 0, 1
+OBJECTS, DRIVERS, LOADS = 1, 2, 3
+
+sim_time = None
+
+_ROOT = object()
+_log = logging.getLogger("stub_simulator")
+
+
+def log_msg(name, path, funcname, lineno, msg):
+    _log.info(msg)
+
+
+def log_level(level):
+    pass
+
+
+def get_precision():
+    return -12
+
+
+def get_sim_time():
+    return 0, 0
+
+
+def get_root_handle(name):
+    return _ROOT
+
+
+def get_type(handle):
+    return MODULE
+
+
+def get_type_string(handle):
+    return "GPI_MODULE"
+
+
+def get_name_string(handle):
+    return "top"
+
+
+def get_definition_name(handle):
+    return "top"
+
+
+def get_definition_file(handle):
+    return "top.v"
+
+
+def get_const(handle):
+    return False
+
+
+def get_gpi_stats():
+    return None
+
+
+def get_handle_by_name(handle, name):
+    return None
+
+
+def get_handle_by_index(handle, index):
+    return None
+
+
+def iterate(handle, mode):
+    return None
+
+
+def set_batch_callback(func, batch_func):
+    pass
+
+
+def register_timed_callback(time, func, *args):
+    return None
+
+
+def register_readonly_callback(func, *args):
+    return None
+
+
+def register_rwsynch_callback(func, *args):
+    return None
+
+
+def register_nextstep_callback(func, *args):
+    return None
+
+
+def register_value_change_callback(signal, func, edge, *args):
+    return None
+
+
+def register_persistent_value_change_callback(signal, func, edge, *args):
+    return None
+
+
+def deregister_callback(handle):
+    pass
+
+
+def enable_callback(handle):
+    pass
+
+
+def disable_callback(handle):
+    pass
+
+
+def stop_simulator():
+    pass
@@ -0,0 +1,254 @@
+# Copyright cocotb contributors
+# Licensed under the Revised BSD License, see LICENSE for details.
+# SPDX-License-Identifier: BSD-3-Clause
+
+"""Benchmarks of the scheduler, triggers, BinaryValue, handles, drivers and monitors.
+
+Each benchmark runs a fixed number of operations and records the number of
+operations per second of real time, or the time per operation, in the JSON
+file named by ``BENCH_RESULTS``. ``BENCH_SCALE`` multiplies the number of
+operations, to trade accuracy against run time.
+"""
+
+import json
+import os
+import time
+
+import cocotb
+from cocotb.binary import BinaryValue, BinaryRepresentation
+from cocotb.clock import Clock
+from cocotb.drivers import Driver
+from cocotb.monitors import Monitor
+from cocotb.triggers import RisingEdge, ReadOnly, Timer, Event, Combine, with_timeout
+
+RESULTS_FILE = os.environ.get("BENCH_RESULTS", "bench_results.json")
+SCALE = float(os.environ.get("BENCH_SCALE", 1.0))
+
+
+def _count(n):
+    return max(1, int(n * SCALE))
+
+
+def record(name, value, unit):
+    """Add a result to the results file, keeping any from earlier runs."""
+    try:
+        with open(RESULTS_FILE) as f:
+            results = json.load(f)
+    except (IOError, ValueError):
+        results = {}
+    results[name] = {"value": value, "unit": unit}
+    with open(RESULTS_FILE, "w") as f:
+        json.dump(results, f, indent=2, sort_keys=True)
+    cocotb.log.info("%s: %.6g %s", name, value, unit)
+
+
+def rate(name, n, elapsed):
+    record(name, n / elapsed, "ops/s")
+
+
+async def _enter_event_loop():
+    # A test is started outside of the scheduler's event loop. Wait for a
+    # simulator trigger, so that Python triggers fired by the benchmark are
+    # handled the same way as in a real test.
+    await Timer(1, "ns")
+
+
+@cocotb.test()
+async def bench_startup(dut):
+    """Does nothing, so that a run of just this test measures startup"""
+    pass
+
+
+@cocotb.test()
+async def bench_fork_join(dut):
+    """Fork coroutines which complete immediately, and join them"""
+    async def nothing():
+        pass
+
+    await _enter_event_loop()
+    n = _count(20000)
+    start = time.perf_counter()
+    for _ in range(n):
+        await cocotb.fork(nothing()).join()
+    rate("fork_join", n, time.perf_counter() - start)
+
+
+@cocotb.test()
+async def bench_fork_many(dut):
+    """Fork many coroutines waiting on one event, fire it and join them all"""
+    event = Event()
+
+    async def waiter():
+        await event.wait()
+
+    await _enter_event_loop()
+    n = _count(20000)
+    start = time.perf_counter()
+    tasks = [cocotb.fork(waiter()) for _ in range(n)]
+    event.set()
+    await Combine(*(task.join() for task in tasks))
+    rate("fork_wait_join_many", n, time.perf_counter() - start)
+
+
+@cocotb.test()
+async def bench_edge_wakeups(dut):
+    """Wait for rising edges of a clock driven from Python"""
+    clock = cocotb.fork(Clock(dut.clk, 10, "ns").start())
+    n = _count(20000)
+    edge = RisingEdge(dut.clk)
+    await edge
+    start = time.perf_counter()
+    for _ in range(n):
+        await edge
+    rate("edge_wakeups", n, time.perf_counter() - start)
+
+    # Several coroutines woken by each edge
+    waiters = 10
+
+    async def wait_edges(count):
+        for _ in range(count):
+            await edge
+
+    n = _count(2000)
+    start = time.perf_counter()
+    await Combine(*(cocotb.fork(wait_edges(n)).join() for _ in range(waiters)))
+    rate("edge_wakeups_10_waiters", n * waiters, time.perf_counter() - start)
+    clock.kill()
+
+
+@cocotb.test()
+async def bench_with_timeout(dut):
+    """Compare waiting on a timer with and without with_timeout"""
+    n = _count(10000)
+    timer = Timer(1, "ns")
+
+    start = time.perf_counter()
+    for _ in range(n):
+        await timer
+    bare = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for _ in range(n):
+        await with_timeout(timer, 10, "ns")
+    wrapped = time.perf_counter() - start
+
+    rate("timer", n, bare)
+    rate("with_timeout_timer", n, wrapped)
+    record("with_timeout_overhead", (wrapped - bare) / n * 1e6, "us/call")
+
+
+@cocotb.test()
+async def bench_binary_value(dut):
+    """Convert between integers, strings and BinaryValue"""
+    await _enter_event_loop()
+    n = _count(50000)
+
+    start = time.perf_counter()
+    for i in range(n):
+        BinaryValue(i, n_bits=32)
+    rate("binary_value_from_int", n, time.perf_counter() - start)
+
+    value = BinaryValue(n_bits=32, binaryRepresentation=BinaryRepresentation.TWOS_COMPLEMENT)
+    start = time.perf_counter()
+    for i in range(n):
+        value.integer = -i
+    rate("binary_value_set_signed", n, time.perf_counter() - start)
+
+    value = BinaryValue("01" * 16)
+    start = time.perf_counter()
+    for _ in range(n):
+        value.integer
+    rate("binary_value_to_int", n, time.perf_counter() - start)
+
+    start = time.perf_counter()
+    for _ in range(n):
+        BinaryValue("0101xxzz" * 4).binstr
+    rate("binary_value_from_binstr", n, time.perf_counter() - start)
+
+
+@cocotb.test()
+async def bench_handles(dut):
+    """Create handles, and read and write signals through them"""
+    await _enter_event_loop()
+    n = _count(20000)
+    raw = dut.data_in._handle
+
+    start = time.perf_counter()
+    for _ in range(n):
+        # Drop the cached handle so that a new one is created
+        del cocotb.handle._handle2obj[raw]
+        cocotb.handle.SimHandle(raw, "bench_top.data_in")
+    rate("handle_create", n, time.perf_counter() - start)
+
+    start = time.perf_counter()
+    for _ in range(n):
+        dut.data_in
+    rate("handle_lookup", n, time.perf_counter() - start)
+
+    signal = dut.data_in
+    start = time.perf_counter()
+    for i in range(n):
+        signal.setimmediatevalue(i)
+    rate("signal_write", n, time.perf_counter() - start)
+
+    start = time.perf_counter()
+    for _ in range(n):
+        signal.value
+    rate("signal_read", n, time.perf_counter() - start)
+
+
+class _BenchDriver(Driver):
+    """Drives one word per clock cycle"""
+
+    def __init__(self, signal, clk):
+        self.signal = signal
+        self.clk = clk
+        Driver.__init__(self)
+
+    async def _driver_send(self, transaction, sync=True):
+        await RisingEdge(self.clk)
+        self.signal <= transaction
+
+
+class _BenchMonitor(Monitor):
+    """Samples one word per clock cycle"""
+
+    def __init__(self, signal, clk, callback=None):
+        self.signal = signal
+        self.clk = clk
+        Monitor.__init__(self, callback)
+
+    async def _monitor_recv(self):
+        edge = RisingEdge(self.clk)
+        read_only = ReadOnly()
+        while True:
+            await edge
+            await read_only
+            self._recv(self.signal.value.integer)
+
+
+@cocotb.test()
+async def bench_driver_monitor(dut):
+    """Send transactions through the design with a Driver and a Monitor"""
+    clock = cocotb.fork(Clock(dut.clk, 10, "ns").start())
+    n = _count(5000)
+    received = []
+    done = Event()
+
+    def receive(transaction):
+        received.append(transaction)
+        if len(received) == n:
+            done.set()
+
+    driver = _BenchDriver(dut.data_in, dut.clk)
+    monitor = _BenchMonitor(dut.data_out, dut.clk, callback=receive)
+
+    start = time.perf_counter()
+    for i in range(n):
+        driver.append(i)
+    await done.wait()
+    rate("driver_monitor_transactions", n, time.perf_counter() - start)
+
+    monitor.kill()
+    driver.kill()
+    clock.kill()
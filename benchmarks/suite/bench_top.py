@@ -0,0 +1,16 @@
+# Copyright cocotb contributors
+# Licensed under the Revised BSD License, see LICENSE for details.
+# SPDX-License-Identifier: BSD-3-Clause
+
+"""bench_top.sv, for the pure-Python stand-in simulator."""
+
+import simulator
+
+
+def design():
+    top = simulator.Module("bench_top")
+    clk = top.add(simulator.Signal("clk"))
+    data_in = top.add(simulator.Signal("data_in", width=32))
+    data_out = top.add(simulator.Signal("data_out", width=32))
+    top.add(simulator.Register(data_out, clk, data_in))
+    return top
@@ -0,0 +1,16 @@
+// Copyright cocotb contributors
+// Licensed under the Revised BSD License, see LICENSE for details.
+// SPDX-License-Identifier: BSD-3-Clause
+
+`timescale 1 ns / 1 ps
+
+module bench_top (
+    input             clk,
+    input      [31:0] data_in,
+    output reg [31:0] data_out
+);
+
+always @(posedge clk)
+    data_out <= data_in;
+
+endmodule
@@ -0,0 +1,119 @@
+# Copyright cocotb contributors
+# Licensed under the Revised BSD License, see LICENSE for details.
+# SPDX-License-Identifier: BSD-3-Clause
+
+"""Run the cocotb benchmark suite and write the results as JSON.
+
+Uses Icarus Verilog or Verilator if one is installed, otherwise the
+pure-Python stand-in simulator, unless ``--sim`` is given. The report has
+the results of each benchmark in ``bench_cocotb.py``, the time taken to run
+a single empty test (``regression_startup``), and enough about the
+environment to compare reports over time.
+"""
+
+import argparse
+import datetime
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import xml.etree.ElementTree as ET
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+COCOTB_ROOT = os.path.dirname(os.path.dirname(HERE))
+
+
+def default_simulator():
+    if shutil.which("iverilog"):
+        return "icarus"
+    if shutil.which("verilator"):
+        return "verilator"
+    return "pysim"
+
+
+def make(args, env, log):
+    subprocess.run(["make", "-C", HERE] + args, env=env, check=True,
+                   stdout=log, stderr=subprocess.STDOUT)
+
+
+def failures(results_xml):
+    """Return the names of the test cases that failed in *results_xml*."""
+    tree = ET.parse(results_xml)
+    return [case.get("name") for case in tree.iter("testcase")
+            if case.find("failure") is not None or case.find("error") is not None]
+
+
+def git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], cwd=COCOTB_ROOT, check=True,
+                              stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+                              universal_newlines=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sim", default=default_simulator(),
+                        help="the simulator to use (default: %(default)s)")
+    parser.add_argument("--scale", type=float, default=1.0,
+                        help="multiply the number of operations of each benchmark by this")
+    parser.add_argument("--startup-runs", type=int, default=5,
+                        help="number of runs to take the median startup time of")
+    parser.add_argument("--output", "-o", default=None,
+                        help="file to write the JSON report to (default: stdout)")
+    parser.add_argument("--log", default=os.devnull,
+                        help="file to write the output of the simulations to")
+    args = parser.parse_args()
+
+    sys.path.insert(0, COCOTB_ROOT)
+    from cocotb._version import __version__
+
+    with tempfile.TemporaryDirectory() as tmp, open(args.log, "w") as log:
+        results_file = os.path.join(tmp, "bench_results.json")
+        results_xml = os.path.join(tmp, "results.xml")
+        env = dict(os.environ)
+        env.update(BENCH_RESULTS=results_file, BENCH_SCALE=str(args.scale),
+                   COCOTB_RESULTS_FILE=results_xml)
+        make_args = ["SIM=" + args.sim]
+
+        # Builds the design and the cocotb libraries, if needed
+        make(make_args + ["sim"], env, log)
+        failed = failures(results_xml)
+        if failed:
+            sys.exit("Benchmarks failed: " + ", ".join(failed))
+        with open(results_file) as f:
+            results = json.load(f)
+
+        startup = []
+        for _ in range(args.startup_runs):
+            start = time.perf_counter()
+            make(make_args + ["sim", "TESTCASE=bench_startup"], env, log)
+            startup.append(time.perf_counter() - start)
+        results["regression_startup"] = {"value": statistics.median(startup), "unit": "s"}
+
+    report = {
+        "date": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        "simulator": args.sim,
+        "scale": args.scale,
+        "cocotb_version": __version__,
+        "git_revision": git_revision(),
+        "python_version": platform.python_version(),
+        "platform": platform.platform(),
+        "results": results,
+    }
+    text = json.dumps(report, indent=2, sort_keys=True)
+    if args.output is None:
+        print(text)
+    else:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+
+
+if __name__ == "__main__":
+    main()
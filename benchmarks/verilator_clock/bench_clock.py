@@ -0,0 +1,29 @@
+# Copyright cocotb contributors
+# Licensed under the Revised BSD License, see LICENSE for details.
+# SPDX-License-Identifier: BSD-3-Clause
+"""
+Simulation speed of a design with a clock that is slow compared to the precision
+"""
+import os
+import time
+
+import cocotb
+from cocotb.clock import Clock
+from cocotb.triggers import Timer
+from cocotb.utils import get_sim_time
+
+CYCLES = int(os.environ.get("BENCH_CYCLES", 100000))
+
+
+@cocotb.test()
+def bench_clock(dut):
+    """Run a 1 ns clock for BENCH_CYCLES cycles"""
+    cocotb.fork(Clock(dut.clk, 1, 'ns').start())
+
+    start_sim = get_sim_time('ns')
+    start_real = time.perf_counter()
+    yield Timer(CYCLES, 'ns')
+    real = time.perf_counter() - start_real
+    sim = get_sim_time('ns') - start_sim
+
+    dut._log.info("%d cycles in %.3f s: %.0f sim ns / real s", CYCLES, real, sim / real)
@@ -8,7 +8,10 @@ Useful for Jenkins.
 import os
 import sys
 import argparse
-from xml.etree import cElementTree as ET
+import json
+import concurrent.futures
+import xml.etree.ElementTree as ET
+from xml.sax.saxutils import quoteattr
 
 
 def find_all(name, path):
@@ -31,6 +34,12 @@ def get_parser():
     parser.add_argument("--testsuites_name", dest="testsuites_name", type=str, required=False,
                         default="results",
                         help="Name value for testsuites tag")
+    parser.add_argument("--json_summary", dest="json_summary", type=str, required=False,
+                        default=None,
+                        help="Name of a file to write a JSON summary of the results to")
+    parser.add_argument("--jobs", dest="jobs", type=int, required=False,
+                        default=os.cpu_count() or 1,
+                        help="Number of processes to read the result files with")
     parser.add_argument("--verbose", dest="debug", action='store_const', required=False,
                         const=True, default=False,
                         help="Verbose/debug output")
@@ -41,51 +50,146 @@ def get_parser():
     return parser
 
 
+def _float(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def read_testsuites(fname):
+    """Read the test suites in the file *fname*.
+
+    The file is parsed incrementally, and each test suite is cleared once it
+    has been read, so that the whole document is never in memory.
+
+    Returns:
+        A list with the attributes, the serialized contents and the
+        statistics of each test suite.
+    """
+    testsuites = []
+    for _, elem in ET.iterparse(fname):
+        if elem.tag != "testsuite":
+            continue
+        stats = {"testcases": 0, "failures": 0, "skipped": 0, "sim_time_ns": 0.0, "real_time_s": 0.0}
+        failed = []
+        for child in elem:
+            if child.tag != "testcase":
+                continue
+            stats["testcases"] += 1
+            stats["sim_time_ns"] += _float(child.get("sim_time_ns"))
+            stats["real_time_s"] += _float(child.get("time"))
+            if child.find("skipped") is not None:
+                stats["skipped"] += 1
+            if child.find("failure") is not None:
+                stats["failures"] += 1
+                failed.append((child.get("classname"), child.get("name")))
+        # Serializing the whole suite at once is much faster than each child on its own.
+        # The start tag ends at the first '>', as it is escaped in attribute values.
+        elem.tail = None
+        text = ET.tostring(elem, encoding="unicode").encode("UTF-8")
+        body = b"" if text.endswith(b"/>") else text[text.index(b">") + 1:-len(b"</testsuite>")]
+        testsuites.append((dict(elem.attrib), [body], stats, failed))
+        elem.clear()
+    return testsuites
+
+
+def read_all(fnames, jobs):
+    """Read the test suites of each of *fnames*, with *jobs* processes at once.
+
+    Yields (file name, test suites or exception) pairs, in the order of *fnames*.
+    """
+    if jobs <= 1 or len(fnames) <= 1:
+        for fname in fnames:
+            try:
+                yield fname, read_testsuites(fname)
+            except (OSError, ET.ParseError) as e:
+                yield fname, e
+        return
+
+    with concurrent.futures.ProcessPoolExecutor(max_workers=jobs) as pool:
+        futures = [pool.submit(read_testsuites, fname) for fname in fnames]
+        for fname, future in zip(fnames, futures):
+            try:
+                yield fname, future.result()
+            except (OSError, ET.ParseError) as e:
+                yield fname, e
+
+
+def write_results(fname, name, testsuites):
+    """Write the merged *testsuites* to *fname*."""
+    with open(fname, "wb") as f:
+        f.write(b"<?xml version='1.0' encoding='UTF-8'?>\n")
+        f.write("<testsuites name={}>\n".format(quoteattr(name)).encode("UTF-8"))
+        for testsuite in testsuites.values():
+            attributes = "".join(" {}={}".format(k, quoteattr(v)) for k, v in testsuite["attrib"].items())
+            f.write("<testsuite{}>\n".format(attributes).encode("UTF-8"))
+            for body in testsuite["children"]:
+                f.write(body)
+            f.write(b"</testsuite>\n")
+        f.write(b"</testsuites>\n")
+
+
 def main():
 
     parser = get_parser()
     args = parser.parse_args()
     rc = 0
 
-    result = ET.Element("testsuites", name=args.testsuites_name);
+    # (name, package) -> the attributes, children and statistics of each merged test suite
+    testsuites = {}
+    fnames = list(find_all("results.xml", args.directory))
 
-    for fname in find_all("results.xml", args.directory):
+    for fname, result in read_all(fnames, args.jobs):
         if args.debug : print("Reading file %s" % fname)
-        tree = ET.parse(fname)
-        for ts in tree.iter("testsuite"):
+        if isinstance(result, Exception):
+            print("Unable to read %s: %s" % (fname, result))
+            if args.set_rc:
+                rc = 1
+            continue
+        for attrib, children, stats, failed in result:
+            name, package = attrib.get('name'), attrib.get('package')
             if args.debug:
-                print("Ts name : %s, package : %s" % ( ts.get('name'), ts.get('package')))
-            use_element = None
-            for existing in result:
-                if existing.get('name') == ts.get('name') and existing.get('package') == ts.get('package'):
-                    if args.debug:
-                        print("Already found")
-                    use_element = existing
-                    break
-            if use_element is None:
-                result.append(ts)
+                print("Ts name : %s, package : %s" % (name, package))
+            key = (name, package)
+            if key in testsuites:
+                if args.debug:
+                    print("Already found")
+                testsuite = testsuites[key]
+                testsuite["children"].extend(children)
+                for stat, value in stats.items():
+                    testsuite[stat] += value
             else:
-                #for tc in ts.getiterator("testcase"):
-                use_element.extend(list(ts));
-
-    if args.debug:
-        ET.dump(result)
-
-    testsuite_count = 0
-    testcase_count = 0
-    for testsuite in result.iter('testsuite'):
-        testsuite_count += 1
-        for testcase in testsuite.iter('testcase'):
-            testcase_count += 1
-            for failure in testcase.iter('failure'):
+                testsuite = testsuites[key] = dict(stats, name=name, package=package, attrib=attrib,
+                                                   children=children)
+            for classname, testcase in failed:
                 if args.set_rc:
                     rc = 1
-                print("Failure in testsuite: '%s' classname: '%s' testcase: '%s' with parameters '%s'" % (testsuite.get('name'), testcase.get('classname'), testcase.get('name'), testsuite.get('package')))
-
-    print("Ran a total of %d TestSuites and %d TestCases" % (testsuite_count, testcase_count))
-
-
-    ET.ElementTree(result).write(args.output_file, encoding="UTF-8")
+                print("Failure in testsuite: '%s' classname: '%s' testcase: '%s' with parameters '%s'" % (name, classname, testcase, package))
+
+    summary = {
+        "files": len(fnames),
+        "testsuites": len(testsuites),
+        "testcases": 0,
+        "failures": 0,
+        "skipped": 0,
+        "sim_time_ns": 0.0,
+        "real_time_s": 0.0,
+        "suites": [],
+    }
+    for testsuite in testsuites.values():
+        suite = {key: value for key, value in testsuite.items() if key not in ("attrib", "children")}
+        for key in ("testcases", "failures", "skipped", "sim_time_ns", "real_time_s"):
+            summary[key] += suite[key]
+        summary["suites"].append(suite)
+
+    print("Ran a total of %d TestSuites and %d TestCases" % (summary["testsuites"], summary["testcases"]))
+
+    write_results(args.output_file, args.testsuites_name, testsuites)
+    if args.json_summary is not None:
+        with open(args.json_summary, "w") as f:
+            json.dump(summary, f, indent=2)
+            f.write("\n")
     return rc
 
 
@@ -30,6 +30,9 @@ Cocotb is a coroutine, cosimulation framework for writing testbenches in Python.
 
 See http://cocotb.readthedocs.org for full documentation
 """
+from cocotb import _startup
+_startup.install()
+
 import os
 import sys
 import logging
@@ -45,7 +48,7 @@ from cocotb.regression import RegressionManager
 
 
 # Things we want in the cocotb namespace
-from cocotb.decorators import test, coroutine, hook, function, external  # noqa: F401
+from cocotb.decorators import test, coroutine, hook, reset_hook, function, external  # noqa: F401
 
 # Singleton scheduler instance
 # NB this cheekily ensures a singleton since we're replacing the reference
@@ -112,6 +115,20 @@ fork = scheduler.add
 # FIXME is this really required?
 _rlock = threading.RLock()
 
+# Optional subsystems which are only imported when first used
+_lazy_submodules = {
+    "drivers", "monitors", "scoreboard", "wavedrom", "memdebug",
+}
+
+
+def __getattr__(name):
+    # PEP 562 module attribute hook, so that e.g. ``cocotb.drivers`` works
+    # without an explicit import while keeping ``import cocotb`` fast.
+    if name in _lazy_submodules:
+        import importlib
+        return importlib.import_module("cocotb." + name)
+    raise AttributeError("module {!r} has no attribute {!r}".format(__name__, name))
+
 
 def mem_debug(port):
     import cocotb.memdebug
@@ -131,6 +148,7 @@ def _initialise_testbench(root_name):
     comma-separated list of modules to be executed before the first test.
     """
     _rlock.acquire()
+    _startup.mark("simulator elaboration")
 
     memcheck_port = os.getenv('MEMCHECK')
     if memcheck_port is not None:
@@ -177,8 +195,16 @@ def _initialise_testbench(root_name):
 
     global regression_manager
 
-    regression_manager = RegressionManager(root_name, modules, tests=test_str, seed=RANDOM_SEED, hooks=hooks)
+    # Run each test once for each of several seeds, following RANDOM_SEED
+    seeds = None
+    seed_sweep = os.getenv('COCOTB_SEED_SWEEP')
+    if seed_sweep is not None:
+        seeds = [RANDOM_SEED + i for i in range(int(seed_sweep))]
+
+    regression_manager = RegressionManager(root_name, modules, tests=test_str, seed=RANDOM_SEED, hooks=hooks,
+                                           seeds=seeds)
     regression_manager.initialise()
+    _startup.report(log)
     regression_manager.execute()
 
     _rlock.release()
@@ -222,3 +248,6 @@ def process_plusargs():
                 plusargs[name] = value
             else:
                 plusargs[option[1:]] = True
+
+
+_startup.mark("import cocotb")
@@ -0,0 +1,96 @@
+# Copyright cocotb contributors
+# Licensed under the Revised BSD License, see LICENSE for details.
+# SPDX-License-Identifier: BSD-3-Clause
+
+"""The last result of each test, enabled by :envvar:`COCOTB_RESULT_CACHE`.
+
+A result is recorded with the inputs the test ran with: its seed, a hash of
+the HDL sources of the design and a hash of the source of its test module.
+:envvar:`COCOTB_RERUN` uses them to skip tests which need not be run again,
+and ``cocotb-run --last-failed`` to choose the tests to run.
+
+Like the timing database, the cache is an SQLite file, so that the simulator
+processes started by ``cocotb-run`` can all write to the same one.
+"""
+
+import hashlib
+import os
+import sqlite3
+import time
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    module TEXT NOT NULL,
+    test TEXT NOT NULL,
+    seed INTEGER,
+    build_hash TEXT NOT NULL,
+    source_hash TEXT NOT NULL,
+    passed INTEGER NOT NULL,
+    finished REAL NOT NULL,
+    PRIMARY KEY (module, test)
+);
+"""
+
+
+class ResultCache(object):
+    """The last result of each test, stored in the SQLite database *filename*."""
+
+    def __init__(self, filename):
+        self.filename = filename
+        # Other simulator processes may be writing to the same file
+        self._db = sqlite3.connect(filename, timeout=60)
+        self._db.executescript(_SCHEMA)
+
+    def close(self):
+        self._db.close()
+
+    def add(self, module, test, seed, build_hash, source_hash, passed):
+        """Record a run of *test* from *module*, replacing the one before."""
+        with self._db:
+            self._db.execute(
+                "INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (module, test, seed, build_hash, source_hash, int(passed), time.time()))
+
+    def results(self, module):
+        """Return the last result of each test of *module*.
+
+        Returns:
+            dict: A ``(seed, build hash, source hash, passed)`` tuple for each test.
+        """
+        rows = self._db.execute(
+            "SELECT test, seed, build_hash, source_hash, passed FROM results WHERE module = ?", (module,))
+        return {test: (seed, build_hash, source_hash, bool(passed))
+                for test, seed, build_hash, source_hash, passed in rows}
+
+    def failed(self, module):
+        """Return the names of the tests of *module* which failed when they last ran."""
+        return [test for test, result in self.results(module).items() if not result[3]]
+
+
+def _hash_file(hasher, filename):
+    try:
+        with open(filename, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                hasher.update(chunk)
+    except OSError:
+        hasher.update(b"\0missing")
+
+
+def build_hash(sources, *extra):
+    """Return a hash of the contents of the files *sources*, and of the strings *extra*."""
+    hasher = hashlib.sha1()
+    for value in extra:
+        hasher.update(str(value).encode("UTF-8") + b"\0")
+    for filename in sources:
+        hasher.update(os.path.abspath(filename).encode("UTF-8") + b"\0")
+        _hash_file(hasher, filename)
+    return hasher.hexdigest()
+
+
+def source_hash(module):
+    """Return a hash of the source file of the module object *module*."""
+    hasher = hashlib.sha1()
+    filename = getattr(module, "__file__", None)
+    if filename is not None:
+        _hash_file(hasher, filename)
+    return hasher.hexdigest()
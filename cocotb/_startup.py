@@ -0,0 +1,107 @@
+# Copyright cocotb contributors
+# Licensed under the Revised BSD License, see LICENSE for details.
+# SPDX-License-Identifier: BSD-3-Clause
+
+"""Startup time profiling, enabled by :envvar:`COCOTB_STARTUP_REPORT`.
+
+Startup is split into phases with :func:`mark`. When enabled, every module
+imported after :mod:`cocotb` starts loading is also timed, similar to
+``python -X importtime``, and :func:`report` logs both once the regression
+manager has been initialised.
+
+This module must only depend on the standard library, as it is imported
+before anything else in :mod:`cocotb`.
+"""
+
+import os
+import sys
+import time
+
+enabled = "COCOTB_STARTUP_REPORT" in os.environ
+
+_phases = []   # (name, seconds)
+_imports = []  # (name, self seconds, cumulative seconds)
+_last_mark = time.perf_counter()
+
+
+def mark(name):
+    """Record the time since the previous mark as the phase *name*."""
+    global _last_mark
+    if not enabled:
+        return
+    now = time.perf_counter()
+    _phases.append((name, now - _last_mark))
+    _last_mark = now
+
+
+class _TimingLoader(object):
+    """Delegating loader which times :meth:`exec_module`."""
+
+    _stack = []  # [name, child seconds] for each import in progress
+
+    def __init__(self, loader):
+        self._loader = loader
+
+    def __getattr__(self, name):
+        return getattr(self._loader, name)
+
+    def create_module(self, spec):
+        return self._loader.create_module(spec)
+
+    def exec_module(self, module):
+        entry = [module.__name__, 0.0]
+        self._stack.append(entry)
+        start = time.perf_counter()
+        try:
+            self._loader.exec_module(module)
+        finally:
+            cumulative = time.perf_counter() - start
+            self._stack.pop()
+            if self._stack:
+                self._stack[-1][1] += cumulative
+            _imports.append((entry[0], cumulative - entry[1], cumulative))
+
+
+class _TimingFinder(object):
+    """Meta path finder which wraps the loader found by the finders after it."""
+
+    def find_spec(self, fullname, path, target=None):
+        finders = sys.meta_path[sys.meta_path.index(self) + 1:]
+        for finder in finders:
+            find_spec = getattr(finder, "find_spec", None)
+            if find_spec is None:
+                continue
+            spec = find_spec(fullname, path, target)
+            if spec is None:
+                continue
+            if spec.loader is not None and hasattr(spec.loader, "exec_module"):
+                spec.loader = _TimingLoader(spec.loader)
+            return spec
+        return None
+
+
+def install():
+    """Start timing imports, if enabled."""
+    if enabled and not any(isinstance(f, _TimingFinder) for f in sys.meta_path):
+        sys.meta_path.insert(0, _TimingFinder())
+
+
+def report(log, top=20):
+    """Log the recorded phases and the slowest imports to *log*."""
+    if not enabled:
+        return
+    for finder in [f for f in sys.meta_path if isinstance(f, _TimingFinder)]:
+        sys.meta_path.remove(finder)
+
+    lines = ["Startup time:", "{:<40} {:>10}".format("PHASE", "TIME (ms)")]
+    for name, seconds in _phases:
+        lines.append("{:<40} {:>10.2f}".format(name, seconds * 1e3))
+    lines.append("{:<40} {:>10.2f}".format("TOTAL", sum(s for _, s in _phases) * 1e3))
+
+    if _imports:
+        lines.append("")
+        lines.append("{:>10} {:>10}  {}".format("SELF (ms)", "CUMUL (ms)", "IMPORTED MODULE"))
+        slowest = sorted(_imports, key=lambda i: i[2], reverse=True)[:top]
+        for name, self_time, cumulative in slowest:
+            lines.append("{:>10.2f} {:>10.2f}  {}".format(self_time * 1e3, cumulative * 1e3, name))
+    log.info("\n".join(lines))
@@ -0,0 +1,106 @@
+# Copyright cocotb contributors
+# Licensed under the Revised BSD License, see LICENSE for details.
+# SPDX-License-Identifier: BSD-3-Clause
+
+"""A persistent record of how long each test took, enabled by :envvar:`COCOTB_TIMING_DB`.
+
+The regression manager adds the real and simulated time of every test it
+runs, and uses the history to run the longest tests of each stage first and
+to warn about tests which have become slower. ``cocotb-run`` uses it to
+balance its shards.
+
+The database is an SQLite file, so that the simulator processes started by
+``cocotb-run`` can all write to the same one.
+"""
+
+import sqlite3
+import statistics
+import time
+
+# Only this many of the most recent runs of each test are kept
+HISTORY = 20
+
+# Shorter runs are not compared to their history, as their times are too noisy
+MIN_REAL_TIME = 1.0
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    module TEXT NOT NULL,
+    test TEXT NOT NULL,
+    finished REAL NOT NULL,
+    real_time REAL NOT NULL,
+    sim_time_ns REAL NOT NULL,
+    ratio REAL NOT NULL,
+    passed INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS runs_by_test ON runs (module, test, finished);
+"""
+
+
+class TimingDatabase(object):
+    """The run times of tests, stored in the SQLite database *filename*."""
+
+    def __init__(self, filename):
+        self.filename = filename
+        # Other simulator processes may be writing to the same file
+        self._db = sqlite3.connect(filename, timeout=60)
+        self._db.executescript(_SCHEMA)
+
+    def close(self):
+        self._db.close()
+
+    def _history(self, module, test, column):
+        rows = self._db.execute(
+            "SELECT {} FROM runs WHERE module = ? AND test = ? AND passed "
+            "ORDER BY finished DESC LIMIT ?".format(column), (module, test, HISTORY))
+        return [value for value, in rows]
+
+    def add(self, module, test, real_time, sim_time_ns, ratio, passed):
+        """Record a run of *test* from *module*, and forget the oldest runs."""
+        with self._db:
+            self._db.execute(
+                "INSERT INTO runs VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (module, test, time.time(), real_time, sim_time_ns, ratio, int(passed)))
+            # By rowid, as runs may finish at the same time
+            self._db.execute(
+                "DELETE FROM runs WHERE module = ? AND test = ? AND rowid NOT IN "
+                "(SELECT rowid FROM runs WHERE module = ? AND test = ? "
+                "ORDER BY finished DESC, rowid DESC LIMIT ?)",
+                (module, test, module, test, HISTORY))
+
+    def durations(self, module):
+        """Return the median real time of the passing runs of each test in *module*."""
+        rows = self._db.execute(
+            "SELECT test, real_time FROM runs WHERE module = ? AND passed", (module,))
+        times = {}
+        for test, real_time in rows:
+            times.setdefault(test, []).append(real_time)
+        return {test: statistics.median(values) for test, values in times.items()}
+
+    def ratio_regression(self, module, test, real_time, ratio, threshold):
+        """Compare the sim time to real time *ratio* of a run of *test* to its history.
+
+        Returns:
+            The median ratio of the earlier passing runs, if *ratio* is lower
+            than it by more than the fraction *threshold*, otherwise ``None``.
+            Runs shorter than :data:`MIN_REAL_TIME` are not compared.
+        """
+        if real_time < MIN_REAL_TIME:
+            return None
+        history = self._history(module, test, "ratio")
+        if not history:
+            return None
+        median = statistics.median(history)
+        if ratio < median * (1 - threshold):
+            return median
+        return None
+
+
+def expected_durations(durations, tests):
+    """Return the expected duration of each of *tests*.
+
+    Tests without a history are expected to take the median time of those
+    with one, or 1 second if there are none.
+    """
+    default = statistics.median(durations.values()) if durations else 1.0
+    return {test: durations.get(test, default) for test in tests}
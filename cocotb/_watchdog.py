@@ -0,0 +1,241 @@
+# Copyright cocotb contributors
+# Licensed under the Revised BSD License, see LICENSE for details.
+# SPDX-License-Identifier: BSD-3-Clause
+
+"""A real time limit on each test, enabled by :envvar:`COCOTB_WATCHDOG_TIMEOUT`.
+
+The limit is kept by a thread, as a test stuck in a loop which does not
+advance the simulation time, or waiting for the thread of an
+:func:`~cocotb.external` function, never returns control to the simulator.
+
+When a test runs for too long, the watchdog logs the state of the scheduler,
+and ends the test as soon as the scheduler gets control back, see
+:meth:`Scheduler._check_watchdog`. The threads of external functions which
+have not finished are abandoned. If the test is stuck in its own Python code
+instead, :exc:`~cocotb.result.RealTimeoutError` is raised in it.
+
+An exception raised asynchronously in the main thread could be delivered in
+the scheduler rather than the test. Instead, the watchdog asks the main thread
+to trace the frames of the task it is running, and the exception is raised at
+the next line of the code of the test, see :meth:`Watchdog._trace_current_task`.
+"""
+
+import ctypes
+import gc
+import os
+import sys
+import threading
+import traceback
+
+from cocotb.log import SimLog
+from cocotb.result import RealTimeoutError
+
+# How long to wait for the scheduler to end the test, before raising an
+# exception in the test code itself, in seconds
+GRACE_TIME = 1.0
+
+_COCOTB_DIR = os.path.dirname(os.path.abspath(__file__)) + os.sep
+
+# The type of the functions passed to Py_AddPendingCall, which the main thread
+# calls the next time it runs Python code
+_PENDING_CALL = ctypes.CFUNCTYPE(ctypes.c_int, ctypes.c_void_p)
+_add_pending_call = ctypes.pythonapi.Py_AddPendingCall
+_add_pending_call.argtypes = [_PENDING_CALL, ctypes.c_void_p]
+_add_pending_call.restype = ctypes.c_int
+
+_STATE_NAMES = {0: "INIT", 1: "RUNNING", 2: "PAUSED", 3: "EXITED"}
+
+
+class Watchdog(object):
+    """Ends tests of *scheduler* which take longer than *timeout* seconds of real time."""
+
+    def __init__(self, scheduler, timeout):
+        self.scheduler = scheduler
+        self.timeout = timeout
+        self.log = SimLog("cocotb.watchdog")
+        self._pid = None
+        self._test = None
+        # Only used by the main thread, see _trace_current_task
+        self._pending_call = _PENDING_CALL(self._trace_current_task)
+        self._interrupt_test = None
+        self._traced_frames = []
+        self._previous_trace = None
+        scheduler._track_tasks = True
+
+    def _start(self):
+        # A forked process has the state of the parent, but not its thread
+        self._pid = os.getpid()
+        self._cond = threading.Condition()
+        self._test = None
+        thread = threading.Thread(target=self._run, name="cocotb_watchdog")
+        thread.daemon = True
+        thread.start()
+
+    def arm(self, test):
+        """Start timing *test*, which is about to run."""
+        if self._pid != os.getpid():
+            self._start()
+        with self._cond:
+            self._test = test
+            self._cond.notify()
+
+    def disarm(self):
+        """Stop timing the test, which has finished."""
+        self._stop_tracing()
+        with self._cond:
+            self._test = None
+            self._cond.notify()
+
+    def _timeout_error(self):
+        return RealTimeoutError(
+            "Test did not finish within COCOTB_WATCHDOG_TIMEOUT of {:g} s".format(self.timeout))
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while self._test is None:
+                    self._cond.wait()
+                test = self._test
+                if not self._wait_while_running(test, self.timeout):
+                    continue
+
+            self.log.error("Test %s has not finished after %g s of real time, ending it\n%s",
+                           test.funcname, self.timeout, format_state(self.scheduler))
+            self.scheduler._watchdog_expired(test, self._timeout_error())
+
+            # The scheduler ends the test the next time it runs a coroutine. If
+            # it does not, the test is running its own code, so interrupt that.
+            with self._cond:
+                while self._wait_while_running(test, GRACE_TIME):
+                    self._interrupt_test = test
+                    _add_pending_call(self._pending_call, None)
+
+    def _wait_while_running(self, test, timeout):
+        """Wait for up to *timeout* seconds for *test* to finish.
+
+        Returns:
+            ``True`` if *test* is still running.
+        """
+        self._cond.wait_for(lambda: self._test is not test, timeout)
+        return self._test is test
+
+    def _trace_current_task(self, _):
+        """Trace the code of the task the main thread is running, to end *test*.
+
+        This is called by the main thread, between two of its bytecodes. It
+        cannot raise the exception itself, as it may be running the scheduler.
+        """
+        test = self._interrupt_test
+        task = self.scheduler._current_task
+        if test is not self.scheduler._test or test._outcome is not None or task is None:
+            return 0
+        frames = [frame for frame in _frames(task) if not _in_cocotb(frame)]
+        if not frames:
+            return 0
+        if not self._traced_frames:
+            self._previous_trace = sys.gettrace()
+        for frame in frames:
+            frame.f_trace = self._trace_line
+        self._traced_frames.extend(frames)
+        # The frames are only traced while a trace function is set
+        sys.settrace(_trace_call)
+        return 0
+
+    def _trace_line(self, frame, event, arg):
+        if event != "line":
+            return self._trace_line
+        test = self._interrupt_test
+        self._stop_tracing()
+        if test is not self.scheduler._test or test._outcome is not None:
+            return None
+        self.log.error("Raising RealTimeoutError in the code of test %s", test.funcname)
+        raise self._timeout_error()
+
+    def _stop_tracing(self):
+        if not self._traced_frames:
+            return
+        for frame in self._traced_frames:
+            frame.f_trace = None
+        self._traced_frames = []
+        sys.settrace(self._previous_trace)
+        self._previous_trace = None
+
+
+def _trace_call(frame, event, arg):
+    # Frames called by the test are not traced, only those traced already
+    return None
+
+
+def _in_cocotb(frame):
+    return frame.f_code.co_filename.startswith(_COCOTB_DIR)
+
+
+def _frames(task):
+    """Return the frames of the coroutine of *task*, outermost first."""
+    frames = []
+    coro = task._coro
+    while coro is not None:
+        if not hasattr(coro, "cr_frame") and not hasattr(coro, "gi_frame"):
+            # The wrapper returned by the __await__ of a native coroutine only
+            # refers to the coroutine
+            coro = next((obj for obj in gc.get_referents(coro) if hasattr(obj, "cr_frame")), None)
+            continue
+        frame = getattr(coro, "cr_frame", None) or getattr(coro, "gi_frame", None)
+        if frame is None:
+            break
+        frames.append(frame)
+        coro = getattr(coro, "cr_await", None) or getattr(coro, "gi_yieldfrom", None)
+    return frames
+
+
+def _indent(entries):
+    return "".join("        " + line for entry in entries for line in entry.splitlines(True)).rstrip("\n")
+
+
+def _format_frames(frames):
+    """Format the suspended *frames* of a coroutine, outermost first."""
+    return _indent(traceback.StackSummary.extract((frame, frame.f_lineno) for frame in frames).format())
+
+
+def _snapshot(get):
+    # The main thread may be changing the scheduler while this one reads it
+    for _ in range(10):
+        try:
+            return get()
+        except RuntimeError:
+            pass
+    return []
+
+
+def format_state(scheduler):
+    """Describe what the tasks and threads of *scheduler* are waiting for."""
+    lines = []
+
+    lines.append("Triggers, with the tasks waiting on them:")
+    for trigger, tasks in _snapshot(lambda: list(scheduler._trigger2coros.items())):
+        lines.append("    {}: {}".format(trigger, ", ".join(str(task) for task in list(tasks))))
+
+    frames = sys._current_frames()
+    lines.append("Threads of external functions:")
+    for ext in _snapshot(lambda: list(scheduler._pending_threads)):
+        lines.append("    {} ({})".format(ext.thread.name, _STATE_NAMES.get(ext.state, ext.state)))
+        frame = frames.get(ext.thread.ident)
+        if frame is not None:
+            lines.append(_indent(traceback.format_stack(frame)))
+
+    lines.append("Main thread:")
+    frame = frames.get(scheduler._main_thread.ident)
+    if frame is not None:
+        lines.append(_indent(traceback.format_stack(frame)))
+
+    tasks = []
+    for task in ([scheduler._test, scheduler._current_task] +
+                 _snapshot(lambda: list(scheduler._coro2trigger)) +
+                 _snapshot(lambda: list(scheduler._pending_coros))):
+        if task is not None and not any(task is other for other in tasks):
+            tasks.append(task)
+    lines.append("Tasks:")
+    for task in tasks:
+        lines.append("    {}:".format(task))
+        lines.append(_format_frames(_frames(task)))
+    return "\n".join(line for line in lines if line)
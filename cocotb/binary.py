@@ -32,6 +32,23 @@ from __future__ import print_function
 import os
 import random
 import warnings
+from array import array
+
+# numpy, or None if it is not installed, once _numpy() has been called. It is
+# slow to import, and cocotb imports this module whenever a simulation starts.
+_np = False
+
+
+def _numpy():
+    global _np
+    if _np is False:
+        try:
+            import numpy
+        except ImportError:
+            numpy = None
+        _np = numpy
+    return _np
+
 
 resolve_x_to = os.getenv('COCOTB_RESOLVE_X', "VALUE_ERROR")
 
@@ -703,6 +720,292 @@ class BinaryValue(object):
             else:
                 self.binstr = self.binstr[0:self._n_bits-index-1] + val + self.binstr[self._n_bits-index:self._n_bits]
 
+
+# Translation tables used by BinaryArray to split a binstr into its value bits
+# and its unresolvable (X) bits in a single pass.
+_value_table = str.maketrans({c: ("1" if c in BinaryValue._resolve_to_1 else "0")
+                              for c in BinaryValue._permitted_chars if c != "1"})
+_x_mask_table = str.maketrans({c: ("1" if c in BinaryValue._resolve_to_error else "0")
+                               for c in BinaryValue._permitted_chars})
+
+
+class BinaryArray(object):
+    """A sequence of samples sharing a fixed width and representation.
+
+    Where a list of :class:`BinaryValue` objects would store one string and
+    two dictionaries of bound methods per sample, a :class:`BinaryArray`
+    stores the value bits and the unresolvable (``X``, ``Z``, ...) bits of
+    every sample in two contiguous arrays.
+    Samples of up to 64 bits are kept in :class:`array.array` storage,
+    which can be handed to NumPy without a copy; wider samples fall back to
+    lists of Python integers.
+
+    Conversions to integers are done for the whole array at once, and use
+    NumPy if it is installed.
+    Unresolvable bits are handled as described in :envvar:`COCOTB_RESOLVE_X`.
+
+    >>> arr = BinaryArray(4, binaryRepresentation=BinaryRepresentation.TWOS_COMPLEMENT)
+    >>> arr.extend([1, -1, "01x0", BinaryValue("0111")])
+    >>> arr.is_resolvable
+    False
+    >>> arr.x_mask
+    [False, False, True, False]
+    >>> arr[0:2].integers
+    [1, -1]
+
+    .. versionadded:: 1.4
+    """
+
+    def __init__(self, n_bits, values=None,
+                 binaryRepresentation=BinaryRepresentation.UNSIGNED):
+        """
+        Args:
+            n_bits (int): Number of bits in every sample.
+            values (iterable, optional): Initial samples,
+                see :meth:`append` for the accepted types.
+            binaryRepresentation (BinaryRepresentation): The representation
+                of every sample
+                (one of :any:`UNSIGNED`, :any:`SIGNED_MAGNITUDE`, :any:`TWOS_COMPLEMENT`).
+                Defaults to unsigned representation.
+        """
+        if n_bits < 1:
+            raise ValueError("BinaryArray needs at least one bit per sample")
+        self._n_bits = n_bits
+        self._mask = (1 << n_bits) - 1
+        self.binaryRepresentation = binaryRepresentation
+        self._values = self._new_storage()
+        self._x_bits = self._new_storage()
+        if values is not None:
+            self.extend(values)
+
+    def _new_storage(self, items=()):
+        if self._n_bits <= 64:
+            return array("Q", items)
+        return list(items)
+
+    @classmethod
+    def _from_storage(cls, n_bits, binaryRepresentation, values, x_bits):
+        rv = cls(n_bits, binaryRepresentation=binaryRepresentation)
+        rv._values = values
+        rv._x_bits = x_bits
+        return rv
+
+    @property
+    def n_bits(self):
+        """The number of bits in every sample."""
+        return self._n_bits
+
+    def _from_int(self, value):
+        if value < 0:
+            if self.binaryRepresentation == BinaryRepresentation.UNSIGNED:
+                raise ValueError("Attempt to assign negative number to unsigned "
+                                 "BinaryArray")
+            if self.binaryRepresentation == BinaryRepresentation.SIGNED_MAGNITUDE:
+                if -value >> (self._n_bits - 1):
+                    raise ValueError("Value %d does not fit in %d bits" % (value, self._n_bits))
+                value = (1 << (self._n_bits - 1)) | -value
+        if value & ~self._mask and value >> (self._n_bits - 1) != -1:
+            raise ValueError("Value %d does not fit in %d bits" % (value, self._n_bits))
+        return value & self._mask
+
+    def _from_binstr(self, binstr):
+        if len(binstr) != self._n_bits:
+            raise ValueError("Expected a binstr of %d bits, got %r" % (self._n_bits, binstr))
+        try:
+            return int(binstr.translate(_value_table), 2), int(binstr.translate(_x_mask_table), 2)
+        except ValueError:
+            raise ValueError("Attempting to assign %r to a %s" %
+                             (binstr, self.__class__.__name__))
+
+    def append(self, value):
+        """Append a sample.
+
+        Args:
+            value (int or str or BinaryValue): The sample, as an integer in
+                the array's representation, a binstr of exactly :attr:`n_bits`
+                characters, or a :class:`BinaryValue`.
+        """
+        if isinstance(value, BinaryValue):
+            value = value.binstr
+        if isinstance(value, str):
+            value, x_bits = self._from_binstr(value)
+        else:
+            value, x_bits = self._from_int(int(value)), 0
+        self._values.append(value)
+        self._x_bits.append(x_bits)
+
+    def extend(self, values):
+        """Append every sample in *values*, see :meth:`append`."""
+        if isinstance(values, BinaryArray):
+            if values._n_bits != self._n_bits:
+                raise ValueError("Cannot extend a %d-bit BinaryArray with %d-bit samples" %
+                                 (self._n_bits, values._n_bits))
+            self._values.extend(values._values)
+            self._x_bits.extend(values._x_bits)
+            return
+        for value in values:
+            self.append(value)
+
+    @property
+    def x_mask(self):
+        """A list of booleans, true for every sample with unresolvable bits."""
+        return [x != 0 for x in self._x_bits]
+
+    @property
+    def is_resolvable(self):
+        """``True`` if no sample contains unresolvable bits."""
+        return not any(self._x_bits)
+
+    def _resolved(self):
+        """Return the value bits with unresolvable bits handled as
+        :envvar:`COCOTB_RESOLVE_X` requests."""
+        if self.is_resolvable or resolve_x_to == "ZEROS":
+            return self._values
+        if resolve_x_to == "ONES":
+            return self._new_storage(v | x for v, x in zip(self._values, self._x_bits))
+        if resolve_x_to == "RANDOM":
+            return self._new_storage(v | (x & random.getrandbits(self._n_bits))
+                                     for v, x in zip(self._values, self._x_bits))
+        index = self.x_mask.index(True)
+        raise ValueError("Unable to resolve sample %d to binary >%s<" % (index, self.binstr(index)))
+
+    def _unsigned_to_signed(self, values):
+        n = self._n_bits
+        np = _numpy() if n <= 64 else None
+        if np is not None:
+            raw = np.frombuffer(values, dtype=np.uint64)
+            # shift the sign bit into bit 63, then arithmetic-shift it back
+            signed = (raw << np.uint64(64 - n)).view(np.int64) >> np.int64(64 - n)
+            return signed.tolist()
+        sign = 1 << (n - 1)
+        return [(v ^ sign) - sign for v in values]
+
+    def _unsigned_to_signed_mag(self, values):
+        n = self._n_bits
+        sign = 1 << (n - 1)
+        magnitude = sign - 1
+        return [-(v & magnitude) if v & sign else v for v in values]
+
+    @property
+    def integers(self):
+        """The samples as a list of integers in the array's representation."""
+        values = self._resolved()
+        if self.binaryRepresentation == BinaryRepresentation.TWOS_COMPLEMENT:
+            return self._unsigned_to_signed(values)
+        if self.binaryRepresentation == BinaryRepresentation.SIGNED_MAGNITUDE:
+            return self._unsigned_to_signed_mag(values)
+        return list(values)
+
+    @property
+    def unsigned_integers(self):
+        """The samples as a list of unsigned integers."""
+        return list(self._resolved())
+
+    @property
+    def signed_integers(self):
+        """The samples as a list of two's complement signed integers."""
+        return self._unsigned_to_signed(self._resolved())
+
+    def to_numpy(self, signed=None):
+        """Return the samples as a NumPy array.
+
+        Needs the :mod:`numpy` module to be installed and :attr:`n_bits` to
+        be at most 64.
+
+        Args:
+            signed (bool, optional): Return ``int64`` two's complement values
+                instead of ``uint64`` values.
+                Defaults to whether the representation is
+                :any:`TWOS_COMPLEMENT`.
+        """
+        np = _numpy()
+        if np is None:
+            raise RuntimeError("BinaryArray.to_numpy() needs the numpy module")
+        if self._n_bits > 64:
+            raise ValueError("Only samples of up to 64 bits can be converted to a NumPy array")
+        if signed is None:
+            signed = self.binaryRepresentation == BinaryRepresentation.TWOS_COMPLEMENT
+        if signed:
+            return np.array(self._unsigned_to_signed(self._resolved()), dtype=np.int64)
+        return np.array(self._resolved(), dtype=np.uint64)
+
+    def binstr(self, index):
+        """Return sample *index* as a binstr, with unresolvable bits shown as ``x``."""
+        value, x_bits = self._values[index], self._x_bits[index]
+        binstr = "{0:0{1}b}".format(value, self._n_bits)
+        if x_bits:
+            binstr = "".join("x" if x == "1" else b for b, x in
+                             zip(binstr, "{0:0{1}b}".format(x_bits, self._n_bits)))
+        return binstr
+
+    def __len__(self):
+        return len(self._values)
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield self[index]
+
+    def __getitem__(self, key):
+        """Indexing returns a :class:`BinaryValue`, slicing returns a new
+        :class:`BinaryArray` sharing this array's width and representation.
+
+        Unlike :class:`BinaryValue`, indices select samples and follow the
+        usual Python conventions.
+        """
+        if isinstance(key, slice):
+            return self._from_storage(self._n_bits, self.binaryRepresentation,
+                                      self._values[key], self._x_bits[key])
+        return BinaryValue(self.binstr(key), n_bits=self._n_bits,
+                           binaryRepresentation=self.binaryRepresentation)
+
+    def __eq__(self, other):
+        """Samples are compared as in :meth:`mismatches`.
+
+        *other* may hold any of the types accepted by :meth:`append`, so an
+        array equals the integers or the binstrs it was built from, and a
+        sample with unresolvable bits only equals one with ``X`` in the same
+        places.
+        """
+        if not isinstance(other, BinaryArray):
+            try:
+                other = BinaryArray(self._n_bits, other, self.binaryRepresentation)
+            except (TypeError, ValueError):
+                return NotImplemented
+        return (self._n_bits == other._n_bits and len(self) == len(other) and
+                not self.mismatches(other))
+
+    def __ne__(self, other):
+        rv = self.__eq__(other)
+        if rv is NotImplemented:
+            return rv
+        return not rv
+
+    __hash__ = None
+
+    def mismatches(self, other):
+        """Return the indices of the samples that differ from *other*.
+
+        Unresolvable bits are compared as-is rather than resolved, so a
+        sample only matches another sample with ``X`` in the same places.
+
+        Args:
+            other (BinaryArray or iterable): The samples to compare against,
+                of the same length as this array.
+        """
+        if not isinstance(other, BinaryArray):
+            other = BinaryArray(self._n_bits, other, self.binaryRepresentation)
+        if len(other) != len(self):
+            raise ValueError("Cannot compare BinaryArrays of length %d and %d" %
+                             (len(self), len(other)))
+        return [i for i, (v, x, ov, ox) in enumerate(zip(self._values, self._x_bits,
+                                                           other._values, other._x_bits))
+                if x != ox or (v & ~x) != (ov & ~ox)]
+
+    def __repr__(self):
+        return "{}({}, [{}])".format(type(self).__name__, self._n_bits,
+                                     ", ".join(repr(self.binstr(i)) for i in range(len(self))))
+
+
 if __name__ == "__main__":
     import doctest
     doctest.testmod()
@@ -30,8 +30,8 @@ import sys
 import time
 import logging
 import functools
-import inspect
 import os
+import types
 
 import cocotb
 from cocotb.log import SimLog
@@ -87,10 +87,10 @@ class RunningTask(object):
     """
     def __init__(self, inst):
 
-        if inspect.iscoroutine(inst):
+        if isinstance(inst, types.CoroutineType):
             self._natively_awaitable = True
             self._coro = inst.__await__()
-        elif inspect.isgenerator(inst):
+        elif isinstance(inst, types.GeneratorType):
             self._natively_awaitable = False
             self._coro = inst
         else:
@@ -243,6 +243,7 @@ class RunningTest(RunningCoroutine):
         self.skip = parent.skip
         self.stage = parent.stage
         self._id = parent._id
+        self._seed = None  # set by the regression manager when sweeping seeds
 
         # make sure not to create a circular reference here
         self.handler = RunningTest.ErrorLogHandler(self.error_messages.append)
@@ -398,6 +399,27 @@ class hook(coroutine, metaclass=_decorator_helper):
         self.name = self._func.__name__
 
 
+@public
+class reset_hook(coroutine, metaclass=_decorator_helper):
+    """Decorator to mark a function as a reset hook for cocotb.
+
+    Used as ``@cocotb.reset_hook()``.
+
+    Reset hooks are found in the test modules and in the modules named by
+    :envvar:`COCOTB_HOOKS`. Every reset hook is run at the start of every
+    test, with the DUT as its argument, to return the design and the testbench
+    to a known state. This lets many tests, or one test with many seeds (see
+    :envvar:`COCOTB_SEED_SWEEP`), share one simulation. An exception raised by
+    a reset hook fails the test.
+
+    .. versionadded:: 1.4
+    """
+    def __init__(self, f):
+        super(reset_hook, self).__init__(f)
+        self.im_reset_hook = True
+        self.name = self._func.__name__
+
+
 @public
 class test(coroutine, metaclass=_decorator_helper):
     """Decorator to mark a function as a test.
@@ -29,11 +29,11 @@
 
 # -*- coding: utf-8 -*-
 
-import ctypes
 import warnings
 import collections.abc
 
 import os
+import sys
 
 if "COCOTB_SIM" in os.environ:
     import simulator
@@ -614,7 +614,10 @@ class ModifiableObject(NonConstantObject):
         if isinstance(value, int) and value < 0x7fffffff and len(self) <= 32:
             simulator.set_signal_val_long(self._handle, set_action, value)
             return
-        if isinstance(value, ctypes.Structure):
+        # Avoid importing ctypes just for this check: a Structure can only
+        # have been created if the caller already imported it.
+        ctypes = sys.modules.get("ctypes")
+        if ctypes is not None and isinstance(value, ctypes.Structure):
             value = BinaryValue(value=cocotb.utils.pack(value), n_bits=len(self))
         elif isinstance(value, int):
             value = BinaryValue(value=value, n_bits=len(self), bigEndian=False)
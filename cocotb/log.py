@@ -29,11 +29,18 @@
 Everything related to logging
 """
 
+import copy
 import os
 import sys
 import logging
+import queue
+import struct
+import threading
 import warnings
+import weakref
 
+import cocotb
+from cocotb import utils
 from cocotb.utils import (
     get_sim_time, get_time_from_sim_steps, want_color_output
 )
@@ -52,6 +59,9 @@ _FILENAME_CHARS = 20  # noqa
 _LINENO_CHARS   = 4  # noqa
 _FUNCNAME_CHARS = 31  # noqa
 
+# Types which can be formatted on another thread after the log call returns
+_IMMUTABLE_ARG_TYPES = (str, int, float, bool, bytes, type(None))
+
 
 def default_config():
     """ Apply the default cocotb log formatting to the root logger.
@@ -62,6 +72,13 @@ def default_config():
     :class:`SimTimeContextFilter` filter so that
     :attr:`~logging.LogRecord.created_sim_time` is available to the formatter.
 
+    If :envvar:`COCOTB_LOG_ASYNC` is defined, the handler is wrapped in a
+    :class:`SimLogQueueHandler`, so that records are formatted and written by
+    a background thread.
+
+    If :envvar:`COCOTB_LOG_BINARY` is defined, records are also written to
+    the file it names by a :class:`SimLogBinaryHandler`.
+
     The logging level for cocotb logs is set based on the
     :envvar:`COCOTB_LOG_LEVEL` environment variable, which defaults to ``INFO``.
 
@@ -72,16 +89,24 @@ def default_config():
     """
     # construct an appropriate handler
     hdlr = logging.StreamHandler(sys.stdout)
-    hdlr.addFilter(SimTimeContextFilter())
     if want_color_output():
         hdlr.setFormatter(SimColourLogFormatter())
     else:
         hdlr.setFormatter(SimLogFormatter())
+    if "COCOTB_LOG_ASYNC" in os.environ:
+        capacity = int(os.getenv("COCOTB_LOG_BUFFER_SIZE", 10000))
+        hdlr = SimLogQueueHandler(hdlr, capacity=capacity)
+    hdlr.addFilter(SimTimeContextFilter())
+    handlers = [hdlr]
+    if "COCOTB_LOG_BINARY" in os.environ:
+        binary_hdlr = SimLogBinaryHandler(os.environ["COCOTB_LOG_BINARY"])
+        binary_hdlr.addFilter(SimTimeContextFilter())
+        handlers.append(binary_hdlr)
 
 
     logging.setLoggerClass(SimBaseLog)  # For backwards compatibility
     logging.basicConfig()
-    logging.getLogger().handlers = [hdlr]  # overwrite default handlers
+    logging.getLogger().handlers = handlers  # overwrite default handlers
 
     # apply level settings for cocotb
     log = logging.getLogger('cocotb')
@@ -95,14 +120,24 @@ def default_config():
 
     # Notify GPI of log level, which it uses as an optimization to avoid
     # calling into Python.
+    _notify_gpi_of_level(_default_log)
+
+
+def _notify_gpi_of_level(level):
+    """Tell the GPI that a log level changed, so that it drops its cached levels."""
     if "COCOTB_SIM" in os.environ:
         import simulator
-        simulator.log_level(_default_log)
+        simulator.log_level(level)
 
 
 class SimBaseLog(logging.getLoggerClass()):
     """ This class only exists for backwards compatibility """
 
+    def setLevel(self, level):
+        super().setLevel(level)
+        # The GPI caches the level of the loggers it logs to
+        _notify_gpi_of_level(logging.getLogger("cocotb").getEffectiveLevel())
+
     @property
     def logger(self):
         warnings.warn(
@@ -135,16 +170,23 @@ class SimTimeContextFilter(logging.Filter):
     This uses the approach described in the :ref:`Python logging cookbook <python:filters-contextual>`.
 
     This adds the :attr:`~logging.LogRecord.created_sim_time` attribute.
+    Records logged by threads other than the main thread, such as those of
+    :func:`~cocotb.external` functions, get the last time seen by the main
+    thread, as only it may call into the simulator.
     """
 
     # needed to make our docs render well
     def __init__(self):
         """ Takes no arguments """
         super().__init__()
+        self._last_sim_time = None
 
     def filter(self, record):
+        if threading.current_thread() is not threading.main_thread():
+            record.created_sim_time = self._last_sim_time
+            return True
         try:
-            record.created_sim_time = get_sim_time()
+            record.created_sim_time = self._last_sim_time = get_sim_time()
         except RecursionError:
             # get_sim_time may try to log - if that happens, we can't
             # attach a simulator time to this message.
@@ -152,6 +194,432 @@ class SimTimeContextFilter(logging.Filter):
         return True
 
 
+class SimLogQueueHandler(logging.Handler):
+    """Pass log records to a background thread, which formats and writes them.
+
+    Only the simulator time and anything that cannot safely be formatted later
+    are captured when a message is logged. The records are then formatted by
+    the formatter of *target* on a background thread, and written to it in
+    batches, while the simulator carries on.
+
+    At most *capacity* records are buffered. Logging blocks while the buffer
+    is full, so no records are dropped. :meth:`flush` waits until every
+    buffered record has been written, which the regression manager does at
+    the end of each test.
+
+    Args:
+        target (logging.Handler): The handler to write the records with.
+            A :class:`~logging.StreamHandler` is written to in batches, any
+            other handler is given one record at a time.
+        capacity (int): The maximum number of records to buffer.
+        batch_size (int): The maximum number of records to write at once.
+
+    .. versionadded:: 1.4
+    """
+
+    _STOP = object()
+
+    def __init__(self, target, capacity=10000, batch_size=256):
+        super().__init__()
+        self.target = target
+        self.capacity = capacity
+        self.batch_size = batch_size
+        self._start()
+        _queue_handlers.add(self)
+
+    def _start(self):
+        self._queue = queue.Queue(self.capacity)
+        self._thread = threading.Thread(target=self._run, name="cocotb log writer")
+        self._thread.daemon = True
+        self._thread.start()
+
+    def prepare(self, record):
+        """Make *record* safe to format on another thread.
+
+        The message is merged with its arguments now, unless they are all
+        immutable, as the objects may have changed by the time it is written.
+        Exceptions are formatted now for the same reason. *record* itself is
+        left unchanged for the handlers after this one, so a copy of it is
+        returned if anything had to be done.
+        """
+        args = record.args
+        merge = args and not (isinstance(args, tuple) and
+                              all(isinstance(arg, _IMMUTABLE_ARG_TYPES) for arg in args))
+        if not merge and not record.exc_info:
+            return record
+        record = copy.copy(record)
+        if merge:
+            record.msg = record.getMessage()
+            record.args = None
+        if record.exc_info:
+            if not record.exc_text:
+                formatter = self.target.formatter or logging.Formatter()
+                record.exc_text = formatter.formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def emit(self, record):
+        try:
+            self._queue.put(self.prepare(record))
+        except Exception:
+            self.handleError(record)
+
+    def _run(self):
+        q = self._queue
+        while True:
+            batch = [q.get()]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(q.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                self._write([r for r in batch if r is not self._STOP])
+            finally:
+                for _ in batch:
+                    q.task_done()
+            if any(r is self._STOP for r in batch):
+                return
+
+    def _write(self, records):
+        target = self.target
+        if not isinstance(target, logging.StreamHandler):
+            for record in records:
+                target.handle(record)
+            return
+
+        lines = []
+        for record in records:
+            try:
+                lines.append(target.format(record))
+            except Exception:
+                target.handleError(record)
+        if not lines:
+            return
+        target.acquire()
+        try:
+            target.stream.write(target.terminator.join(lines) + target.terminator)
+            target.flush()
+        except Exception:
+            target.handleError(records[-1])
+        finally:
+            target.release()
+
+    def flush(self):
+        """Wait until every buffered record has been written."""
+        if self._thread.is_alive():
+            self._queue.join()
+        self.target.flush()
+
+    def close(self):
+        """Write the buffered records and stop the background thread."""
+        _queue_handlers.discard(self)
+        if self._thread.is_alive():
+            self._queue.put(self._STOP)
+            self._thread.join()
+        self.target.close()
+        super().close()
+
+
+# The open queue handlers, whose writer threads do not exist in a forked child
+_queue_handlers = weakref.WeakSet()
+
+
+def _restart_queue_handlers():
+    for handler in list(_queue_handlers):
+        handler._start()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_restart_queue_handlers)
+
+
+# The binary log format is a header followed by a sequence of entries, each
+# starting with a tag byte. Strings are defined once by a string entry and are
+# then referred to by their index, starting from 1. Message templates are only
+# interned for records with arguments, otherwise the message is stored inline.
+_BINARY_MAGIC = b"COCOTBLOG"
+_BINARY_VERSION = 1
+_BINARY_HEADER = struct.Struct("<9sBb")  # magic, version, simulator precision
+_BINARY_STRING = struct.Struct("<II")  # index, length of the UTF-8 text
+_BINARY_RECORD = struct.Struct("<qdBIIIIQIIBB")
+# sim steps (-1 if unknown), created, level, logger, template (0 if inline),
+# filename, line, task id, task name, function name, flags, number of args
+_BINARY_LENGTH = struct.Struct("<I")
+_BINARY_INT = struct.Struct("<q")
+_BINARY_FLOAT = struct.Struct("<d")
+
+_BINARY_TAG_STRING = b"S"
+_BINARY_TAG_RECORD = b"R"
+_BINARY_FLAG_INLINE = 1  # the message follows the record
+_BINARY_FLAG_EXC = 2  # the exception text follows the arguments
+
+
+def _encode_text(text):
+    data = text.encode("utf-8", "backslashreplace")
+    return _BINARY_LENGTH.pack(len(data)) + data
+
+
+def _encode_arg(arg):
+    if arg is None:
+        return b"n"
+    if arg is True:
+        return b"t"
+    if arg is False:
+        return b"f"
+    if type(arg) is int:
+        if -2**63 <= arg < 2**63:
+            return b"i" + _BINARY_INT.pack(arg)
+        return b"I" + _encode_text(str(arg))
+    if type(arg) is float:
+        return b"d" + _BINARY_FLOAT.pack(arg)
+    if type(arg) is str:
+        return b"s" + _encode_text(arg)
+    return b"b" + _BINARY_LENGTH.pack(len(arg)) + bytes(arg)
+
+
+class SimLogBinaryHandler(logging.Handler):
+    """Write log records to a file in a compact binary format.
+
+    Logger names, file and function names, and the templates of messages
+    logged with arguments are written once and referred to by an index after
+    that. Each record stores the message arguments rather than the formatted
+    message, along with the simulator time, the level and the task that was
+    running. Messages whose arguments are not all numbers, strings or bytes,
+    including subclasses of those such as enumerations, are formatted before
+    being written.
+
+    Use :func:`read_binary_log` or the ``cocotb-logview`` script to read the
+    file back.
+
+    A forked process, see :envvar:`COCOTB_FORK_JOBS`, writes its records to
+    a file of its own, named *filename* followed by ``.`` and its process ID.
+
+    Args:
+        filename (str): The file to write to.
+
+    .. versionadded:: 1.4
+    """
+
+    def __init__(self, filename):
+        super().__init__()
+        self.filename = filename
+        self._open(filename)
+        _binary_handlers.add(self)
+
+    def _open(self, filename):
+        self._file = open(filename, "wb", buffering=1 << 20)
+        self._file.write(_BINARY_HEADER.pack(_BINARY_MAGIC, _BINARY_VERSION,
+                                             utils._LOG_SIM_PRECISION))
+        self._strings = {"": 0}
+
+    def _reopen(self):
+        if self._file.closed:
+            return
+        # Flushed before the fork, so closing it writes nothing the parent has not
+        self._file.close()
+        self._open("{}.{}".format(self.filename, os.getpid()))
+
+    def _intern(self, text, out):
+        index = self._strings.get(text)
+        if index is None:
+            index = len(self._strings)
+            self._strings[text] = index
+            data = text.encode("utf-8", "backslashreplace")
+            out.append(_BINARY_TAG_STRING + _BINARY_STRING.pack(index, len(data)) + data)
+        return index
+
+    def encode(self, record):
+        """Return the entries which encode *record*."""
+        out = []
+        intern = self._intern
+        args = record.args
+        # Subclasses, such as enumerations, would be read back as the base
+        # type, which may format differently
+        if args and not (isinstance(args, tuple) and
+                         all(type(arg) in _IMMUTABLE_ARG_TYPES for arg in args)):
+            msg, args = record.getMessage(), ()
+        else:
+            msg, args = str(record.msg), args or ()
+        flags = 0
+        if args:
+            template = intern(msg, out)
+        else:
+            template = 0
+            flags |= _BINARY_FLAG_INLINE
+        exc_text = record.exc_text
+        if record.exc_info and not exc_text:
+            exc_text = (self.formatter or logging.Formatter()).formatException(record.exc_info)
+        if exc_text:
+            flags |= _BINARY_FLAG_EXC
+
+        sim_time = getattr(record, "created_sim_time", None)
+        scheduler = getattr(cocotb, "scheduler", None)
+        task = getattr(scheduler, "_current_task", None)
+        if task is None:
+            task_id, task_name = 0, 0
+        else:
+            task_id, task_name = id(task), intern(task.__name__, out)
+
+        parts = [_BINARY_TAG_RECORD + _BINARY_RECORD.pack(
+            -1 if sim_time is None else sim_time, record.created, record.levelno,
+            intern(record.name, out), template, intern(record.filename, out),
+            record.lineno or 0, task_id, task_name, intern(record.funcName or "", out),
+            flags, len(args))]
+        if not args:
+            parts.append(_encode_text(msg))
+        for arg in args:
+            parts.append(_encode_arg(arg))
+        if exc_text:
+            parts.append(_encode_text(exc_text))
+        out.append(b"".join(parts))
+        return out
+
+    def emit(self, record):
+        try:
+            self._file.write(b"".join(self.encode(record)))
+        except Exception:
+            self.handleError(record)
+
+    def flush(self):
+        self.acquire()
+        try:
+            if not self._file.closed:
+                self._file.flush()
+        finally:
+            self.release()
+
+    def close(self):
+        _binary_handlers.discard(self)
+        self.acquire()
+        try:
+            self._file.close()
+        finally:
+            self.release()
+        super().close()
+
+
+# The open binary handlers. The strings are numbered by each process, so a
+# forked child can't share the file of its parent.
+_binary_handlers = weakref.WeakSet()
+
+
+def _flush_binary_handlers():
+    for handler in list(_binary_handlers):
+        handler.flush()
+
+
+def _reopen_binary_handlers():
+    for handler in list(_binary_handlers):
+        handler._reopen()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(before=_flush_binary_handlers, after_in_child=_reopen_binary_handlers)
+
+
+class _BinaryLogReader(object):
+    """Read exactly the requested number of bytes, or raise :exc:`EOFError`."""
+
+    def __init__(self, f):
+        self._read = f.read
+
+    def read(self, size):
+        data = self._read(size)
+        if len(data) != size:
+            raise EOFError
+        return data
+
+    def unpack(self, fmt):
+        return fmt.unpack(self.read(fmt.size))
+
+    def text(self):
+        length, = self.unpack(_BINARY_LENGTH)
+        return self.read(length).decode("utf-8")
+
+    def arg(self):
+        tag = self.read(1)
+        if tag == b"n":
+            return None
+        if tag == b"t":
+            return True
+        if tag == b"f":
+            return False
+        if tag == b"i":
+            return self.unpack(_BINARY_INT)[0]
+        if tag == b"I":
+            return int(self.text())
+        if tag == b"d":
+            return self.unpack(_BINARY_FLOAT)[0]
+        if tag == b"s":
+            return self.text()
+        if tag == b"b":
+            length, = self.unpack(_BINARY_LENGTH)
+            return self.read(length)
+        raise ValueError("Unknown argument type {!r} in binary log".format(tag))
+
+
+def read_binary_log(filename):
+    """Read the records written by a :class:`SimLogBinaryHandler`.
+
+    A record cut short at the end of the file, for instance because the
+    simulator crashed, is ignored.
+
+    Args:
+        filename (str): The file to read.
+
+    Yields:
+        :class:`logging.LogRecord`: The records, with the
+        :attr:`~logging.LogRecord.created_sim_time` in simulator steps of the
+        current process, and ``task_id`` and ``task_name`` attributes naming
+        the task that was running, or ``None``.
+
+    Raises:
+        ValueError: If *filename* is not a binary log.
+
+    .. versionadded:: 1.4
+    """
+    with open(filename, "rb") as f:
+        reader = _BinaryLogReader(f)
+        try:
+            magic, version, precision = reader.unpack(_BINARY_HEADER)
+        except EOFError:
+            raise ValueError("{} is not a cocotb binary log".format(filename)) from None
+        if magic != _BINARY_MAGIC or version != _BINARY_VERSION:
+            raise ValueError("{} is not a cocotb binary log".format(filename))
+        strings = [""]
+        while True:
+            try:
+                tag = reader.read(1)
+                if tag == _BINARY_TAG_STRING:
+                    index, length = reader.unpack(_BINARY_STRING)
+                    strings.append(reader.read(length).decode("utf-8"))
+                    continue
+                if tag != _BINARY_TAG_RECORD:
+                    raise ValueError("Unknown entry {!r} in {}".format(tag, filename))
+                (sim_time, created, level, name, template, filename_index, lineno,
+                 task_id, task_name, func_name, flags, nargs) = reader.unpack(_BINARY_RECORD)
+                msg = reader.text() if flags & _BINARY_FLAG_INLINE else strings[template]
+                args = tuple(reader.arg() for _ in range(nargs))
+                exc_text = reader.text() if flags & _BINARY_FLAG_EXC else None
+            except EOFError:
+                return
+
+            record = logging.makeLogRecord(dict(
+                name=strings[name], msg=msg, args=args or None,
+                levelno=level, levelname=logging.getLevelName(level),
+                pathname=strings[filename_index], filename=strings[filename_index],
+                lineno=lineno, funcName=strings[func_name], created=created,
+                exc_text=exc_text,
+                task_id=task_id or None, task_name=strings[task_name] if task_id else None,
+            ))
+            if sim_time < 0:
+                record.created_sim_time = None
+            else:
+                record.created_sim_time = int(utils._ldexp10(sim_time, precision - utils._LOG_SIM_PRECISION))
+            yield record
+
+
 class SimLogFormatter(logging.Formatter):
     """Log formatter to provide consistent log message handling.
 
@@ -243,8 +711,16 @@ class SimColourLogFormatter(SimLogFormatter):
         return self._format(level, record, msg, coloured=True)
 
 
-def _filter_from_c(logger_name, level):
-    return logging.getLogger(logger_name).isEnabledFor(level)
+def _level_from_c(logger_name):
+    """
+    Return the lowest level enabled for the logger *logger_name*, which the
+    GPI caches until it is told of a level change by
+    :meth:`SimBaseLog.setLevel`.
+    """
+    logger = logging.getLogger(logger_name)
+    if getattr(logger, "disabled", False):
+        return logging.CRITICAL + 1
+    return max(logger.getEffectiveLevel(), logger.manager.disable + 1)
 
 
 def _log_from_c(logger_name, level, filename, lineno, msg, function_name):
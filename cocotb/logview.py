@@ -0,0 +1,88 @@
+# Copyright cocotb contributors
+# Licensed under the Revised BSD License, see LICENSE for details.
+# SPDX-License-Identifier: BSD-3-Clause
+
+"""Render the binary logs written when :envvar:`COCOTB_LOG_BINARY` is defined."""
+
+import argparse
+import logging
+import os
+import sys
+
+from cocotb.log import read_binary_log, SimLogFormatter, SimColourLogFormatter
+from cocotb.utils import get_sim_steps, want_color_output
+
+
+def _level(text):
+    if text.isdigit():
+        return int(text)
+    level = logging.getLevelName(text.upper())
+    if not isinstance(level, int):
+        raise argparse.ArgumentTypeError("unknown log level {!r}".format(text))
+    return level
+
+
+def get_parser():
+    parser = argparse.ArgumentParser(
+        prog="cocotb-logview",
+        description="Filter the records of a cocotb binary log and print them as text.")
+    parser.add_argument("file", help="the binary log to read")
+    parser.add_argument("--start", type=float, default=None,
+                        help="only show records logged at or after this simulation time")
+    parser.add_argument("--end", type=float, default=None,
+                        help="only show records logged at or before this simulation time")
+    parser.add_argument("--units", default="ns",
+                        help="the units of --start and --end (default: %(default)s)")
+    parser.add_argument("--logger", action="append", default=[], metavar="NAME",
+                        help="only show records from this logger and its children; can be repeated")
+    parser.add_argument("--level", type=_level, default=logging.NOTSET,
+                        help="only show records of this level or above, e.g. WARNING")
+    parser.add_argument("--colour", action="store_true", default=None,
+                        help="colour the output (default: when writing to a terminal)")
+    parser.add_argument("--no-colour", action="store_false", dest="colour",
+                        help="do not colour the output")
+    return parser
+
+
+def _matches(name, loggers):
+    for logger in loggers:
+        if name == logger or name.startswith(logger + "."):
+            return True
+    return False
+
+
+def main():
+    args = get_parser().parse_args()
+    try:
+        start = None if args.start is None else get_sim_steps(args.start, args.units)
+        end = None if args.end is None else get_sim_steps(args.end, args.units)
+    except ValueError as e:
+        sys.exit("cocotb-logview: {}".format(e))
+    colour = want_color_output() if args.colour is None else args.colour
+    formatter = SimColourLogFormatter() if colour else SimLogFormatter()
+
+    try:
+        for record in read_binary_log(args.file):
+            sim_time = record.created_sim_time
+            if sim_time is not None:
+                if end is not None and sim_time > end:
+                    # Records are written in order of simulation time
+                    break
+                if start is not None and sim_time < start:
+                    continue
+            if record.levelno < args.level:
+                continue
+            if args.logger and not _matches(record.name, args.logger):
+                continue
+            sys.stdout.write(formatter.format(record) + "\n")
+        sys.stdout.flush()
+    except BrokenPipeError:
+        # The output was piped into a command which exited, such as head.
+        # Stop Python from failing to flush stdout again on exit.
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+    except ValueError as e:
+        sys.exit("cocotb-logview: {}".format(e))
+
+
+if __name__ == "__main__":
+    main()
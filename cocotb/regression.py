@@ -28,12 +28,12 @@
 """All things relating to regression capabilities."""
 
 import time
-import inspect
+import random
 from itertools import product
 import sys
 import os
+import logging
 import traceback
-import pdb
 
 if "COCOTB_PDB_ON_EXCEPTION" in os.environ:
     _pdb_on_exception = True
@@ -45,23 +45,18 @@ if "COCOTB_SIM" in os.environ:
 else:
     simulator = None
 
-# Optional support for coverage collection of testbench files
-coverage = None
-if "COVERAGE" in os.environ:
-    try:
-        import coverage
-    except ImportError as e:
-        msg = ("Coverage collection requested but coverage module not available"
-               "\n"
-               "Import error was: %s\n" % repr(e))
-        sys.stderr.write(msg)
-
 import cocotb
 import cocotb.ANSI as ANSI
+from cocotb import _startup
 from cocotb.log import SimLog
 from cocotb.result import TestSuccess, SimFailure
 from cocotb.utils import get_sim_time, remove_traceback_frames, want_color_output
-from cocotb.xunit_reporter import XUnitReporter
+
+
+def _flush_log_handlers():
+    """Wait for log records buffered by the root logger's handlers to be written."""
+    for handler in logging.getLogger().handlers:
+        handler.flush()
 
 
 def _my_import(name):
@@ -75,7 +70,7 @@ def _my_import(name):
 class RegressionManager(object):
     """Encapsulates all regression capability into a single place"""
 
-    def __init__(self, root_name, modules, tests=None, seed=None, hooks=[]):
+    def __init__(self, root_name, modules, tests=None, seed=None, hooks=[], seeds=None):
         """
         Args:
             root_name (str): The name of the root handle.
@@ -86,6 +81,9 @@ class RegressionManager(object):
                 Defaults to ``None``.
             hooks (list, optional): A list of hook modules to import.
                 Defaults to the empty list.
+            seeds (list, optional): Seeds to run every test with, reseeding
+                the random number generator before each run.
+                Defaults to ``None``, meaning each test is run once.
         """
         self._queue = []
         self._root_name = root_name
@@ -94,9 +92,25 @@ class RegressionManager(object):
         self._functions = tests
         self._running_test = None
         self._cov = None
+        self._timing = None
+        self._result_cache = None
+        self._build_hash = None
+        self._source_hashes = {}
+        self._watchdog = None
         self.log = SimLog("cocotb.regression")
         self._seed = seed
+        self._seeds = seeds
         self._hooks = hooks
+        self._reset_hooks = []
+        self._snapshot_after = None    # the name of the test to save a snapshot after
+        self._snapshot_pending = False
+        self._snapshot_file = None
+        self._snapshot_pid = None      # the process which removes the snapshot
+        self._snapshot_test = None     # the test the snapshot is saved after
+        self._fork_jobs = 0
+        self._children = None          # (pid, tests, results file) of each forked process
+        self._fork_dir = None          # where they write their results
+        self._forked = False           # whether this is a forked process
 
     def initialise(self):
 
@@ -110,6 +124,8 @@ class RegressionManager(object):
         # Setup XUnit
         ###################
 
+        from cocotb.xunit_reporter import XUnitReporter
+
         results_filename = os.getenv('COCOTB_RESULTS_FILE', "results.xml")
         suite_name = os.getenv('RESULT_TESTSUITE', "all")
         package_name = os.getenv('RESULT_TESTPACKAGE', "all")
@@ -125,10 +141,19 @@ class RegressionManager(object):
         # Setup Coverage
         ####################
 
-        if coverage is not None:
-            self.log.info("Enabling coverage collection of Python code")
-            self._cov = coverage.coverage(branch=True, omit=["*cocotb*"])
-            self._cov.start()
+        # Optional support for coverage collection of testbench files
+        if "COVERAGE" in os.environ:
+            try:
+                import coverage
+            except ImportError as e:
+                msg = ("Coverage collection requested but coverage module not available"
+                       "\n"
+                       "Import error was: %s\n" % repr(e))
+                sys.stderr.write(msg)
+            else:
+                self.log.info("Enabling coverage collection of Python code")
+                self._cov = coverage.coverage(branch=True, omit=["*cocotb*"])
+                self._cov.start()
 
         # Setup DUT object
         #######################
@@ -141,6 +166,8 @@ class RegressionManager(object):
             raise AttributeError("Can not find Root Handle (%s)" %
                                  self._root_name)
 
+        _startup.mark("regression setup")
+
         # Test Discovery
         ####################
 
@@ -156,6 +183,8 @@ class RegressionManager(object):
                 self.log.info(traceback.format_exc())
                 raise
 
+            self._find_reset_hooks(module)
+
             if self._functions:
 
                 # Specific functions specified, don't auto-discover
@@ -163,9 +192,10 @@ class RegressionManager(object):
                     try:
                         _test = getattr(module, test)
                     except AttributeError:
+                        _test = self._find_generated_test(module, test)
+                    if _test is None:
                         self.log.error("Requested test %s wasn't found in module %s", test, module_name)
-                        err = AttributeError("Test %s doesn't exist in %s" % (test, module_name))
-                        raise err from None  # discard nested traceback
+                        raise AttributeError("Test %s doesn't exist in %s" % (test, module_name))
 
                     if not hasattr(_test, "im_test"):
                         self.log.error("Requested %s from module %s isn't a cocotb.test decorated coroutine",
@@ -180,20 +210,40 @@ class RegressionManager(object):
             for thing in vars(module).values():
                 if hasattr(thing, "im_test"):
                     self._init_test(thing)
+                elif hasattr(thing, "im_generated_tests"):
+                    self._init_generated_tests(thing)
 
-        self._queue.sort(key=lambda test: (test.stage, test._id))
+        if "COCOTB_TIMING_DB" in os.environ:
+            self._open_timing_db(os.environ["COCOTB_TIMING_DB"])
+        if self._timing is not None:
+            self._sort_queue_by_duration()
+        else:
+            self._queue.sort(key=lambda test: (test.stage, test._id))
+        if "COCOTB_SNAPSHOT_AFTER" in os.environ:
+            self._plan_snapshot(os.environ["COCOTB_SNAPSHOT_AFTER"])
+        if "COCOTB_RESULT_CACHE" in os.environ:
+            self._open_result_cache(os.environ["COCOTB_RESULT_CACHE"])
+        if "COCOTB_RERUN" in os.environ:
+            self._filter_queue(os.environ["COCOTB_RERUN"])
+        self._fork_jobs = int(os.getenv("COCOTB_FORK_JOBS", 0))
+        if "COCOTB_WATCHDOG_TIMEOUT" in os.environ:
+            from cocotb._watchdog import Watchdog
+            self._watchdog = Watchdog(cocotb.scheduler, float(os.environ["COCOTB_WATCHDOG_TIMEOUT"]))
 
         for valid_tests in self._queue:
             self.log.info("Found test %s.%s" %
                           (valid_tests.module,
                            valid_tests.funcname))
 
+        _startup.mark("test discovery")
+
         # Process Hooks
         ###################
 
         for module_name in self._hooks:
             self.log.info("Loading hook from module '" + module_name + "'")
             module = _my_import(module_name)
+            self._find_reset_hooks(module)
 
             for thing in vars(module).values():
                 if hasattr(thing, "im_hook"):
@@ -204,6 +254,30 @@ class RegressionManager(object):
                     else:
                         cocotb.scheduler.add(test)
 
+        _startup.mark("hooks")
+
+    @staticmethod
+    def _find_generated_test(module, name):
+        """Create the test *name* if it is one of the lazily generated tests of *module*."""
+        for thing in vars(module).values():
+            if hasattr(thing, "im_generated_tests"):
+                test = thing.find(name)
+                if test is not None:
+                    return test
+        return None
+
+    def _find_reset_hooks(self, module):
+        for thing in vars(module).values():
+            if hasattr(thing, "im_reset_hook") and thing not in self._reset_hooks:
+                self.log.info("Found reset hook %s.%s" % (module.__name__, thing.name))
+                self._reset_hooks.append(thing)
+
+    def _reset_then(self, body):
+        """Run the reset hooks, then the test *body*."""
+        for reset in self._reset_hooks:
+            yield reset(self._dut)
+        return (yield from body)
+
     def tear_down(self):
         # fail remaining tests
         while True:
@@ -214,14 +288,40 @@ class RegressionManager(object):
                                     classname=test.module,
                                     time=repr(0),
                                     sim_time_ns=repr(0),
-                                    ratio_time=repr(0))
+                                    ratio_time=repr(0),
+                                    **self._seed_attrs(test))
             result_pass, _ = self._score_test(test, cocotb.outcomes.Error(SimFailure()))
-            self._store_test_result(test.__module__, test.__name__, result_pass, 0, 0, 0)
+            self._store_test_result(test.module, self._result_name(test), result_pass, 0, 0, 0)
             if not result_pass:
                 self.xunit.add_failure()
                 self.failures += 1
+            if self._result_cache is not None:
+                self._cache_result(test, result_pass)
 
-        # Write out final log messages
+        if self._children:
+            self._collect_children()
+
+        # The parent process reports on all of the tests
+        if not self._forked:
+            self._log_final_summary()
+        self.xunit.write()
+        self.xunit.close()
+        if self._cov:
+            self._cov.stop()
+            self.log.info("Writing coverage data")
+            self._cov.save()
+            self._cov.html_report()
+        if self._timing is not None:
+            self._timing.close()
+        if self._result_cache is not None:
+            self._result_cache.close()
+        self._remove_snapshot()
+        _flush_log_handlers()
+
+        # Setup simulator finalization
+        simulator.stop_simulator()
+
+    def _log_final_summary(self):
         if self.failures:
             self.log.error("Failed %d out of %d tests (%d skipped)" %
                            (self.failures, self.count - 1, self.skipped))
@@ -231,24 +331,310 @@ class RegressionManager(object):
         if len(self.test_results) > 0:
             self._log_test_summary()
         self._log_sim_summary()
+        gpi_stats = simulator.get_gpi_stats()
+        if gpi_stats is not None:
+            self._log_gpi_summary(gpi_stats)
         self.log.info("Shutting down...")
 
-        # Generate output reports
-        self.xunit.write()
+    def _open_timing_db(self, filename):
+        import sqlite3
+        from cocotb._timing_db import TimingDatabase
+        try:
+            self._timing = TimingDatabase(filename)
+        except sqlite3.Error as e:
+            self.log.warning("Unable to open the timing database %s: %s", filename, e)
+            return
+        self._timing_threshold = float(os.getenv("COCOTB_TIMING_THRESHOLD", 0.25))
+
+    def _sort_queue_by_duration(self):
+        """Sort the tests of each stage longest first, from their earlier runs."""
+        from cocotb._timing_db import expected_durations
+        expected = {}
+        for module in set(test.module for test in self._queue):
+            durations = self._timing.durations(module)
+            names = [test.funcname for test in self._queue if test.module == module]
+            for name, duration in expected_durations(durations, names).items():
+                expected[module, name] = duration
+        self._queue.sort(key=lambda test: (test.stage, -expected[test.module, test.funcname], test._id))
+
+    def _record_timing(self, test, result_pass, real_time, sim_time_ns, ratio_time):
+        """Add a test run to the timing database, warning if it ran slower than before."""
+        import sqlite3
+        try:
+            if result_pass:
+                median = self._timing.ratio_regression(test.module, test.funcname, real_time,
+                                                       ratio_time, self._timing_threshold)
+                if median is not None:
+                    self.log.warning("Test %s ran at %.2f ns/s, %.0f%% slower than the median of %.2f ns/s "
+                                     "of its earlier runs", test.funcname, ratio_time,
+                                     100 * (1 - ratio_time / median), median)
+            self._timing.add(test.module, test.funcname, real_time, sim_time_ns, ratio_time, result_pass)
+        except sqlite3.Error as e:
+            self.log.warning("Unable to update the timing database: %s", e)
+
+    def _open_result_cache(self, filename):
+        import sqlite3
+        from cocotb._result_cache import ResultCache, build_hash
+        try:
+            self._result_cache = ResultCache(filename)
+        except sqlite3.Error as e:
+            self.log.warning("Unable to open the result cache %s: %s", filename, e)
+            return
+        if self._build_hash is None:
+            # Set by the makefiles from VERILOG_SOURCES and VHDL_SOURCES
+            sources = os.getenv("COCOTB_HDL_SOURCES", "").split()
+            self._build_hash = build_hash(sources, self._root_name)
+
+    def _inputs(self, test):
+        """Return the seed, build hash and source hash that *test* runs with."""
+        from cocotb._result_cache import source_hash
+        if test.module not in self._source_hashes:
+            self._source_hashes[test.module] = source_hash(sys.modules.get(test.module))
+        seed = test._seed if test._seed is not None else self._seed
+        return seed, self._build_hash, self._source_hashes[test.module]
+
+    def _cache_result(self, test, result_pass):
+        import sqlite3
+        try:
+            self._result_cache.add(test.module, self._result_name(test), *self._inputs(test), passed=result_pass)
+        except sqlite3.Error as e:
+            self.log.warning("Unable to update the result cache: %s", e)
+
+    def _filter_queue(self, rerun):
+        """Skip the tests which need not run again, from their results in the result cache.
+
+        With *rerun* ``"last-failed"``, only the tests which failed when they
+        last ran are run, or all of them if none did. With ``"changed-only"``,
+        the tests which passed when they last ran with the same seed, HDL
+        sources and test module source are skipped.
+        """
+        import sqlite3
+        if rerun not in ("last-failed", "changed-only"):
+            self.log.warning("COCOTB_RERUN must be last-failed or changed-only, not %r, running all of the tests",
+                             rerun)
+            return
+        if self._result_cache is None:
+            self.log.warning("COCOTB_RERUN needs COCOTB_RESULT_CACHE, running all of the tests")
+            return
+        try:
+            results = {module: self._result_cache.results(module)
+                       for module in set(test.module for test in self._queue)}
+        except sqlite3.Error as e:
+            self.log.warning("Unable to read the result cache, running all of the tests: %s", e)
+            return
+
+        def last_result(test):
+            return results[test.module].get(self._result_name(test))
+
+        if rerun == "last-failed":
+            reason = "it did not fail when it last ran"
+            run = [test for test in self._queue if last_result(test) is not None and not last_result(test)[3]]
+            if not run:
+                self.log.info("No tests failed when they last ran, running all of the tests")
+                return
+        else:
+            reason = "it passed when it last ran with the same inputs"
+            run = [test for test in self._queue
+                   if last_result(test) is None or not last_result(test)[3] or
+                   last_result(test)[:3] != self._inputs(test)]
+        # The tests after it start from the state it leaves the design in
+        if self._snapshot_test is not None and self._snapshot_test not in run:
+            run.insert(0, self._snapshot_test)
+
+        running = set(id(test) for test in run)
+        skipped = [test for test in self._queue if id(test) not in running]
+        self.log.info("Running %d of %d tests, from the results of COCOTB_RERUN=%s",
+                      len(run), len(self._queue), rerun)
+        for test in skipped:
+            self.xunit.add_testcase(name=test.funcname,
+                                    classname=test.module,
+                                    time="0.0",
+                                    sim_time_ns="0.0",
+                                    ratio_time="0.0",
+                                    **self._seed_attrs(test))
+            self.xunit.add_skipped(message="Not run again, as " + reason)
+            self.skipped += 1
+            self.ntests -= 1
+            self._store_test_result(test.module, self._result_name(test), None, 0.0, 0.0, 0.0)
+        self._discard_tests(skipped)
+        self._queue = run
+
+    def _plan_snapshot(self, name):
+        """Run the test *name* first, and save a snapshot of the design after it."""
+        for test in self._queue:
+            if test.funcname == name:
+                break
+        else:
+            self.log.warning("Test %s of COCOTB_SNAPSHOT_AFTER is not being run, so no snapshot is saved", name)
+            return
+        self._queue.remove(test)
+        self._queue.insert(0, test)
+        self._snapshot_after = name
+        self._snapshot_test = test
+
+    def _save_snapshot(self):
+        import tempfile
+        self._snapshot_pending = False
+        fd, filename = tempfile.mkstemp(prefix="cocotb_snapshot_")
+        os.close(fd)
+        try:
+            simulator.save_snapshot(filename)
+        except (NotImplementedError, RuntimeError, OSError) as e:
+            os.remove(filename)
+            self.log.warning("Unable to save a snapshot after %s, the tests will not be restored to it: %s",
+                             self._snapshot_after, e)
+            return
+        self._snapshot_file = filename
+        self._snapshot_pid = os.getpid()
+        self.log.info("Saved a snapshot of the design after %s", self._snapshot_after)
+
+    def _restore_snapshot(self):
+        # The scheduler cleared its triggers, coroutines and pending writes
+        # when the previous test ended, and the snapshot was saved at the same
+        # point, so the Python side is already in the state it was saved in
+        try:
+            simulator.restore_snapshot(self._snapshot_file)
+        except (RuntimeError, OSError) as e:
+            self.log.error("Unable to restore the snapshot saved after %s, the remaining tests "
+                           "start in the state left by the test before them: %s", self._snapshot_after, e)
+            self._remove_snapshot()
+
+    def _remove_snapshot(self):
+        if self._snapshot_file is not None:
+            # Forked processes share the snapshot of the parent
+            if os.getpid() == self._snapshot_pid:
+                os.remove(self._snapshot_file)
+            self._snapshot_file = None
+
+    def _fork(self):
+        """Share the remaining tests out between this process and forked ones.
+
+        Each forked process continues the simulation from the current state,
+        which is the one reached after the test of :envvar:`COCOTB_SNAPSHOT_AFTER`,
+        if any, and runs its share of the tests. This process runs the first
+        share, then waits for the others in :meth:`tear_down` and adds their
+        results to its own.
+        """
+        import tempfile
+        shares = [self._queue[i::self._fork_jobs] for i in range(self._fork_jobs)]
+        shares = [share for share in shares if share]
+        self._children = []
+        if len(shares) < 2:
+            return
         if self._cov:
-            self._cov.stop()
-            self.log.info("Writing coverage data")
-            self._cov.save()
-            self._cov.html_report()
+            self.log.warning("Not forking, as the coverage of the processes would overwrite each other")
+            return
 
-        # Setup simulator finalization
-        simulator.stop_simulator()
+        self._fork_dir = tempfile.mkdtemp(prefix="cocotb_fork_")
+        # Otherwise the buffered output would be written by every process
+        _flush_log_handlers()
+        sys.stdout.flush()
+        sys.stderr.flush()
+        for i, share in enumerate(shares[1:], 1):
+            results_file = os.path.join(self._fork_dir, "{}.xml".format(i))
+            try:
+                pid = simulator.fork()
+            except (NotImplementedError, RuntimeError) as e:
+                self.log.warning("Unable to fork, running the remaining tests in this process: %s", e)
+                break
+            if pid == 0:
+                self._start_forked_process(share, results_file)
+                return
+            self._children.append((pid, share, results_file))
+        if not self._children:
+            os.rmdir(self._fork_dir)
+        forked = set(id(test) for _, share, _ in self._children for test in share)
+        self._discard_tests([test for test in self._queue if id(test) in forked])
+        self._queue = [test for test in self._queue if id(test) not in forked]
+
+    def _start_forked_process(self, tests, results_file):
+        from cocotb.xunit_reporter import XUnitReporter
+        ours = set(id(test) for test in tests)
+        self._discard_tests([test for test in self._queue if id(test) not in ours])
+        self._queue = tests
+        self._children = []
+        self._fork_dir = None
+        self._forked = True
+        # Numbered within this process's share in the log
+        self.ntests = len(tests)
+        self.count = 1
+        # The results file of the parent is still being written by it
+        testsuite = self.xunit.last_testsuite
+        self.xunit.close()
+        self.xunit = XUnitReporter(filename=results_file)
+        self.xunit.add_testsuite(**testsuite.attrib)
+        if self._timing is not None:
+            # An SQLite connection can't be used by more than one process
+            self._open_timing_db(self._timing.filename)
+        if self._result_cache is not None:
+            self._open_result_cache(self._result_cache.filename)
+        self.log.info("Forked process %d to run %d tests", os.getpid(), len(tests))
+
+    @staticmethod
+    def _discard_tests(tests):
+        """Close the coroutines of *tests*, which are not going to be run."""
+        for test in tests:
+            # Generated tests have no coroutine until they are run
+            if not isinstance(test, _GeneratedTest):
+                test._coro.close()
+
+    def _collect_children(self):
+        """Wait for the forked processes and add their results to ours."""
+        import shutil
+        from cocotb.xunit_reporter import read_testcases, PARTIAL_SUFFIX
+        for pid, tests, results_file in self._children:
+            _, status = os.waitpid(pid, 0)
+            if not os.path.exists(results_file):
+                results_file += PARTIAL_SUFFIX
+            if os.WIFSIGNALED(status):
+                exit_reason = "was killed by signal {}".format(os.WTERMSIG(status))
+            else:
+                exit_reason = "exited with status {}".format(os.WEXITSTATUS(status))
+
+            # A process which crashed still leaves the results of the tests it finished
+            # Tests of different modules may have the same name
+            reported = {(testcase.get("classname"), testcase.get("name"), testcase.get("seed")): testcase
+                        for testcase in read_testcases(results_file)}
+            missing = 0
+            for test in tests:
+                testcase = reported.get((test.module, test.funcname, self._seed_attrs(test).get("seed")))
+                if testcase is None:
+                    missing += 1
+                    self.xunit.add_testcase(name=test.funcname,
+                                            classname=test.module,
+                                            time=repr(0),
+                                            sim_time_ns=repr(0),
+                                            ratio_time=repr(0),
+                                            **self._seed_attrs(test))
+                    self.xunit.add_failure(message="Forked process {} {}".format(pid, exit_reason))
+                    result_pass, sim_time_ns, real_time, ratio_time = False, 0, 0, 0
+                    if self._result_cache is not None:
+                        self._cache_result(test, result_pass)
+                else:
+                    self.xunit.append(testcase)
+                    result_pass = testcase.find("failure") is None and testcase.find("error") is None
+                    sim_time_ns, real_time, ratio_time = (float(testcase.get(attr, 0))
+                                                          for attr in ("sim_time_ns", "time", "ratio_time"))
+                self._store_test_result(test.module, self._result_name(test), result_pass, sim_time_ns,
+                                        real_time, ratio_time)
+                if not result_pass:
+                    self.failures += 1
+                self.count += 1
+            if missing:
+                self.log.error("Forked process %d %s without reporting the results of %d tests",
+                               pid, exit_reason, missing)
+
+        shutil.rmtree(self._fork_dir, ignore_errors=True)
+        self._children = []
 
     def next_test(self):
         """Get the next test to run"""
         if not self._queue:
             return None
-        return self._queue.pop(0)
+        test = self._queue.pop(0)
+        if isinstance(test, _GeneratedTest):
+            test = test.create(self._dut)
+        return test
 
     def handle_result(self, test):
         """Handle a test completing.
@@ -259,6 +645,8 @@ class RegressionManager(object):
             test: The test that completed
         """
         assert test is self._running_test
+        if self._watchdog is not None:
+            self._watchdog.disarm()
 
         real_time = time.time() - test.start_time
         sim_time_ns = get_sim_time('ns') - test.start_sim_time
@@ -268,7 +656,8 @@ class RegressionManager(object):
                                 classname=test.module,
                                 time=repr(real_time),
                                 sim_time_ns=repr(sim_time_ns),
-                                ratio_time=repr(ratio_time))
+                                ratio_time=repr(ratio_time),
+                                **self._seed_attrs(test))
 
         # score test
         result_pass, sim_failed = self._score_test(test, test._outcome)
@@ -277,10 +666,23 @@ class RegressionManager(object):
         cocotb.log.removeHandler(test.handler)
 
         # Save results
-        self._store_test_result(test.__module__, test.__name__, result_pass, sim_time_ns, real_time, ratio_time)
+        self._store_test_result(test.module, self._result_name(test), result_pass, sim_time_ns, real_time,
+                                ratio_time)
         if not result_pass:
             self.xunit.add_failure()
             self.failures += 1
+        if self._timing is not None:
+            self._record_timing(test, result_pass, real_time, sim_time_ns, ratio_time)
+        if self._result_cache is not None:
+            self._cache_result(test, result_pass)
+        if test.funcname == self._snapshot_after and self._snapshot_file is None:
+            if result_pass:
+                # Saved when the next test starts, where snapshots are restored
+                self._snapshot_pending = True
+            else:
+                self.log.warning("No snapshot is saved, as %s failed", test.funcname)
+                self._snapshot_after = None
+        _flush_log_handlers()
 
         # Fail if required
         if sim_failed:
@@ -329,9 +731,42 @@ class RegressionManager(object):
                 self.xunit.add_skipped()
                 self.skipped += 1
                 self._store_test_result(test.module, test_func.name, None, 0.0, 0.0, 0.0)
+            elif self._seeds is None:
+                self._queue.append(test)
+                self.ntests += 1
             else:
+                for i, seed in enumerate(self._seeds):
+                    if i > 0:
+                        test = test_func(self._dut)
+                    test._seed = seed
+                    self._queue.append(test)
+                    self.ntests += 1
+
+    def _init_generated_tests(self, tests):
+        """Queue placeholders for lazily generated *tests*, which create them when they are run."""
+        for test in tests.tests():
+            if self._seeds is None:
                 self._queue.append(test)
                 self.ntests += 1
+            else:
+                for i, seed in enumerate(self._seeds):
+                    if i > 0:
+                        test = _GeneratedTest(tests, test.position)
+                    test._seed = seed
+                    self._queue.append(test)
+                    self.ntests += 1
+
+    @staticmethod
+    def _seed_attrs(test):
+        if test._seed is None:
+            return {}
+        return {"seed": str(test._seed)}
+
+    @staticmethod
+    def _result_name(test):
+        if test._seed is None:
+            return test.__name__
+        return "%s[seed=%d]" % (test.__name__, test._seed)
 
     def _score_test(self, test, outcome):
         """
@@ -397,11 +832,20 @@ class RegressionManager(object):
             result_pass = False
 
             if _pdb_on_exception:
+                import pdb
                 pdb.post_mortem(result.__traceback__)
 
         return result_pass, sim_failed
 
     def execute(self):
+        if self._queue:
+            if self._snapshot_pending:
+                self._save_snapshot()
+            elif self._snapshot_file is not None:
+                self._restore_snapshot()
+            if self._fork_jobs > 1 and self._children is None and self._snapshot_test not in self._queue:
+                self._fork()
+
         self._running_test = cocotb.regression_manager.next_test()
         if self._running_test:
             start = ''
@@ -414,11 +858,20 @@ class RegressionManager(object):
                           (start,
                            self.count, self.ntests,
                            end,
-                           self._running_test.funcname))
+                           self._result_name(self._running_test)))
+
+            if self._running_test._seed is not None:
+                random.seed(self._running_test._seed)
+            if self._reset_hooks:
+                # The test has not started yet, so the reset hooks can go in
+                # front of its body
+                self._running_test._coro = self._reset_then(self._running_test._coro)
 
             # start capturing log output
             cocotb.log.addHandler(self._running_test.handler)
 
+            if self._watchdog is not None:
+                self._watchdog.arm(self._running_test)
             cocotb.scheduler.add_test(self._running_test)
             self.count += 1
         else:
@@ -488,6 +941,55 @@ class RegressionManager(object):
 
         self.log.info(summary)
 
+    def _log_gpi_summary(self, gpi_stats):
+        """Log the statistics collected when :envvar:`COCOTB_GPI_STATS` is set.
+
+        Time in ``gpi_*`` entry points is spent in the simulator interface on
+        behalf of the testbench. Time in callbacks and ``python:*`` calls
+        includes that spent in any entry points called from Python.
+        """
+        NAME_FIELD  = 'GPI CALL'
+        CALLS_FIELD = 'CALLS'
+        TOTAL_FIELD = 'TOTAL(S)'
+        MEAN_FIELD  = 'MEAN(NS)'
+        MAX_FIELD   = 'MAX(NS)'
+
+        called = sorted(((name, stat) for name, stat in gpi_stats.items() if stat['calls']),
+                        key=lambda item: item[1]['total_ns'], reverse=True)
+
+        NAME_FIELD_LEN = max([len(NAME_FIELD)] + [len(name) for name, _ in called])
+        NUM_FIELD_LEN  = 12
+
+        LINE_LEN = 3 + NAME_FIELD_LEN + 4 * (2 + NUM_FIELD_LEN) + 3
+        LINE_SEP = "*"*LINE_LEN+"\n"
+
+        row = "** {a:<{a_len}}  {b:>{n_len}}  {c:>{n_len}}  {d:>{n_len}}  {e:>{n_len}} **\n"
+
+        summary = ""
+        summary += LINE_SEP
+        summary += row.format(a=NAME_FIELD, b=CALLS_FIELD, c=TOTAL_FIELD, d=MEAN_FIELD, e=MAX_FIELD,
+                              a_len=NAME_FIELD_LEN, n_len=NUM_FIELD_LEN)
+        summary += LINE_SEP
+        for name, stat in called:
+            summary += row.format(a=name,
+                                  b=stat['calls'],
+                                  c='{0:.3f}'.format(stat['total_ns'] / 1e9),
+                                  d='{0:.0f}'.format(stat['total_ns'] / stat['calls']),
+                                  e=stat['max_ns'],
+                                  a_len=NAME_FIELD_LEN, n_len=NUM_FIELD_LEN)
+        summary += LINE_SEP
+
+        # GPI calls are almost all made from Python, so are part of its time
+        gpi_ns = sum(stat['total_ns'] for name, stat in called if name.startswith('gpi_'))
+        python_ns = sum(stat['total_ns'] for name, stat in called if name.startswith('python:'))
+        testbench_ns = max(python_ns - gpi_ns, 0)
+        summary += "** {0:<{1}} **\n".format(
+            "IN GPI CALLS : {0:.3f} S   IN TESTBENCH : {1:.3f} S".format(gpi_ns / 1e9, testbench_ns / 1e9),
+            LINE_LEN - 6)
+        summary += LINE_SEP
+
+        self.log.info(summary)
+
     @staticmethod
     def _safe_divide(a, b):
         try:
@@ -604,14 +1106,18 @@ class TestFactory(object):
         """
         self.kwargs[name] = optionlist
 
-    def generate_tests(self, prefix="", postfix=""):
+    def generate_tests(self, prefix="", postfix="", mode="product", count=None, seed=None, lazy=False):
         """
-        Generate an exhaustive set of tests using the cartesian product of the
-        possible keyword arguments.
+        Generate a set of tests from the combinations of the possible keyword
+        arguments.
 
         The generated tests are appended to the namespace of the calling
         module.
 
+        Each test is named after its position in the cartesian product of the
+        options, so a test has the same name, and the same options, whichever
+        *mode* generated it.
+
         Args:
             prefix (str):  Text string to append to start of ``test_function`` name
                      when naming generated test cases. This allows reuse of
@@ -621,41 +1127,248 @@ class TestFactory(object):
                      when naming generated test cases. This allows reuse of
                      a single ``test_function`` with multiple
                      :class:`TestFactories <.TestFactory>` without name clashes.
+            mode (str): Which combinations of the options to generate tests for.
+
+                * ``"product"``: all of them, the cartesian product of the options.
+                * ``"pairwise"``: a set of combinations which contains every pair
+                  of values of any two options at least once. This is far
+                  smaller than the product when there are many options.
+                * ``"random"``: *count* different combinations, chosen at random.
+
+                .. versionadded:: 1.4
+            count (int): The number of combinations of ``"random"`` mode.
+
+                .. versionadded:: 1.4
+            seed (int, optional): The seed to choose the combinations of
+                ``"random"`` mode with. The default is :data:`cocotb.RANDOM_SEED`.
+                Pass a seed when the tests are listed outside of the simulator,
+                as ``cocotb-run`` does, so that the same combinations are
+                chosen there.
+
+                .. versionadded:: 1.4
+            lazy (bool): Only create each test when it is run, rather than
+                adding a test for every combination to the module up front.
+                Any combination of the product can then be run by name with
+                :envvar:`TESTCASE`, even one which *mode* did not choose.
+
+                .. versionadded:: 1.4
         """
 
+        import inspect
         frm = inspect.stack()[1]
         mod = inspect.getmodule(frm[0])
 
-        d = self.kwargs
+        basename = "%s%s%s" % (prefix, self.name, postfix)
+        indices = self._choose(mode, count, seed)
 
-        for index, testoptions in enumerate((
-                                            dict(zip(d, v)) for v in
-                                            product(*d.values())
-                                            )):
-
-            name = "%s%s%s_%03d" % (prefix, self.name, postfix, index + 1)
-            doc = "Automatically generated test\n\n"
-
-            for optname, optvalue in testoptions.items():
-                if callable(optvalue):
-                    if not optvalue.__doc__:
-                        desc = "No docstring supplied"
-                    else:
-                        desc = optvalue.__doc__.split('\n')[0]
-                    doc += "\t%s: %s (%s)\n" % (optname, optvalue.__name__,
-                                                desc)
-                else:
-                    doc += "\t%s: %s\n" % (optname, repr(optvalue))
+        if lazy:
+            name = "_cocotb_generated_" + basename
+            self.log.debug("Adding %d lazily generated tests \"%s\" to module \"%s\"" %
+                           (len(indices), basename, mod.__name__))
+            if hasattr(mod, name):
+                self.log.error("Overwriting the generated tests %s in module %s. "
+                               "This causes previously generated testcases "
+                               "not to be run. Consider setting/changing "
+                               "name_postfix" % (basename, mod))
+            setattr(mod, name, _GeneratedTests(self, basename, mod, indices))
+            return
 
+        for index in indices:
+            name = self._test_name(basename, index)
             self.log.debug("Adding generated test \"%s\" to module \"%s\"" %
                              (name, mod.__name__))
-            kwargs = {}
-            kwargs.update(self.kwargs_constant)
-            kwargs.update(testoptions)
             if hasattr(mod, name):
                 self.log.error("Overwriting %s in module %s. "
                                  "This causes a previously defined testcase "
                                  "not to be run. Consider setting/changing "
                                  "name_postfix" % (name, mod))
-            setattr(mod, name, _create_test(self.test_function, name, doc, mod,
-                                            *self.args, **kwargs))
+            setattr(mod, name, self._create(basename, index, mod))
+
+    @property
+    def _combinations(self):
+        """The number of combinations of the options."""
+        total = 1
+        for optionlist in self.kwargs.values():
+            total *= len(optionlist)
+        return total
+
+    def _choose(self, mode, count, seed):
+        """Return the indices in the product of the options of the combinations to test."""
+        total = self._combinations
+        if mode == "product":
+            return range(total)
+        if mode == "pairwise":
+            sizes = [len(optionlist) for optionlist in self.kwargs.values()]
+            return sorted(set(self._index(values) for values in _pairwise(sizes)))
+        if mode == "random":
+            if count is None:
+                raise ValueError("random mode needs a count of the tests to generate")
+            if seed is None:
+                seed = getattr(cocotb, "RANDOM_SEED", None)
+            if seed is None:
+                seed = random.SystemRandom().randrange(2**32)
+            self.log.info("Choosing %d of the %d combinations of the options of %s with seed %d",
+                          min(count, total), total, self.name, seed)
+            # range() is sampled without listing all of its items
+            return sorted(random.Random(seed).sample(range(total), min(count, total)))
+        raise ValueError("unknown TestFactory mode %r" % (mode,))
+
+    def _index(self, values):
+        """Return the index in the product of the options of the combination *values*."""
+        index = 0
+        for value, optionlist in zip(values, self.kwargs.values()):
+            index = index * len(optionlist) + value
+        return index
+
+    def _options(self, index):
+        """Return the options of the combination at *index* in the product of the options."""
+        options = {}
+        for optname, optionlist in reversed(list(self.kwargs.items())):
+            index, value = divmod(index, len(optionlist))
+            options[optname] = optionlist[value]
+        return dict(reversed(list(options.items())))
+
+    @staticmethod
+    def _test_name(basename, index):
+        return "%s_%03d" % (basename, index + 1)
+
+    def _create(self, basename, index, mod):
+        """Create the test of the combination at *index* in the product of the options."""
+        name = self._test_name(basename, index)
+        testoptions = self._options(index)
+        doc = "Automatically generated test\n\n"
+
+        for optname, optvalue in testoptions.items():
+            if callable(optvalue):
+                if not optvalue.__doc__:
+                    desc = "No docstring supplied"
+                else:
+                    desc = optvalue.__doc__.split('\n')[0]
+                doc += "\t%s: %s (%s)\n" % (optname, optvalue.__name__,
+                                            desc)
+            else:
+                doc += "\t%s: %s\n" % (optname, repr(optvalue))
+
+        kwargs = {}
+        kwargs.update(self.kwargs_constant)
+        kwargs.update(testoptions)
+        return _create_test(self.test_function, name, doc, mod, *self.args, **kwargs)
+
+
+class _GeneratedTests(object):
+    """The tests of a lazy :meth:`TestFactory.generate_tests`, created only when they are run."""
+
+    im_generated_tests = True    # For auto-regressions
+
+    def __init__(self, factory, basename, mod, indices):
+        self.factory = factory
+        self.basename = basename
+        self.module = mod.__name__
+        self._mod = mod
+        self._indices = indices
+        # Sort with the tests defined around them, as if they had been created now
+        self._first_id = cocotb.test._id_count
+        cocotb.test._id_count += len(indices)
+
+    def __len__(self):
+        return len(self._indices)
+
+    def tests(self):
+        """Return a placeholder for each test, to queue in place of the test."""
+        return [_GeneratedTest(self, position) for position in range(len(self._indices))]
+
+    def find(self, name):
+        """Create the test *name*, which may be of any combination of the options.
+
+        Returns:
+            The test, or ``None`` if *name* is not one of these tests.
+        """
+        number = name[len(self.basename) + 1:]
+        if not name.startswith(self.basename + "_") or not number.isdigit():
+            return None
+        index = int(number) - 1
+        if not 0 <= index < self.factory._combinations or name != self.factory._test_name(self.basename, index):
+            return None
+        return self.create(index)
+
+    def create(self, index):
+        return self.factory._create(self.basename, index, self._mod)
+
+
+class _GeneratedTest(object):
+    """Stands in for a lazily generated test in the queue of the regression manager.
+
+    Has the attributes of :class:`~cocotb.decorators.RunningTest` which are used
+    before the test is run.
+    """
+
+    stage = None
+
+    def __init__(self, tests, position):
+        self.tests = tests
+        self.index = tests._indices[position]
+        self.position = position
+        self.module = tests.module
+        self.funcname = self.__name__ = tests.factory._test_name(tests.basename, self.index)
+        self._id = tests._first_id + position
+        self._seed = None
+
+    def create(self, dut):
+        """Create the test, ready to run on *dut*."""
+        test = self.tests.create(self.index)(dut)
+        test._id = self._id
+        test._seed = self._seed
+        return test
+
+
+def _pairwise(sizes):
+    """Return combinations of values of options with *sizes* values which cover every pair of values.
+
+    Uses the In-Parameter-Order strategy: the combinations of the first two
+    options are extended by one option at a time, first by choosing its value
+    in the existing combinations so that as many uncovered pairs as possible
+    are covered, then by adding combinations for the pairs that remain.
+
+    Returns:
+        A list of tuples, with the index of the value of each option.
+    """
+    if len(sizes) < 3 or 0 in sizes:
+        return list(product(*(range(size) for size in sizes)))
+
+    # The combinations are fewer if the options with the most values come first
+    order = sorted(range(len(sizes)), key=lambda i: -sizes[i])
+    ordered = [sizes[i] for i in order]
+    rows = [list(values) + [None] * (len(sizes) - 2) for values in product(range(ordered[0]), range(ordered[1]))]
+
+    for k in range(2, len(ordered)):
+        uncovered = {(j, v, w) for j in range(k) for v in range(ordered[j]) for w in range(ordered[k])}
+
+        for row in rows:
+            best, best_pairs = 0, []
+            for w in range(ordered[k]):
+                pairs = [(j, row[j], w) for j in range(k) if row[j] is not None and (j, row[j], w) in uncovered]
+                if len(pairs) > len(best_pairs):
+                    best, best_pairs = w, pairs
+            row[k] = best
+            uncovered.difference_update(best_pairs)
+
+        added = []
+        for j, v, w in sorted(uncovered):
+            for row in added:
+                if row[k] == w and row[j] is None:
+                    row[j] = v
+                    break
+            else:
+                row = [None] * len(sizes)
+                row[j], row[k] = v, w
+                added.append(row)
+        rows.extend(added)
+
+    combinations = []
+    for row in rows:
+        values = [0] * len(sizes)
+        for position, i in enumerate(order):
+            # Values left free can be anything
+            values[i] = row[position] or 0
+        combinations.append(tuple(values))
+    return combinations
@@ -127,3 +127,15 @@ class SimFailure(TestComplete):
 class SimTimeoutError(TimeoutError):
     """Exception for when a timeout, in terms of simulation time, occurs."""
     pass
+
+
+class RealTimeoutError(TimeoutError):
+    """Exception for when a test runs for longer than :envvar:`COCOTB_WATCHDOG_TIMEOUT` in real time.
+
+    .. versionadded:: 1.4
+    """
+    def __init__(self, *args):
+        # It has no arguments when raised in the test from the watchdog thread
+        if not args:
+            args = ("The test did not finish within COCOTB_WATCHDOG_TIMEOUT",)
+        super(RealTimeoutError, self).__init__(*args)
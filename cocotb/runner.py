@@ -0,0 +1,343 @@
+# Copyright cocotb contributors
+# Licensed under the Revised BSD License, see LICENSE for details.
+# SPDX-License-Identifier: BSD-3-Clause
+
+"""Run the tests of a cocotb testbench in several simulator processes at once.
+
+The tests are found by importing the test modules outside of a simulator, and
+are split into shards. Each shard is run by ``make`` in the current directory,
+with :envvar:`MODULE`, :envvar:`TESTCASE` and :envvar:`COCOTB_RESULTS_FILE`
+set on the command line, on a pool of local processes. The results of the
+shards are then merged into a single results file.
+
+With a timing database, see :envvar:`COCOTB_TIMING_DB`, the shards are
+balanced by the expected duration of their tests, and the longest are started
+first. With a result cache, see :envvar:`COCOTB_RESULT_CACHE`, only the tests
+which failed when they last ran can be run, with ``--last-failed``.
+"""
+
+import argparse
+import concurrent.futures
+import os
+import subprocess
+import sys
+import time
+import xml.etree.ElementTree as ET
+
+from cocotb._result_cache import ResultCache
+from cocotb._timing_db import TimingDatabase, expected_durations
+from cocotb.xunit_reporter import PARTIAL_SUFFIX
+
+
+class Shard(object):
+    """A group of tests from one module, run by one simulator process."""
+
+    def __init__(self, index, module, tests, expected=0.0):
+        self.index = index
+        self.module = module
+        self.tests = tests
+        self.expected = expected  # the expected duration of the tests, in seconds
+        self.results_file = None
+        self.log_file = None
+        self.returncode = None
+        self.wall_time = 0.0
+        self.results = None  # the <testsuites> element written by the shard
+
+    @property
+    def name(self):
+        return "shard_{}".format(self.index)
+
+
+def discover_tests(modules):
+    """Import *modules* and return the names of the tests in each.
+
+    Returns:
+        list: ``(module, [test names])`` pairs, with the tests of each module
+        in the order the regression manager would run them.
+    """
+    sys.path.insert(0, os.getcwd())
+    found = []
+    for module_name in modules:
+        module = __import__(module_name, fromlist=["_"])
+        tests = [(thing.stage or 0, thing._id, name)
+                 for name, thing in vars(module).items() if hasattr(thing, "im_test")]
+        for thing in vars(module).values():
+            if hasattr(thing, "im_generated_tests"):
+                tests.extend((test.stage or 0, test._id, test.funcname) for test in thing.tests())
+        found.append((module_name, [name for _, _, name in sorted(tests)]))
+    return found
+
+
+def last_failed(found, cache):
+    """Keep only the tests of *found* which failed when they last ran.
+
+    Args:
+        found (list): ``(module, [test names])`` pairs, from :func:`discover_tests`.
+        cache (~cocotb._result_cache.ResultCache): The last result of each test.
+
+    Returns:
+        list: The pairs with only the tests which failed, or *found* if none did.
+    """
+    failed = []
+    for module, tests in found:
+        # A test run with several seeds failed if it failed with any of them
+        names = set(name.split("[seed=")[0] for name in cache.failed(module))
+        tests = [test for test in tests if test in names]
+        if tests:
+            failed.append((module, tests))
+    return failed or found
+
+
+def partition(tests, n, durations=None):
+    """Split the list *tests* into at most *n* non-empty lists.
+
+    Without *durations*, tests are dealt out in turn, so that each shard has
+    some of the early and some of the late tests of a module. Otherwise the
+    longest tests are placed first, each into the shard with the shortest
+    total duration so far.
+
+    Args:
+        tests (list): The names of the tests.
+        n (int): The maximum number of lists.
+        durations (dict, optional): The expected duration of each test.
+    """
+    if durations is None:
+        shards = [tests[i::n] for i in range(min(n, len(tests)))]
+        return [shard for shard in shards if shard]
+
+    shards = [[] for _ in range(min(n, len(tests)))]
+    totals = [0.0] * len(shards)
+    for test in sorted(tests, key=lambda test: -durations[test]):
+        i = totals.index(min(totals))
+        shards[i].append(test)
+        totals[i] += durations[test]
+    return [shard for shard in shards if shard]
+
+
+def make_shards(found, jobs, build_first=True, timing=None):
+    """Split the tests found by :func:`discover_tests` into shards.
+
+    If *build_first* is true, one test is given a shard of its own, to be run
+    before the others so that the design is only built once. This is the
+    shortest test if *timing*, a :class:`~cocotb._timing_db.TimingDatabase`,
+    is given.
+    """
+    shards = []
+    for module, tests in found:
+        durations = None
+        if timing is not None:
+            durations = expected_durations(timing.durations(module), tests)
+        if build_first and not shards and tests:
+            first = min(tests, key=durations.get) if durations else tests[0]
+            shards.append(Shard(0, module, [first], durations[first] if durations else 0.0))
+            tests = [test for test in tests if test != first]
+        for group in partition(tests, jobs, durations):
+            expected = sum(durations[test] for test in group) if durations else 0.0
+            shards.append(Shard(len(shards), module, group, expected))
+    return shards
+
+
+def _run_shard(shard, make, make_args, output_dir):
+    shard.results_file = os.path.join(output_dir, shard.name + ".xml")
+    shard.log_file = os.path.join(output_dir, shard.name + ".log")
+    for filename in (shard.results_file, shard.results_file + PARTIAL_SUFFIX):
+        if os.path.exists(filename):
+            os.remove(filename)
+    cmd = [make, "sim"] + make_args + [
+        "MODULE=" + shard.module,
+        "TESTCASE=" + ",".join(shard.tests),
+        "COCOTB_RESULTS_FILE=" + shard.results_file,
+    ]
+    start = time.time()
+    with open(shard.log_file, "w") as log:
+        shard.returncode = subprocess.call(cmd, stdout=log, stderr=subprocess.STDOUT)
+    shard.wall_time = time.time() - start
+    read_results(shard)
+    return shard
+
+
+def read_results(shard):
+    """Set the :attr:`~Shard.results` of *shard* from its results file.
+
+    They are ``None`` if the shard wrote no results.
+    """
+    if not os.path.exists(shard.results_file):
+        # Has the results of the tests which finished before the simulator crashed
+        shard.results_file += PARTIAL_SUFFIX
+    try:
+        shard.results = ET.parse(shard.results_file).getroot()
+    except (OSError, ET.ParseError):
+        shard.results = None
+
+
+def _failed(testcase):
+    return testcase.find("failure") is not None or testcase.find("error") is not None
+
+
+def merge_results(shards):
+    """Merge the results of *shards* into one ``<testsuites>`` element.
+
+    Test suites with the same name and package are combined. Tests of a shard
+    which did not report a result, for instance because the simulator
+    crashed, are added as failures.
+    """
+    merged = ET.Element("testsuites", name="results")
+    suites = {}
+    for shard in shards:
+        reported = set()
+        if shard.results is not None:
+            for suite in shard.results.iter("testsuite"):
+                key = (suite.get("name"), suite.get("package"))
+                if key not in suites:
+                    suites[key] = ET.SubElement(merged, "testsuite", suite.attrib)
+                suites[key].extend(list(suite))
+                reported.update(case.get("name") for case in suite.iter("testcase"))
+
+        missing = [test for test in shard.tests if test not in reported]
+        if missing:
+            key = ("all", "all")
+            if key not in suites:
+                suites[key] = ET.SubElement(merged, "testsuite", name="all", package="all")
+            for test in missing:
+                case = ET.SubElement(suites[key], "testcase", name=test, classname=shard.module,
+                                     time="0", sim_time_ns="0", ratio_time="0")
+                ET.SubElement(case, "failure", message="{} did not report a result, see {}".format(
+                    shard.name, shard.log_file))
+    return merged
+
+
+def _report(shards, wall_time):
+    lines = ["{:<10} {:<30} {:>6} {:>7} {:>12} {:>12} {:>12}".format(
+        "SHARD", "MODULE", "TESTS", "FAILED", "EXPECTED (S)", "WALL (S)", "TESTS (S)")]
+    for shard in shards:
+        cases = [] if shard.results is None else list(shard.results.iter("testcase"))
+        failed = sum(1 for case in cases if _failed(case)) + len(shard.tests) - len(cases)
+        test_time = sum(float(case.get("time", 0)) for case in cases)
+        lines.append("{:<10} {:<30} {:>6} {:>7} {:>12.2f} {:>12.2f} {:>12.2f}".format(
+            shard.name, shard.module, len(shard.tests), failed, shard.expected, shard.wall_time, test_time))
+    serial = sum(shard.wall_time for shard in shards)
+    lines.append("Ran {} shards in {:.2f} s, {:.2f} s in total ({:.1f}x)".format(
+        len(shards), wall_time, serial, serial / wall_time if wall_time else 0.0))
+    return "\n".join(lines)
+
+
+def _print_finished(shard):
+    print("{} finished in {:.2f} s with exit code {}: {} test(s) from {}".format(
+        shard.name, shard.wall_time, shard.returncode, len(shard.tests), shard.module))
+    sys.stdout.flush()
+
+
+def _module_from_make(make, make_args):
+    output = subprocess.check_output([make, "-s", "--no-print-directory"] + make_args + ["print-module"],
+                                     universal_newlines=True)
+    return output.strip()
+
+
+def get_parser():
+    parser = argparse.ArgumentParser(
+        prog="cocotb-run",
+        description="Run the tests of the cocotb testbench in the current directory "
+                    "in several simulator processes at once.")
+    parser.add_argument("make_args", nargs="*", metavar="VAR=VALUE",
+                        help="variables to pass to make, e.g. SIM=icarus")
+    parser.add_argument("-j", "--jobs", type=int, default=os.cpu_count() or 1,
+                        help="number of simulator processes to run at once (default: %(default)s)")
+    parser.add_argument("--module", default=None,
+                        help="comma-separated test modules (default: MODULE from the environment or the Makefile)")
+    parser.add_argument("--testcase", default=None,
+                        help="comma-separated tests to run (default: all tests)")
+    parser.add_argument("--results", default=os.getenv("COCOTB_RESULTS_FILE", "results.xml"),
+                        help="file to write the merged results to (default: %(default)s)")
+    parser.add_argument("--output-dir", default="cocotb_run",
+                        help="directory for the results and logs of each shard (default: %(default)s)")
+    parser.add_argument("--timing-db", default=os.getenv("COCOTB_TIMING_DB"),
+                        help="the timing database to balance the shards with, "
+                             "and for the tests to add their times to (default: COCOTB_TIMING_DB)")
+    parser.add_argument("--result-cache", default=os.getenv("COCOTB_RESULT_CACHE"),
+                        help="the database of the last result of each test, for --last-failed and --changed-only, "
+                             "and for the tests to add their results to (default: COCOTB_RESULT_CACHE)")
+    rerun = parser.add_mutually_exclusive_group()
+    rerun.add_argument("--last-failed", dest="rerun", action="store_const", const="last-failed",
+                       help="only run the tests which failed when they last ran, or all of them if none did")
+    rerun.add_argument("--changed-only", dest="rerun", action="store_const", const="changed-only",
+                       help="skip the tests which passed when they last ran with the same seed, "
+                            "HDL sources and test module")
+    parser.add_argument("--no-build-first", dest="build_first", action="store_false",
+                        help="do not run one test on its own first to build the design")
+    parser.add_argument("--make", default=os.getenv("MAKE", "make"),
+                        help="the make program to use (default: %(default)s)")
+    return parser
+
+
+def main():
+    args = get_parser().parse_args()
+    if args.jobs < 1:
+        sys.exit("cocotb-run: --jobs must be at least 1")
+
+    module_str = args.module or os.getenv("MODULE") or _module_from_make(args.make, args.make_args)
+    if not module_str:
+        sys.exit("cocotb-run: no test modules, set MODULE or use --module")
+    found = discover_tests([m.strip() for m in module_str.split(",") if m.strip()])
+    if args.testcase:
+        # As with TESTCASE, the tests are only looked for in the first module
+        wanted = args.testcase.split(",")
+        module, tests = found[0]
+        missing = [test for test in wanted if test not in tests]
+        if missing:
+            sys.exit("cocotb-run: tests not found in module {}: {}".format(module, ", ".join(missing)))
+        found = [(module, wanted)]
+
+    if args.rerun and not args.result_cache:
+        sys.exit("cocotb-run: --{} needs --result-cache or COCOTB_RESULT_CACHE".format(args.rerun))
+    if args.result_cache:
+        if args.rerun == "last-failed":
+            cache = ResultCache(args.result_cache)
+            total = sum(len(tests) for _, tests in found)
+            found = last_failed(found, cache)
+            cache.close()
+            print("Running {} of {} tests, which failed when they last ran".format(
+                sum(len(tests) for _, tests in found), total))
+        elif args.rerun == "changed-only":
+            # Only the simulator knows the HDL sources, so each shard skips its own unchanged tests
+            os.environ["COCOTB_RERUN"] = "changed-only"
+        os.environ["COCOTB_RESULT_CACHE"] = os.path.abspath(args.result_cache)
+
+    timing = None
+    if args.timing_db:
+        timing = TimingDatabase(args.timing_db)
+        # The tests are run by make, and so see the environment of this process
+        os.environ["COCOTB_TIMING_DB"] = os.path.abspath(args.timing_db)
+    shards = make_shards(found, args.jobs, build_first=args.build_first, timing=timing)
+    if timing is not None:
+        timing.close()
+    if not shards:
+        sys.exit("cocotb-run: no tests found in {}".format(module_str))
+    output_dir = os.path.abspath(args.output_dir)
+    os.makedirs(output_dir, exist_ok=True)
+
+    start = time.time()
+    pending = list(shards)
+    if args.build_first:
+        _print_finished(_run_shard(pending.pop(0), args.make, args.make_args, output_dir))
+    # Start the longest shards first, so that they do not finish last
+    pending.sort(key=lambda shard: -shard.expected)
+    with concurrent.futures.ThreadPoolExecutor(max_workers=args.jobs) as pool:
+        # Each thread waits on one simulator process
+        futures = [pool.submit(_run_shard, shard, args.make, args.make_args, output_dir)
+                   for shard in pending]
+        for future in concurrent.futures.as_completed(futures):
+            _print_finished(future.result())
+    wall_time = time.time() - start
+
+    merged = merge_results(shards)
+    ET.ElementTree(merged).write(args.results, encoding="UTF-8")
+    print(_report(shards, wall_time))
+
+    failures = sum(1 for case in merged.iter("testcase") if _failed(case))
+    total = sum(1 for _ in merged.iter("testcase"))
+    print("{} of {} tests failed, results written to {}".format(failures, total, args.results))
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
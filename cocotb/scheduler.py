@@ -36,7 +36,12 @@ the ReadOnly (and this is invalid, at least in Modelsim).
 import os
 import logging
 import threading
-import inspect
+import types
+
+if "COCOTB_SIM" in os.environ:
+    import simulator
+else:
+    simulator = None
 
 # Debug mode controlled by environment variables
 if "COCOTB_ENABLE_PROFILING" in os.environ:
@@ -95,6 +100,7 @@ class external_waiter(object):
         self.thread = None
         self.event = Event()
         self.state = external_state.INIT
+        self.abandoned = False
         self.cond = threading.Condition()
         self._log = SimLog("cocotb.external.thead.%s" % self.thread, id(self))
 
@@ -128,12 +134,18 @@ class external_waiter(object):
     def thread_resume(self):
         self._propagate_state(external_state.RUNNING)
 
+    def abandon(self):
+        """Stop the scheduler waiting for this thread, which is left running."""
+        with self.cond:
+            self.abandoned = True
+            self.cond.notify_all()
+
     def thread_wait(self):
         if _debug:
             self._log.debug("Waiting for the condition lock %s" % threading.current_thread())
 
         with self.cond:
-            while self.state == external_state.RUNNING:
+            while self.state == external_state.RUNNING and not self.abandoned:
                 self.cond.wait()
 
             if _debug:
@@ -235,9 +247,14 @@ class Scheduler(object):
         self._pending_triggers = []
         self._pending_threads = []
         self._pending_events = []   # Events we need to call set on once we've unwound
+        self._batch_unprimed = None     # ids of the triggers unprimed while a batch is handled
 
         self._terminate = False
         self._test = None
+        self._current_task = None   # The task being advanced by schedule(), if _track_tasks
+        # Only the binary log and the watchdog need the current task
+        self._track_tasks = "COCOTB_LOG_BINARY" in os.environ
+        self._watchdog_expiry = None    # (test, exception) set by the watchdog thread
         self._main_thread = threading.current_thread()
 
         self._is_reacting = False
@@ -245,6 +262,10 @@ class Scheduler(object):
         self._write_coro_inst = None
         self._writes_pending = Event()
 
+        # Let the simulator deliver simultaneous callbacks in one go
+        if simulator is not None:
+            simulator.set_batch_callback(self.react, self.react_many)
+
     @cocotb.decorators.coroutine
     def _do_writes(self):
         """ An internal coroutine that performs pending writes """
@@ -286,6 +307,30 @@ class Scheduler(object):
             self._writes_pending.clear()
             self._mode = Scheduler._MODE_TERM
 
+    def _watchdog_expired(self, test, exc):
+        """Called from the watchdog thread when *test* has run for too long.
+
+        The test is ended with *exc* by :meth:`_check_watchdog`, the next time
+        the main thread schedules a coroutine.
+        """
+        self._watchdog_expiry = (test, exc)
+        # Wake the main thread if it is waiting for an external function
+        for ext in list(self._pending_threads):
+            ext.abandon()
+
+    def _check_watchdog(self):
+        test, exc = self._watchdog_expiry
+        self._watchdog_expiry = None
+        if test is not self._test or test._outcome is not None:
+            # It finished before the main thread noticed
+            return
+        for ext in self._pending_threads:
+            if ext.abandoned:
+                self.log.warning("Abandoning thread %s of an external function, which has not finished",
+                                 ext.thread.name)
+        self._pending_threads = [ext for ext in self._pending_threads if not ext.abandoned]
+        test.abort(exc)
+
     def _test_completed(self, trigger=None):
         """Called after a test and its cleanup have completed
         """
@@ -343,20 +388,47 @@ class Scheduler(object):
         # start the event loop
         self._is_reacting = True
         try:
-            self._event_loop(trigger)
+            self._event_loop([trigger])
         finally:
             self._is_reacting = False
 
+    def react_many(self, triggers):
+        """
+        Called when several triggers fire in the same simulator phase.
+
+        This behaves like calling :meth:`react` for each trigger in turn, but
+        the event loop is only entered once.
+        """
+        if not triggers:
+            return
+
+        if self._is_reacting:
+            # queue up the triggers, the event loop will get to them
+            self._pending_triggers.extend(triggers)
+            return
+
+        if self._pending_triggers:
+            raise InternalError(
+                "Expected all triggers to be handled but found {}"
+                .format(self._pending_triggers)
+            )
 
-    def _event_loop(self, trigger):
+        # start the event loop
+        self._is_reacting = True
+        try:
+            self._event_loop(triggers)
+        finally:
+            self._is_reacting = False
+
+    def _event_loop(self, triggers):
         """
-        Run an event loop triggered by the given trigger.
+        Run an event loop triggered by the given triggers.
 
         The loop will keep running until no further triggers fire.
 
         This should be triggered by only:
         * The beginning of a test, when there is no trigger to react to
-        * A GPI trigger
+        * One or more GPI triggers that fired in the same simulator phase
         """
         if _profiling:
             ctx = profiling_context()
@@ -366,15 +438,16 @@ class Scheduler(object):
         with ctx:
             # When a trigger fires it is unprimed internally
             if _debug:
-                self.log.debug("Trigger fired: %s" % str(trigger))
+                self.log.debug("Trigger fired: %s" % ", ".join(str(t) for t in triggers))
             # trigger.unprime()
 
             if self._mode == Scheduler._MODE_TERM:
                 if _debug:
                     self.log.debug("Ignoring trigger %s since we're terminating" %
-                                   str(trigger))
+                                   ", ".join(str(t) for t in triggers))
                 return
 
+            trigger = triggers[0]
             if trigger is self._read_only:
                 self._mode = Scheduler._MODE_READONLY
             # Only GPI triggers affect the simulator scheduling mode
@@ -382,20 +455,34 @@ class Scheduler(object):
                 self._mode = Scheduler._MODE_NORMAL
 
             # work through triggers one by one
-            is_first = True
-            self._pending_triggers.append(trigger)
+            n_fired = len(triggers)
+            is_batch = n_fired > 1
+            # A trigger unprimed while the batch is handled may be primed
+            # again by a new waiter, which must not see the earlier change
+            self._batch_unprimed = set() if is_batch else None
+            self._pending_triggers.extend(triggers)
             while self._pending_triggers:
                 trigger = self._pending_triggers.pop(0)
 
-                if not is_first and isinstance(trigger, GPITrigger):
+                if n_fired == 0 and isinstance(trigger, GPITrigger):
                     self.log.warning(
                         "A GPI trigger occurred after entering react - this "
                         "should not happen."
                     )
                     assert False
 
-                # this only exists to enable the warning above
-                is_first = False
+                # count down the triggers we were called with, only these
+                # may be GPI triggers
+                if n_fired:
+                    n_fired -= 1
+
+                    # A trigger later in a batch may have been unprimed by
+                    # the coroutines woken by an earlier one
+                    if (is_batch and isinstance(trigger, GPITrigger) and
+                            (not trigger.primed or id(trigger) in self._batch_unprimed)):
+                        if _debug:
+                            self.log.debug("Trigger %s was unprimed before delivery" % str(trigger))
+                        continue
 
                 # Scheduled coroutines may append to our waiting list so the first
                 # thing to do is pop all entries waiting on this trigger.
@@ -455,6 +542,7 @@ class Scheduler(object):
                 del scheduling
 
             # no more pending triggers
+            self._batch_unprimed = None
             self._check_termination()
             if _debug:
                 self.log.debug("All coroutines scheduled, handing control back"
@@ -475,6 +563,8 @@ class Scheduler(object):
                 self._trigger2coros[trigger].remove(coro)
             if not self._trigger2coros[trigger]:
                 trigger.unprime()
+                if self._batch_unprimed is not None:
+                    self._batch_unprimed.add(id(trigger))
                 del self._trigger2coros[trigger]
 
         assert self._test is not None
@@ -621,6 +711,8 @@ class Scheduler(object):
             thread = threading.Thread(group=None, target=execute_external,
                                       name=func.__name__ + "_thread",
                                       args=([func, waiter]), kwargs={})
+            # A thread abandoned by the watchdog must not stop the simulator exiting
+            thread.daemon = True
 
             waiter.thread = thread
             self._pending_threads.append(waiter)
@@ -645,7 +737,7 @@ class Scheduler(object):
                 .format(coroutine)
             )
 
-        if inspect.iscoroutine(coroutine):
+        if isinstance(coroutine, types.CoroutineType):
             return self.add(cocotb.decorators.RunningTask(coroutine))
 
         elif not isinstance(coroutine, cocotb.decorators.RunningTask):
@@ -712,7 +804,7 @@ class Scheduler(object):
             else:
                 return self._trigger_from_started_coro(result)
 
-        if inspect.iscoroutine(result):
+        if isinstance(result, types.CoroutineType):
             return self._trigger_from_unstarted_coro(cocotb.decorators.RunningTask(result))
 
         if isinstance(result, list):
@@ -743,7 +835,17 @@ class Scheduler(object):
         if _debug:
             self.log.debug("Scheduling with {}".format(send_outcome))
 
+        if self._watchdog_expiry is not None:
+            self._check_watchdog()
+            if self._terminate:
+                return
+
         coro_completed = False
+        # schedule() is re-entered when a coroutine forks another
+        track_tasks = self._track_tasks
+        if track_tasks:
+            outer_task = self._current_task
+            self._current_task = coroutine
         try:
             result = coroutine._advance(send_outcome)
             if _debug:
@@ -756,6 +858,8 @@ class Scheduler(object):
                     coroutine, coroutine._outcome
                 ))
             coro_completed = True
+        if track_tasks:
+            self._current_task = outer_task
 
         # this can't go in the else above, as that causes unwanted exception
         # chaining
@@ -793,6 +897,9 @@ class Scheduler(object):
                     self._pending_threads.remove(ext)
                     self._pending_events.append(ext.event)
 
+            if self._watchdog_expiry is not None:
+                self._check_watchdog()
+
         # Handle any newly queued coroutines that need to be scheduled
         while self._pending_coros:
             self.add(self._pending_coros.pop(0))
@@ -211,6 +211,21 @@ gpi_sim_hdl gpi_register_readonly_callback               (int (*gpi_function)(co
 gpi_sim_hdl gpi_register_nexttime_callback               (int (*gpi_function)(const void *), void *gpi_cb_data);
 gpi_sim_hdl gpi_register_readwrite_callback              (int (*gpi_function)(const void *), void *gpi_cb_data);
 
+// A persistent value change callback stays registered with the simulator after it fires,
+// delivery to gpi_function is switched on and off with gpi_set_callback_enabled.
+// The callback is only removed by gpi_deregister_callback.
+gpi_sim_hdl gpi_register_persistent_value_change_callback(int (*gpi_function)(const void *), void *gpi_cb_data, gpi_sim_hdl gpi_hdl, int edge);
+void gpi_set_callback_enabled(gpi_sim_hdl gpi_hdl, int enabled);
+
+// Value change callbacks that fire between gpi_begin_callback_batch and
+// gpi_end_callback_batch are queued, and delivered together when the outermost
+// batch ends, in the order they fired. Each run of queued callbacks registered
+// with batch_function is passed to batch_handler in a single call, any others
+// are called one by one.
+void gpi_register_batch_handler(int (*batch_function)(const void *), int (*batch_handler)(const void **, size_t));
+void gpi_begin_callback_batch(void);
+void gpi_end_callback_batch(void);
+
 // Calling convention is that 0 = success and negative numbers a failure
 // For implementers of GPI the provided macro GPI_RET(x) is provided
 void gpi_deregister_callback(gpi_sim_hdl gpi_hdl);
@@ -223,6 +238,68 @@ void *gpi_get_callback_data(gpi_sim_hdl gpi_hdl);
 // Returns the number of libs
 size_t gpi_print_registered_impl(void);
 
+// Waveform tracing control, for simulators whose harness provides it, which
+// is the case for Verilator models built with tracing. The functions return 0
+// on success.
+typedef struct gpi_trace_control_s {
+    int (*trace_on)(void);
+    int (*trace_off)(void);
+    int (*set_trace_depth)(int levels);
+} gpi_trace_control_t;
+
+void gpi_register_trace_control(const gpi_trace_control_t *control);
+int gpi_has_trace_control(void);
+int gpi_trace_on(void);
+int gpi_trace_off(void);
+int gpi_set_trace_depth(int levels);
+
+// Saving and restoring the state of the design, for simulators whose harness
+// provides it, which is the case for Verilator models built with --savable.
+// Only the design is saved, not the simulation time or the callbacks. The
+// functions return 0 on success.
+typedef struct gpi_snapshot_control_s {
+    int (*save)(const char *filename);
+    int (*restore)(const char *filename);
+} gpi_snapshot_control_t;
+
+void gpi_register_snapshot_control(const gpi_snapshot_control_t *control);
+int gpi_has_snapshot_control(void);
+int gpi_save_snapshot(const char *filename);
+int gpi_restore_snapshot(const char *filename);
+
+// Forking the simulator process, for simulators whose harness provides it,
+// which is the case for Verilator models evaluated by a single thread. Returns
+// as fork() does: the process id of the child in the parent, 0 in the child
+// and -1 on failure.
+typedef struct gpi_fork_control_s {
+    int (*fork)(void);
+} gpi_fork_control_t;
+
+void gpi_register_fork_control(const gpi_fork_control_t *control);
+int gpi_has_fork_control(void);
+int gpi_fork(void);
+
+// Call statistics, only collected when COCOTB_GPI_STATS is set in the
+// environment. Each entry counts the calls to one GPI entry point, or the
+// callbacks for one reason, and the time spent in them.
+typedef struct gpi_stat_s {
+    const char *name;
+    uint64_t calls;
+    uint64_t total_ns;
+    uint64_t max_ns;
+} gpi_stat_t;
+
+// Points stats at the entries and returns how many there are, or returns 0 if
+// statistics are not being collected
+size_t gpi_get_stats(const gpi_stat_t **stats);
+
+// Monotonic time in nanoseconds, for layers above the GPI to time themselves
+// with the same clock
+uint64_t gpi_get_stats_time_ns(void);
+
+// Adds a call that took elapsed_ns to a statistic
+void gpi_add_stat(gpi_stat_t *stat, uint64_t elapsed_ns);
+
 #define GPI_RET(_code) \
     if (_code == 1) \
         return 0; \
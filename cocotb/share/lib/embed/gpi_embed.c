@@ -279,15 +279,15 @@ int embed_sim_init(gpi_sim_info_t *info)
 
     set_log_handler(simlog_func);                                       // Note: This function steals a reference to simlog_func.
 
-    // Obtain the function to check whether to call log function
-    simlog_func = PyObject_GetAttrString(cocotb_log_module, "_filter_from_c");   // New reference
+    // Obtain the function giving the level at which to call the log function
+    simlog_func = PyObject_GetAttrString(cocotb_log_module, "_level_from_c");    // New reference
     if (simlog_func == NULL) {
         PyErr_Print();
-        LOG_ERROR("Failed to get the _filter_from_c method");
+        LOG_ERROR("Failed to get the _level_from_c method");
         goto cleanup;
     }
     if (!PyCallable_Check(simlog_func)) {
-        LOG_ERROR("_filter_from_c is not callable");
+        LOG_ERROR("_level_from_c is not callable");
         Py_DECREF(simlog_func);
         goto cleanup;
     }
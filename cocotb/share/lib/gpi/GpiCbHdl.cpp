@@ -93,6 +93,7 @@ int GpiObjHdl::initialise(std::string &name, std::string &fq_name)
 
 int GpiCbHdl::run_callback()
 {
+    GpiStatTimer timer(m_stat_id);
     LOG_DEBUG("Generic run_callback");
     this->gpi_function(m_cb_data);
     LOG_DEBUG("Generic run_callback done");
@@ -144,8 +145,12 @@ GpiCbHdl::~GpiCbHdl()
 GpiValueCbHdl::GpiValueCbHdl(GpiImplInterface *impl,
                              GpiSignalObjHdl *signal,
                              int edge) : GpiCbHdl(impl),
-                                         m_signal(signal)
+                                         m_signal(signal),
+                                         m_persistent(false),
+                                         m_enabled(true)
 {
+    set_stat_id(GPI_STAT_CB_VALUE_CHANGE);
+
     if (edge == (GPI_RISING | GPI_FALLING))
         required_value = "X";
     else if (edge & GPI_RISING)
@@ -156,9 +161,18 @@ GpiValueCbHdl::GpiValueCbHdl(GpiImplInterface *impl,
 
 int GpiValueCbHdl::run_callback()
 {
+    GpiStatTimer timer(m_stat_id);
     std::string current_value;
     bool pass = false;
 
+    /* A persistent callback is still registered with the simulator, so
+     * put it back into the primed state before the handler can see it */
+    if (m_persistent) {
+        set_call_state(GPI_PRIMED);
+        if (!m_enabled)
+            return 0;
+    }
+
     if (required_value == "X")
         pass = true;
     else {
@@ -168,8 +182,8 @@ int GpiValueCbHdl::run_callback()
     }
 
     if (pass) {
-        this->gpi_function(m_cb_data);
-    } else {
+        gpi_deliver_callback(this->gpi_function, m_cb_data);
+    } else if (!m_persistent) {
         cleanup_callback();
         arm_callback();
     }
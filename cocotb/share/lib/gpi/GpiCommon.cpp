@@ -33,11 +33,64 @@
 #include <unistd.h>
 #include <vector>
 #include <map>
+#include <set>
+#include <unordered_set>
+#include <chrono>
+#include <cstdlib>
 
 using namespace std;
 
 static vector<GpiImplInterface*> registered_impls;
 
+/* Callbacks queued while a batch is open, see gpi_begin_callback_batch */
+typedef int (*gpi_cb_function_t)(const void *);
+static int batch_depth = 0;
+static vector<pair<gpi_cb_function_t, const void*> > batch_queue;
+static unordered_set<const void*> batch_queued;     // the data of each entry in batch_queue
+static gpi_cb_function_t batch_function = NULL;
+static int (*batch_handler)(const void **, size_t) = NULL;
+
+/* Provided by the simulator harness, see gpi_register_trace_control */
+static const gpi_trace_control_t *trace_control = NULL;
+
+/* Provided by the simulator harness, see gpi_register_snapshot_control */
+static const gpi_snapshot_control_t *snapshot_control = NULL;
+
+/* Provided by the simulator harness, see gpi_register_fork_control */
+static const gpi_fork_control_t *fork_control = NULL;
+
+/* Call statistics, in the order of gpi_stat_id_e */
+bool gpi_stats_enabled = getenv("COCOTB_GPI_STATS") != NULL;
+gpi_stat_t gpi_stats[GPI_STAT_COUNT] = {
+    {"gpi_get_sim_time", 0, 0, 0},
+    {"gpi_get_root_handle", 0, 0, 0},
+    {"gpi_get_handle_by_name", 0, 0, 0},
+    {"gpi_get_handle_by_index", 0, 0, 0},
+    {"gpi_iterate", 0, 0, 0},
+    {"gpi_next", 0, 0, 0},
+    {"gpi_get_signal_value_binstr", 0, 0, 0},
+    {"gpi_get_signal_value_str", 0, 0, 0},
+    {"gpi_get_signal_value_real", 0, 0, 0},
+    {"gpi_get_signal_value_long", 0, 0, 0},
+    {"gpi_set_signal_value_binstr", 0, 0, 0},
+    {"gpi_set_signal_value_str", 0, 0, 0},
+    {"gpi_set_signal_value_real", 0, 0, 0},
+    {"gpi_set_signal_value_long", 0, 0, 0},
+    {"gpi_register_value_change_callback", 0, 0, 0},
+    {"gpi_register_persistent_value_change_callback", 0, 0, 0},
+    {"gpi_register_timed_callback", 0, 0, 0},
+    {"gpi_register_readonly_callback", 0, 0, 0},
+    {"gpi_register_nexttime_callback", 0, 0, 0},
+    {"gpi_register_readwrite_callback", 0, 0, 0},
+    {"gpi_deregister_callback", 0, 0, 0},
+    {"callback:timed", 0, 0, 0},
+    {"callback:value_change", 0, 0, 0},
+    {"callback:readonly", 0, 0, 0},
+    {"callback:nexttime", 0, 0, 0},
+    {"callback:readwrite", 0, 0, 0},
+    {"callback:batch", 0, 0, 0},
+};
+
 #ifdef SINGLETON_HANDLES
 
 class GpiHandleStore {
@@ -93,6 +146,50 @@ static GpiHandleStore unique_handles;
 
 #endif
 
+/* In a mixed language design each scope belongs to one implementation, and
+   asking any of the others for a name in it is a failed simulator query. So
+   remember which implementations failed to find each name in each scope, and
+   don't ask them again, as the hierarchy doesn't change during a simulation.
+   A name that every implementation failed to find is missing. The cache is
+   emptied when it holds too many names, so that a loop looking up generated
+   names can't grow it without limit. */
+class GpiScopeCache {
+public:
+    bool is_miss(const std::string &scope, const std::string &name,
+                 GpiImplInterface *impl) {
+        std::map<key_type, std::set<GpiImplInterface*> >::iterator it;
+        it = misses.find(make_pair(scope, name));
+        return it != misses.end() && it->second.count(impl) != 0;
+    }
+
+    bool is_missing(const std::string &scope, const std::string &name,
+                    const std::vector<GpiImplInterface*> &impls) {
+        std::map<key_type, std::set<GpiImplInterface*> >::iterator it;
+        it = misses.find(make_pair(scope, name));
+        return it != misses.end() && it->second.size() == impls.size();
+    }
+
+    void set_miss(const std::string &scope, const std::string &name,
+                  GpiImplInterface *impl) {
+        key_type key = make_pair(scope, name);
+        if (misses.size() >= max_names && !misses.count(key)) {
+            misses.clear();
+        }
+        misses[key].insert(impl);
+    }
+
+    void clear() {
+        misses.clear();
+    }
+
+private:
+    typedef std::pair<std::string, std::string> key_type;
+    static const size_t max_names = 65536;
+    std::map<key_type, std::set<GpiImplInterface*> > misses;
+};
+
+static GpiScopeCache scope_cache;
+
 
 size_t gpi_print_registered_impl()
 {
@@ -142,6 +239,7 @@ void gpi_sim_end()
 void gpi_cleanup(void)
 {
     CLEAR_STORE();
+    scope_cache.clear();
     embed_sim_cleanup();
 }
 
@@ -217,6 +315,7 @@ void gpi_load_extra_libs()
 
 void gpi_get_sim_time(uint32_t *high, uint32_t *low)
 {
+    GpiStatTimer timer(GPI_STAT_GET_SIM_TIME);
     registered_impls[0]->get_sim_time(high, low);
 }
 
@@ -237,6 +336,7 @@ void gpi_get_sim_precision(int32_t *precision)
 
 gpi_sim_hdl gpi_get_root_handle(const char *name)
 {
+    GpiStatTimer timer(GPI_STAT_GET_ROOT_HANDLE);
     /* May need to look over all the implementations that are registered
        to find this handle */
     vector<GpiImplInterface*>::iterator iter;
@@ -274,6 +374,12 @@ static GpiObjHdl* __gpi_get_handle_by_name(GpiObjHdl *parent,
 
     LOG_DEBUG("Searching for %s", name.c_str());
 
+    const std::string &scope = parent->get_fullname();
+
+    if (!skip_impl && scope_cache.is_missing(scope, name, registered_impls)) {
+        return NULL;
+    }
+
     for (iter = registered_impls.begin();
          iter != registered_impls.end();
          iter++) {
@@ -283,6 +389,10 @@ static GpiObjHdl* __gpi_get_handle_by_name(GpiObjHdl *parent,
             continue;
         }
 
+        if (scope_cache.is_miss(scope, name, *iter)) {
+            continue;
+        }
+
         LOG_DEBUG("Checking if %s is native through implementation %s",
                   name.c_str(),
                   (*iter)->get_name_c());
@@ -298,6 +408,7 @@ static GpiObjHdl* __gpi_get_handle_by_name(GpiObjHdl *parent,
             LOG_DEBUG("Found %s via %s", name.c_str(), (*iter)->get_name_c());
             break;
         }
+        scope_cache.set_miss(scope, name, *iter);
     }
 
     if (hdl)
@@ -339,6 +450,7 @@ static GpiObjHdl* __gpi_get_handle_by_raw(GpiObjHdl *parent,
 
 gpi_sim_hdl gpi_get_handle_by_name(gpi_sim_hdl parent, const char *name)
 {
+    GpiStatTimer timer(GPI_STAT_GET_HANDLE_BY_NAME);
     std::string s_name = name;
     GpiObjHdl *base = sim_to_hdl<GpiObjHdl*>(parent);
     GpiObjHdl *hdl = __gpi_get_handle_by_name(base, s_name, NULL);
@@ -351,6 +463,7 @@ gpi_sim_hdl gpi_get_handle_by_name(gpi_sim_hdl parent, const char *name)
 
 gpi_sim_hdl gpi_get_handle_by_index(gpi_sim_hdl parent, int32_t index)
 {
+    GpiStatTimer timer(GPI_STAT_GET_HANDLE_BY_INDEX);
     GpiObjHdl *hdl         = NULL;
     GpiObjHdl *base        = sim_to_hdl<GpiObjHdl*>(parent);
     GpiImplInterface *intf = base->m_impl;
@@ -374,6 +487,7 @@ gpi_sim_hdl gpi_get_handle_by_index(gpi_sim_hdl parent, int32_t index)
 
 gpi_iterator_hdl gpi_iterate(gpi_sim_hdl base, gpi_iterator_sel_t type)
 {
+    GpiStatTimer timer(GPI_STAT_ITERATE);
     GpiObjHdl *obj_hdl = sim_to_hdl<GpiObjHdl*>(base);
     GpiIterator *iter = obj_hdl->m_impl->iterate_handle(obj_hdl, type);
     if (!iter) {
@@ -384,6 +498,7 @@ gpi_iterator_hdl gpi_iterate(gpi_sim_hdl base, gpi_iterator_sel_t type)
 
 gpi_sim_hdl gpi_next(gpi_iterator_hdl iterator)
 {
+    GpiStatTimer timer(GPI_STAT_NEXT);
     std::string name;
     GpiIterator *iter = sim_to_hdl<GpiIterator*>(iterator);
     GpiObjHdl *parent = iter->get_parent();
@@ -437,24 +552,28 @@ const char* gpi_get_definition_file(gpi_sim_hdl sig_hdl)
 
 const char *gpi_get_signal_value_binstr(gpi_sim_hdl sig_hdl)
 {
+    GpiStatTimer timer(GPI_STAT_GET_SIGNAL_VALUE_BINSTR);
     GpiSignalObjHdl *obj_hdl = sim_to_hdl<GpiSignalObjHdl*>(sig_hdl);
     return obj_hdl->get_signal_value_binstr();
 }
 
 const char *gpi_get_signal_value_str(gpi_sim_hdl sig_hdl)
 {
+    GpiStatTimer timer(GPI_STAT_GET_SIGNAL_VALUE_STR);
     GpiSignalObjHdl *obj_hdl = sim_to_hdl<GpiSignalObjHdl*>(sig_hdl);
     return obj_hdl->get_signal_value_str();
 }
 
 double gpi_get_signal_value_real(gpi_sim_hdl sig_hdl)
 {
+    GpiStatTimer timer(GPI_STAT_GET_SIGNAL_VALUE_REAL);
     GpiSignalObjHdl *obj_hdl = sim_to_hdl<GpiSignalObjHdl*>(sig_hdl);
     return obj_hdl->get_signal_value_real();
 }
 
 long gpi_get_signal_value_long(gpi_sim_hdl sig_hdl)
 {
+    GpiStatTimer timer(GPI_STAT_GET_SIGNAL_VALUE_LONG);
     GpiSignalObjHdl *obj_hdl = sim_to_hdl<GpiSignalObjHdl*>(sig_hdl);
     return obj_hdl->get_signal_value_long();
 }
@@ -495,6 +614,7 @@ int gpi_is_indexable(gpi_sim_hdl sig_hdl)
 
 void gpi_set_signal_value_long(gpi_sim_hdl sig_hdl, long value, gpi_set_action_t action)
 {
+    GpiStatTimer timer(GPI_STAT_SET_SIGNAL_VALUE_LONG);
     GpiSignalObjHdl *obj_hdl = sim_to_hdl<GpiSignalObjHdl*>(sig_hdl);
 
     obj_hdl->set_signal_value(value, action);
@@ -502,6 +622,7 @@ void gpi_set_signal_value_long(gpi_sim_hdl sig_hdl, long value, gpi_set_action_t
 
 void gpi_set_signal_value_binstr(gpi_sim_hdl sig_hdl, const char *binstr, gpi_set_action_t action)
 {
+    GpiStatTimer timer(GPI_STAT_SET_SIGNAL_VALUE_BINSTR);
     std::string value = binstr;
     GpiSignalObjHdl *obj_hdl = sim_to_hdl<GpiSignalObjHdl*>(sig_hdl);
     obj_hdl->set_signal_value_binstr(value, action);
@@ -509,6 +630,7 @@ void gpi_set_signal_value_binstr(gpi_sim_hdl sig_hdl, const char *binstr, gpi_se
 
 void gpi_set_signal_value_str(gpi_sim_hdl sig_hdl, const char *str, gpi_set_action_t action)
 {
+    GpiStatTimer timer(GPI_STAT_SET_SIGNAL_VALUE_STR);
     std::string value = str;
     GpiSignalObjHdl *obj_hdl = sim_to_hdl<GpiSignalObjHdl*>(sig_hdl);
     obj_hdl->set_signal_value_str(value, action);
@@ -516,6 +638,7 @@ void gpi_set_signal_value_str(gpi_sim_hdl sig_hdl, const char *str, gpi_set_acti
 
 void gpi_set_signal_value_real(gpi_sim_hdl sig_hdl, double value, gpi_set_action_t action)
 {
+    GpiStatTimer timer(GPI_STAT_SET_SIGNAL_VALUE_REAL);
     GpiSignalObjHdl *obj_hdl = sim_to_hdl<GpiSignalObjHdl*>(sig_hdl);
     obj_hdl->set_signal_value(value, action);
 }
@@ -543,6 +666,7 @@ gpi_sim_hdl gpi_register_value_change_callback(int (*gpi_function)(const void *)
                                                gpi_sim_hdl sig_hdl,
                                                int edge)
 {
+    GpiStatTimer timer(GPI_STAT_REGISTER_VALUE_CHANGE_CALLBACK);
 
     GpiSignalObjHdl *signal_hdl = sim_to_hdl<GpiSignalObjHdl*>(sig_hdl);
 
@@ -553,21 +677,61 @@ gpi_sim_hdl gpi_register_value_change_callback(int (*gpi_function)(const void *)
         return NULL;
     }
 
+    /* The same handle may previously have been used persistently */
+    GpiValueCbHdl *value_hdl = dynamic_cast<GpiValueCbHdl*>(gpi_hdl);
+    if (value_hdl) {
+        value_hdl->set_persistent(false);
+        value_hdl->set_enabled(true);
+    }
+
     gpi_hdl->set_user_data(gpi_function, gpi_cb_data);
     return (gpi_sim_hdl)gpi_hdl;
 }
 
+gpi_sim_hdl gpi_register_persistent_value_change_callback(int (*gpi_function)(const void *),
+                                                          void *gpi_cb_data,
+                                                          gpi_sim_hdl sig_hdl,
+                                                          int edge)
+{
+    GpiStatTimer timer(GPI_STAT_REGISTER_PERSISTENT_VALUE_CHANGE_CALLBACK);
+    GpiSignalObjHdl *signal_hdl = sim_to_hdl<GpiSignalObjHdl*>(sig_hdl);
+
+    GpiCbHdl *gpi_hdl = signal_hdl->value_change_cb(edge);
+    GpiValueCbHdl *value_hdl = dynamic_cast<GpiValueCbHdl*>(gpi_hdl);
+    if (!value_hdl) {
+        LOG_ERROR("Failed to register a persistent value change callback");
+        return NULL;
+    }
+
+    value_hdl->set_persistent(true);
+    value_hdl->set_enabled(true);
+    gpi_hdl->set_user_data(gpi_function, gpi_cb_data);
+    return (gpi_sim_hdl)gpi_hdl;
+}
+
+void gpi_set_callback_enabled(gpi_sim_hdl hdl, int enabled)
+{
+    GpiValueCbHdl *cb_hdl = dynamic_cast<GpiValueCbHdl*>(sim_to_hdl<GpiCbHdl*>(hdl));
+    if (!cb_hdl) {
+        LOG_ERROR("Only value change callbacks can be enabled or disabled");
+        return;
+    }
+    cb_hdl->set_enabled(enabled != 0);
+}
+
 /* It should not matter which implementation we use for this so just pick the first
    one */
 gpi_sim_hdl gpi_register_timed_callback(int (*gpi_function)(const void *),
                                         void *gpi_cb_data, uint64_t time_ps)
 {
+    GpiStatTimer timer(GPI_STAT_REGISTER_TIMED_CALLBACK);
     GpiCbHdl *gpi_hdl = registered_impls[0]->register_timed_callback(time_ps);
     if (!gpi_hdl) {
         LOG_ERROR("Failed to register a timed callback");
         return NULL;
     }
 
+    gpi_hdl->set_stat_id(GPI_STAT_CB_TIMED);
     gpi_hdl->set_user_data(gpi_function, gpi_cb_data);
     return (gpi_sim_hdl)gpi_hdl;
 }
@@ -578,12 +742,14 @@ gpi_sim_hdl gpi_register_timed_callback(int (*gpi_function)(const void *),
 gpi_sim_hdl gpi_register_readonly_callback(int (*gpi_function)(const void *),
                                            void *gpi_cb_data)
 {
+    GpiStatTimer timer(GPI_STAT_REGISTER_READONLY_CALLBACK);
     GpiCbHdl *gpi_hdl = registered_impls[0]->register_readonly_callback();
     if (!gpi_hdl) {
         LOG_ERROR("Failed to register a readonly callback");
         return NULL;
     }
 
+    gpi_hdl->set_stat_id(GPI_STAT_CB_READONLY);
     gpi_hdl->set_user_data(gpi_function, gpi_cb_data);
     return (gpi_sim_hdl)gpi_hdl;
 }
@@ -591,12 +757,14 @@ gpi_sim_hdl gpi_register_readonly_callback(int (*gpi_function)(const void *),
 gpi_sim_hdl gpi_register_nexttime_callback(int (*gpi_function)(const void *),
                                            void *gpi_cb_data)
 {
+    GpiStatTimer timer(GPI_STAT_REGISTER_NEXTTIME_CALLBACK);
     GpiCbHdl *gpi_hdl = registered_impls[0]->register_nexttime_callback();
     if (!gpi_hdl) {
         LOG_ERROR("Failed to register a nexttime callback");
         return NULL;
     }
 
+    gpi_hdl->set_stat_id(GPI_STAT_CB_NEXTTIME);
     gpi_hdl->set_user_data(gpi_function, gpi_cb_data);
     return (gpi_sim_hdl)gpi_hdl;
 }
@@ -607,22 +775,190 @@ gpi_sim_hdl gpi_register_nexttime_callback(int (*gpi_function)(const void *),
 gpi_sim_hdl gpi_register_readwrite_callback(int (*gpi_function)(const void *),
                                             void *gpi_cb_data)
 {
+    GpiStatTimer timer(GPI_STAT_REGISTER_READWRITE_CALLBACK);
     GpiCbHdl *gpi_hdl = registered_impls[0] ->register_readwrite_callback();
     if (!gpi_hdl) {
         LOG_ERROR("Failed to register a readwrite callback");
         return NULL;
     }
 
+    gpi_hdl->set_stat_id(GPI_STAT_CB_READWRITE);
     gpi_hdl->set_user_data(gpi_function, gpi_cb_data);
     return (gpi_sim_hdl)gpi_hdl;
 }
 
 void gpi_deregister_callback(gpi_sim_hdl hdl)
 {
+    GpiStatTimer timer(GPI_STAT_DEREGISTER_CALLBACK);
     GpiCbHdl *cb_hdl = sim_to_hdl<GpiCbHdl*>(hdl);
     cb_hdl->m_impl->deregister_callback(cb_hdl);
 }
 
+void gpi_register_batch_handler(int (*function)(const void *),
+                                int (*handler)(const void **, size_t))
+{
+    batch_function = function;
+    batch_handler = handler;
+}
+
+void gpi_begin_callback_batch()
+{
+    ++batch_depth;
+}
+
+int gpi_deliver_callback(int (*gpi_function)(const void *), const void *data)
+{
+    if (!batch_depth) {
+        return gpi_function(data);
+    }
+
+    /* A persistent callback can fire more than once before the batch ends,
+       but should only be delivered once */
+    if (batch_queued.insert(data).second) {
+        batch_queue.push_back(make_pair(gpi_function, data));
+    }
+    return 0;
+}
+
+void gpi_end_callback_batch()
+{
+    if (!batch_depth) {
+        LOG_ERROR("gpi_end_callback_batch called without a batch in progress");
+        return;
+    }
+
+    if (--batch_depth) {
+        return;
+    }
+
+    GpiStatTimer timer(GPI_STAT_CB_BATCH);
+
+    /* Take the queue, delivering it may cause further callbacks */
+    vector<pair<gpi_cb_function_t, const void*> > queue;
+    queue.swap(batch_queue);
+    batch_queued.clear();
+
+    /* Deliver in the order the callbacks fired, each run of callbacks which
+       can be batched in one call */
+    vector<const void*> batch;
+    for (auto &entry : queue) {
+        if (batch_handler && entry.first == batch_function) {
+            batch.push_back(entry.second);
+            continue;
+        }
+        if (!batch.empty()) {
+            batch_handler(batch.data(), batch.size());
+            batch.clear();
+        }
+        entry.first(entry.second);
+    }
+
+    if (!batch.empty()) {
+        batch_handler(batch.data(), batch.size());
+    }
+}
+
+void gpi_register_trace_control(const gpi_trace_control_t *control)
+{
+    trace_control = control;
+}
+
+int gpi_has_trace_control()
+{
+    return trace_control != NULL;
+}
+
+int gpi_trace_on()
+{
+    if (!trace_control)
+        return -1;
+    return trace_control->trace_on();
+}
+
+int gpi_trace_off()
+{
+    if (!trace_control)
+        return -1;
+    return trace_control->trace_off();
+}
+
+int gpi_set_trace_depth(int levels)
+{
+    if (!trace_control)
+        return -1;
+    return trace_control->set_trace_depth(levels);
+}
+
+void gpi_register_snapshot_control(const gpi_snapshot_control_t *control)
+{
+    snapshot_control = control;
+}
+
+int gpi_has_snapshot_control()
+{
+    return snapshot_control != NULL;
+}
+
+int gpi_save_snapshot(const char *filename)
+{
+    if (!snapshot_control)
+        return -1;
+    return snapshot_control->save(filename);
+}
+
+int gpi_restore_snapshot(const char *filename)
+{
+    if (!snapshot_control)
+        return -1;
+    return snapshot_control->restore(filename);
+}
+
+void gpi_register_fork_control(const gpi_fork_control_t *control)
+{
+    fork_control = control;
+}
+
+int gpi_has_fork_control()
+{
+    return fork_control != NULL;
+}
+
+int gpi_fork()
+{
+    if (!fork_control)
+        return -1;
+    return fork_control->fork();
+}
+
+void *gpi_get_callback_data(gpi_sim_hdl hdl)
+{
+    GpiCbHdl *cb_hdl = sim_to_hdl<GpiCbHdl*>(hdl);
+    return const_cast<void*>(cb_hdl->get_user_data());
+}
+
+size_t gpi_get_stats(const gpi_stat_t **stats)
+{
+    if (!gpi_stats_enabled) {
+        return 0;
+    }
+    *stats = gpi_stats;
+    return GPI_STAT_COUNT;
+}
+
+uint64_t gpi_get_stats_time_ns()
+{
+    return (uint64_t)std::chrono::duration_cast<std::chrono::nanoseconds>(
+        std::chrono::steady_clock::now().time_since_epoch()).count();
+}
+
+void gpi_add_stat(gpi_stat_t *stat, uint64_t elapsed_ns)
+{
+    stat->calls++;
+    stat->total_ns += elapsed_ns;
+    if (elapsed_ns > stat->max_ns)
+        stat->max_ns = elapsed_ns;
+}
+
 const char* GpiImplInterface::get_name_c() {
     return m_name.c_str();
 }
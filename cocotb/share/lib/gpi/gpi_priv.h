@@ -44,6 +44,60 @@ typedef enum gpi_cb_state {
     GPI_DELETE = 4,
 } gpi_cb_state_e;
 
+/* Call statistics, see gpi_get_stats. Names are in gpi_stats in GpiCommon.cpp */
+typedef enum gpi_stat_id {
+    GPI_STAT_GET_SIM_TIME = 0,
+    GPI_STAT_GET_ROOT_HANDLE,
+    GPI_STAT_GET_HANDLE_BY_NAME,
+    GPI_STAT_GET_HANDLE_BY_INDEX,
+    GPI_STAT_ITERATE,
+    GPI_STAT_NEXT,
+    GPI_STAT_GET_SIGNAL_VALUE_BINSTR,
+    GPI_STAT_GET_SIGNAL_VALUE_STR,
+    GPI_STAT_GET_SIGNAL_VALUE_REAL,
+    GPI_STAT_GET_SIGNAL_VALUE_LONG,
+    GPI_STAT_SET_SIGNAL_VALUE_BINSTR,
+    GPI_STAT_SET_SIGNAL_VALUE_STR,
+    GPI_STAT_SET_SIGNAL_VALUE_REAL,
+    GPI_STAT_SET_SIGNAL_VALUE_LONG,
+    GPI_STAT_REGISTER_VALUE_CHANGE_CALLBACK,
+    GPI_STAT_REGISTER_PERSISTENT_VALUE_CHANGE_CALLBACK,
+    GPI_STAT_REGISTER_TIMED_CALLBACK,
+    GPI_STAT_REGISTER_READONLY_CALLBACK,
+    GPI_STAT_REGISTER_NEXTTIME_CALLBACK,
+    GPI_STAT_REGISTER_READWRITE_CALLBACK,
+    GPI_STAT_DEREGISTER_CALLBACK,
+    GPI_STAT_CB_TIMED,
+    GPI_STAT_CB_VALUE_CHANGE,
+    GPI_STAT_CB_READONLY,
+    GPI_STAT_CB_NEXTTIME,
+    GPI_STAT_CB_READWRITE,
+    GPI_STAT_CB_BATCH,
+    GPI_STAT_COUNT,
+    GPI_STAT_NONE = GPI_STAT_COUNT  // Not counted
+} gpi_stat_id_e;
+
+extern bool gpi_stats_enabled;
+extern gpi_stat_t gpi_stats[GPI_STAT_COUNT];
+
+/* Counts the time from construction to destruction against a statistic.
+   Nothing is timed unless statistics are enabled. */
+class GpiStatTimer {
+public:
+    explicit GpiStatTimer(gpi_stat_id_e id) :
+        m_stat(gpi_stats_enabled && id != GPI_STAT_NONE ? &gpi_stats[id] : NULL),
+        m_start(m_stat ? gpi_get_stats_time_ns() : 0) { }
+
+    ~GpiStatTimer() {
+        if (m_stat)
+            gpi_add_stat(m_stat, gpi_get_stats_time_ns() - m_start);
+    }
+
+private:
+    gpi_stat_t *m_stat;
+    uint64_t m_start;
+};
+
 class GpiCbHdl;
 class GpiImplInterface;
 class GpiIterator;
@@ -194,7 +248,8 @@ public:
     GpiCbHdl(GpiImplInterface *impl) : GpiHdl(impl, NULL),
                                        gpi_function(NULL),
                                        m_cb_data(NULL),
-                                       m_state(GPI_FREE) { }
+                                       m_state(GPI_FREE),
+                                       m_stat_id(GPI_STAT_NONE) { }
     // Pure virtual functions for derived classes
     virtual int arm_callback() = 0;         // Register with simulator
     virtual int run_callback();         // Entry point from simulator
@@ -207,12 +262,16 @@ public:
     void set_call_state(gpi_cb_state_e new_state);
     gpi_cb_state_e get_call_state();
 
+    // The statistic that calls of this callback are counted against
+    void set_stat_id(gpi_stat_id_e stat_id) { m_stat_id = stat_id; }
+
     virtual ~GpiCbHdl();
 
 protected:
     int (*gpi_function)(const void *);    // GPI function to callback
     const void *m_cb_data;                // GPI data supplied to "gpi_function"
     gpi_cb_state_e m_state;         // GPI state of the callback through its cycle
+    gpi_stat_id_e m_stat_id;        // Statistic the callback is counted against
 };
 
 class GpiValueCbHdl : public virtual GpiCbHdl {
@@ -220,9 +279,17 @@ public:
     GpiValueCbHdl(GpiImplInterface *impl, GpiSignalObjHdl *signal, int edge);
     int run_callback() override;
 
+    // A persistent callback is left primed after it has run, so the
+    // simulator keeps calling it until it is explicitly cleaned up
+    void set_persistent(bool persistent) { m_persistent = persistent; }
+    // A disabled persistent callback stays armed but does not call up
+    void set_enabled(bool enabled) { m_enabled = enabled; }
+
 protected:
     std::string required_value;
     GpiSignalObjHdl *m_signal;
+    bool m_persistent;
+    bool m_enabled;
 };
 
 class GpiIterator : public GpiHdl {
@@ -330,6 +397,8 @@ void gpi_cleanup();
 void gpi_embed_end();
 void gpi_embed_event(gpi_event_t level, const char *msg);
 void gpi_load_extra_libs();
+/* Call up with the callback data, or queue it if a batch is in progress */
+int gpi_deliver_callback(int (*gpi_function)(const void *), const void *data);
 
 typedef void (*layer_entry_func)();
 
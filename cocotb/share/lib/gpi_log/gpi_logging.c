@@ -35,6 +35,53 @@ static PyObject *pLogHandler = NULL;
 static PyObject *pLogFilter = NULL;
 static enum gpi_log_levels local_level = GPIInfo;
 
+/* The lowest level enabled for each logger name, as returned by the Python
+ * filter function, so that a disabled log costs a lookup in this table
+ * rather than a call into Python. There are only a few logger names, so a
+ * linear search is enough. The table is emptied whenever Python reports a
+ * level change through set_log_level().
+ */
+#define LEVEL_CACHE_SIZE 32
+static struct {
+    char *name;
+    long level;
+} level_cache[LEVEL_CACHE_SIZE];
+static size_t level_cache_used = 0;
+
+static void clear_level_cache(void)
+{
+    for (size_t i = 0; i < level_cache_used; i++) {
+        free(level_cache[i].name);
+    }
+    level_cache_used = 0;
+}
+
+/* Returns the cached lowest enabled level for the logger *name*, or -1 */
+static long find_cached_level(const char *name)
+{
+    for (size_t i = 0; i < level_cache_used; i++) {
+        if (strcmp(level_cache[i].name, name) == 0) {
+            return level_cache[i].level;
+        }
+    }
+    return -1;
+}
+
+static void add_cached_level(const char *name, long level)
+{
+    if (level_cache_used == LEVEL_CACHE_SIZE) {
+        // Too many names to cache: the remaining ones call into Python
+        return;
+    }
+    char *copy = strdup(name);
+    if (copy == NULL) {
+        return;
+    }
+    level_cache[level_cache_used].name = copy;
+    level_cache[level_cache_used].level = level;
+    level_cache_used++;
+}
+
 void set_log_handler(void *handler)
 {
     pLogHandler = (PyObject *)handler;      // Note: This function steals a reference to handler.
@@ -55,11 +102,13 @@ void clear_log_filter(void)
 {
     Py_XDECREF(pLogFilter);
     pLogFilter = NULL;
+    clear_level_cache();
 }
 
 void set_log_level(enum gpi_log_levels new_level)
 {
     local_level = new_level;
+    clear_level_cache();
 }
 
 // Decode the level into a string matching the Python interpretation
@@ -167,8 +216,10 @@ static void gpi_log_v(const char *name, enum gpi_log_levels level, const char *p
         return;
     }
 
-    if (level < local_level)
+    long enabled_level = find_cached_level(name);
+    if (enabled_level >= 0 && level < enabled_level) {
         return;
+    }
 
     PyGILState_STATE gstate = PyGILState_Ensure();
 
@@ -185,20 +236,23 @@ static void gpi_log_v(const char *name, enum gpi_log_levels level, const char *p
         goto error;
     }
 
-    PyObject *filter_ret = PyObject_CallFunctionObjArgs(pLogFilter, logger_name_arg, level_arg, NULL);
-    if (filter_ret == NULL) {
-        goto error;
-    }
+    if (enabled_level < 0) {
+        PyObject *filter_ret = PyObject_CallFunctionObjArgs(pLogFilter, logger_name_arg, NULL);
+        if (filter_ret == NULL) {
+            goto error;
+        }
 
-    int is_enabled = PyObject_IsTrue(filter_ret);
-    Py_DECREF(filter_ret);
-    if (is_enabled < 0) {
-        /* A python exception occured while converting `filter_ret` to bool */
-        goto error;
-    }
+        enabled_level = PyLong_AsLong(filter_ret);
+        Py_DECREF(filter_ret);
+        if (enabled_level == -1 && PyErr_Occurred()) {
+            /* A python exception occured while converting `filter_ret` to an integer */
+            goto error;
+        }
+        add_cached_level(name, enabled_level);
 
-    if (!is_enabled) {
-        goto ok;
+        if (level < enabled_level) {
+            goto ok;
+        }
     }
 
     // Ignore truncation
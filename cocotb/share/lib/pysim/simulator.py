@@ -0,0 +1,873 @@
+# Copyright cocotb contributors
+# Licensed under the Revised BSD License, see LICENSE for details.
+# SPDX-License-Identifier: BSD-3-Clause
+
+"""Pure-Python stand-in for the ``simulator`` extension module.
+
+This implements the interface that cocotb uses from the ``simulator`` module
+on top of a small event-driven kernel instead of an HDL simulator, so that the
+scheduler, triggers, handles and regression manager can be run end-to-end in a
+single Python process. It is meant for benchmarking and testing cocotb itself,
+not for simulating real designs.
+
+The design is a netlist built in Python from :class:`Module`, :class:`Signal`,
+:class:`Clock`, :class:`Register` and :class:`Assign` objects, for example::
+
+    import simulator
+
+    def design():
+        top = simulator.Module("top")
+        clk = top.add(simulator.Signal("clk"))
+        count = top.add(simulator.Signal("count", width=8))
+        top.add(simulator.Clock(clk, period=10000))
+        top.add(simulator.Register(count, clk, lambda: count.value + 1))
+        return top
+
+Each time step is run in the same order as in a Verilog simulator:
+
+1. The ``NextTimeStep`` callbacks, if time has advanced.
+2. The timed callbacks and clock edges due at this time.
+3. Delta cycles until no signal changes: the value change callbacks of the
+   signals changed in the previous delta are called, then the netlist
+   processes sensitive to them are evaluated and their outputs updated
+   together, like non-blocking assignments.
+4. The ``ReadWrite`` callbacks, going back to 3. if they change a signal.
+5. The ``ReadOnly`` callbacks.
+
+The simulation ends when :func:`stop_simulator` is called, or when there is
+nothing left to do.
+
+Running this file starts a simulation of the design given by
+:envvar:`PYSIM_DESIGN` with cocotb, like the simulator Makefiles do for other
+simulators; see ``python simulator.py --help``. This file must be imported as
+``simulator``, from a directory on :data:`sys.path`.
+"""
+
+import builtins
+import heapq
+import itertools
+import logging
+import os
+import pickle
+import sys
+import traceback
+
+# The GPI object types, iterator types, set actions and edges, as in gpi.h
+UNKNOWN = 0
+MEMORY = 1
+MODULE = 2
+NET = 3
+PARAMETER = 4
+REG = 5
+NETARRAY = 6
+ENUM = 7
+STRUCTURE = 8
+REAL = 9
+INTEGER = 10
+STRING = 11
+GENARRAY = 12
+
+OBJECTS = 1
+DRIVERS = 2
+LOADS = 3
+
+_DEPOSIT = 0
+_FORCE = 1
+_RELEASE = 2
+
+_RISING = 1
+_FALLING = 2
+_VALUE_CHANGE = 3
+
+_TYPE_STRINGS = {
+    MODULE: "GPI_MODULE",
+    NET: "GPI_NET",
+    PARAMETER: "GPI_PARAMETER",
+    REG: "GPI_REGISTER",
+    REAL: "GPI_REAL",
+    INTEGER: "GPI_INTEGER",
+    STRING: "GPI_STRING",
+}
+
+_PRECISION = -12
+
+# The time while a callback is being handled, and None otherwise
+sim_time = None
+
+_log = logging.getLogger("pysim")
+
+
+###############################################################################
+# Netlist
+###############################################################################
+
+class _Object(object):
+    """Base class of the objects which have a handle."""
+
+    def __init__(self, name, kind):
+        self.name = name
+        self.kind = kind
+        self.parent = None
+        self.handle = 0
+
+    @property
+    def path(self):
+        if self.parent is None:
+            return self.name
+        return self.parent.path + "." + self.name
+
+
+class Module(_Object):
+    """A level of hierarchy, holding signals, processes and other modules.
+
+    Args:
+        name (str): The instance name.
+        definition (str, optional): The module definition name.
+            Defaults to *name*.
+    """
+
+    def __init__(self, name, definition=None):
+        super(Module, self).__init__(name, MODULE)
+        self.definition = name if definition is None else definition
+        self.children = {}
+        self.processes = []
+
+    def add(self, obj):
+        """Add a :class:`Module`, :class:`Signal` or process to this module.
+
+        Returns:
+            *obj*, for convenience.
+        """
+        if isinstance(obj, _Object):
+            if obj.name in self.children:
+                raise ValueError("{} already has a child called {}".format(self.path, obj.name))
+            obj.parent = self
+            self.children[obj.name] = obj
+        elif isinstance(obj, _Process):
+            self.processes.append(obj)
+        else:
+            raise TypeError("Cannot add {!r} to a module".format(obj))
+        return obj
+
+    def __len__(self):
+        return len(self.children)
+
+
+class Signal(_Object):
+    """A signal, with an integer value.
+
+    Values which contain bits other than ``0`` and ``1`` can be written with
+    :func:`set_signal_val_binstr`. They are stored as a string in
+    :attr:`xz`, and read as ``0`` for those bits through :attr:`value`.
+
+    Args:
+        name (str): The signal name.
+        width (int, optional): The width in bits. Defaults to 1.
+        kind (int, optional): The GPI type of the signal, one of
+            :data:`REG`, :data:`NET`, :data:`INTEGER`, :data:`REAL` and
+            :data:`STRING`. Defaults to :data:`REG`.
+        init (optional): The initial value. Defaults to ``0``, ``0.0`` or
+            ``""`` depending on *kind*.
+        const (bool, optional): Whether this is a constant, such as a
+            parameter. Defaults to ``False``.
+    """
+
+    def __init__(self, name, width=1, kind=REG, init=None, const=False):
+        super(Signal, self).__init__(name, kind)
+        if kind == INTEGER:
+            width = 32
+        self.width = width
+        self.mask = (1 << width) - 1
+        self.const = const
+        if init is None:
+            init = {REAL: 0.0, STRING: ""}.get(kind, 0)
+        self.value = init
+        self.xz = None
+        self.forced = False
+        self._callbacks = {}
+        self._processes = []
+        self._edge_processes = []
+
+    def __len__(self):
+        return self.width
+
+
+class _Process(object):
+    """Base class of the netlist processes."""
+
+    def elaborate(self, kernel):
+        pass
+
+
+class Clock(_Process):
+    """Toggles *signal* forever.
+
+    Args:
+        signal (Signal): The clock signal.
+        period (int): The period, in simulator steps (picoseconds).
+        high (int, optional): The time for which the clock is high in each
+            period. Defaults to half of *period*.
+        start (int, optional): The time of the first rising edge.
+            Defaults to 0.
+    """
+
+    def __init__(self, signal, period, high=None, start=0):
+        if high is None:
+            high = period // 2
+        if not 0 < high < period:
+            raise ValueError("The clock must be high for part of the period")
+        self.signal = signal
+        self.period = period
+        self.high = high
+        self.start = start
+
+    def elaborate(self, kernel):
+        kernel.schedule_event(self.start, self._rise)
+
+    def _rise(self, kernel):
+        kernel.drive(self.signal, 1)
+        kernel.schedule_event(kernel.time + self.high, self._fall)
+
+    def _fall(self, kernel):
+        kernel.drive(self.signal, 0)
+        kernel.schedule_event(kernel.time + self.period - self.high, self._rise)
+
+
+class Register(_Process):
+    """Updates *q* on each rising edge of *clk*.
+
+    Args:
+        q (Signal): The register output.
+        clk (Signal): The clock.
+        d (Signal or callable): The next value, or a function without arguments
+            returning it.
+        reset (Signal, optional): A synchronous, active high reset.
+        reset_value (int, optional): The value of *q* in reset. Defaults to 0.
+    """
+
+    def __init__(self, q, clk, d, reset=None, reset_value=0):
+        self.q = q
+        self.clk = clk
+        self.d = d
+        self.reset = reset
+        self.reset_value = reset_value
+
+    def elaborate(self, kernel):
+        self.clk._edge_processes.append(self)
+
+    def evaluate(self):
+        if self.reset is not None and self.reset.value:
+            return self.reset_value
+        if isinstance(self.d, Signal):
+            return self.d.value
+        return self.d()
+
+
+class Assign(_Process):
+    """Continuously assigns ``function()`` to *out* whenever *inputs* change.
+
+    Args:
+        out (Signal): The signal to drive.
+        function (callable): A function without arguments returning the
+            value to drive.
+        inputs (list(Signal)): The signals the value depends on.
+    """
+
+    def __init__(self, out, function, inputs):
+        self.q = out
+        self.function = function
+        self.inputs = list(inputs)
+
+    def elaborate(self, kernel):
+        for signal in self.inputs:
+            signal._processes.append(self)
+        kernel.schedule_process(self)
+
+    def evaluate(self):
+        return self.function()
+
+
+###############################################################################
+# Kernel
+###############################################################################
+
+class _Callback(object):
+    __slots__ = ("handle", "function", "args", "persistent", "enabled", "active", "edge", "signal")
+
+    def __init__(self, handle, function, args, persistent=False, edge=None, signal=None):
+        self.handle = handle
+        self.function = function
+        self.args = args
+        self.persistent = persistent
+        self.enabled = True
+        self.active = True
+        self.edge = edge
+        self.signal = signal
+
+
+class _Kernel(object):
+
+    def __init__(self):
+        self.root = None
+        self.time = 0
+        self.objects = {}       # handle -> _Object
+        self.iterators = {}     # handle -> iterator of handles
+        self.callbacks = {}     # handle -> _Callback
+        self.timed = []         # heap of (time, sequence, _Callback or event function)
+        self.readwrite = []
+        self.readonly = []
+        self.nexttime = []
+        self.changed = {}       # Signal -> value at the start of the delta cycle
+        self.pending = {}       # processes to evaluate in the next delta cycle
+        self.batch_single = None
+        self.batch_many = None
+        self.stopped = False
+        self.failed = False
+        # Not next(), which is shadowed by the interface function below
+        self.new_handle = itertools.count(1).__next__
+        self._new_sequence = itertools.count().__next__
+        self._in_readonly = False
+
+    # Elaboration
+
+    def elaborate(self, root):
+        self.root = root
+        self._elaborate(root)
+
+    def _elaborate(self, obj):
+        obj.handle = self.new_handle()
+        self.objects[obj.handle] = obj
+        if isinstance(obj, Module):
+            for child in obj.children.values():
+                self._elaborate(child)
+            for process in obj.processes:
+                process.elaborate(self)
+
+    # Scheduling
+
+    def schedule_event(self, time, event):
+        heapq.heappush(self.timed, (time, self._new_sequence(), event))
+
+    def schedule_process(self, process):
+        self.pending[process] = None
+
+    def new_callback(self, function, args, **kwargs):
+        if not callable(function):
+            raise TypeError("Attempt to register a callback without passing a callable callback!")
+        cb = _Callback(self.new_handle(), function, args, **kwargs)
+        self.callbacks[cb.handle] = cb
+        return cb
+
+    def remove_callback(self, cb):
+        cb.active = False
+        self.callbacks.pop(cb.handle, None)
+        if cb.signal is not None:
+            cb.signal._callbacks.pop(cb.handle, None)
+
+    # Signal updates
+
+    def assign(self, signal, value, xz=None):
+        if value == signal.value and xz == signal.xz:
+            return
+        if signal not in self.changed:
+            self.changed[signal] = signal.value if signal.xz is None else None
+        signal.value = value
+        signal.xz = xz
+
+    def drive(self, signal, value):
+        if not signal.forced:
+            if signal.kind not in (REAL, STRING):
+                value &= signal.mask
+            self.assign(signal, value)
+
+    def set_value(self, signal, action, value, xz=None):
+        if action == _RELEASE:
+            signal.forced = False
+        elif action == _FORCE:
+            signal.forced = True
+        self.assign(signal, value, xz)
+
+    # Running
+
+    def deliver(self, cbs):
+        """Call the functions of *cbs* in order, batching runs of those which can be."""
+        global sim_time
+        batched = []
+        sim_time = self.time
+        try:
+            for cb in cbs:
+                # Compared by equality, as each bound method is a new object
+                batchable = cb.function == self.batch_single and len(cb.args) == 1
+                if batched and not batchable:
+                    self.batch_many(batched)
+                    batched = []
+                if self.stopped:
+                    break
+                if not cb.active or not cb.enabled:
+                    continue
+                if not cb.persistent:
+                    self.remove_callback(cb)
+                if batchable:
+                    batched.append(cb.args[0])
+                else:
+                    cb.function(*cb.args)
+            if batched and not self.stopped:
+                self.batch_many(batched)
+        except Exception:
+            sys.stderr.write("ERROR: called callback function raised an exception\n")
+            traceback.print_exc()
+            self.failed = True
+            self.stopped = True
+        finally:
+            sim_time = None
+
+    def delta(self):
+        changed = self.changed
+        self.changed = {}
+        processes = self.pending
+        self.pending = {}
+        cbs = []
+        for signal, old in changed.items():
+            new = signal.value
+            if new == old and signal.xz is None:
+                continue
+            rising = new == 1 and signal.xz is None
+            falling = new == 0 and signal.xz is None
+            for cb in signal._callbacks.values():
+                edge = cb.edge
+                if edge == _VALUE_CHANGE or (edge == _RISING and rising) or (edge == _FALLING and falling):
+                    cbs.append(cb)
+            for process in signal._processes:
+                processes[process] = None
+            if rising:
+                for process in signal._edge_processes:
+                    processes[process] = None
+
+        if cbs:
+            self.deliver(cbs)
+            if self.stopped:
+                return
+
+        # All processes sample their inputs before any output is updated
+        updates = [(process.q, process.evaluate()) for process in processes]
+        for signal, value in updates:
+            self.drive(signal, value)
+
+    def settle(self):
+        while not self.stopped:
+            while (self.changed or self.pending) and not self.stopped:
+                self.delta()
+            if not self.readwrite or self.stopped:
+                return
+            cbs = self.readwrite
+            self.readwrite = []
+            self.deliver(cbs)
+
+    def step(self):
+        """Run the next time step. Returns ``False`` if there is none."""
+        time = self.timed[0][0]
+        if time != self.time:
+            self.time = time
+            if self.nexttime:
+                cbs = self.nexttime
+                self.nexttime = []
+                self.deliver(cbs)
+
+        cbs = []
+        while self.timed and self.timed[0][0] == time:
+            event = heapq.heappop(self.timed)[2]
+            if isinstance(event, _Callback):
+                cbs.append(event)
+            else:
+                event(self)
+        if cbs:
+            self.deliver(cbs)
+
+        self.settle()
+
+        if self.readonly and not self.stopped:
+            cbs = self.readonly
+            self.readonly = []
+            self._in_readonly = True
+            self.deliver(cbs)
+            self._in_readonly = False
+
+    def run(self, until=None):
+        """Run until stopped, out of events, or past time *until*."""
+        self.settle()
+        while self.timed and not self.stopped:
+            if until is not None and self.timed[0][0] > until:
+                break
+            self.step()
+
+
+_kernel = _Kernel()
+
+
+def elaborate(root):
+    """Make *root* the design being simulated."""
+    _kernel.elaborate(root)
+
+
+def run(until=None):
+    """Run the simulation.
+
+    Args:
+        until (int, optional): Stop before the first time step after this
+            time, in simulator steps.
+
+    Returns:
+        ``True`` if the simulation ended without an exception being raised
+        by a callback.
+    """
+    _kernel.run(until)
+    return not _kernel.failed
+
+
+###############################################################################
+# The simulator module interface
+###############################################################################
+
+def _object(handle):
+    try:
+        return _kernel.objects[handle]
+    except KeyError:
+        raise ValueError("Invalid handle {}".format(handle)) from None
+
+
+def _signal(handle):
+    obj = _object(handle)
+    if not isinstance(obj, Signal):
+        raise TypeError("{} is not a signal".format(obj.path))
+    return obj
+
+
+def log_msg(name, path, funcname, lineno, msg):
+    logger = logging.getLogger(name)
+    logger.handle(logger.makeRecord(name, logging.INFO, path, lineno, msg, None, None, funcname))
+
+
+def log_level(level):
+    _log.setLevel(level)
+
+
+def get_root_handle(name):
+    root = _kernel.root
+    if root is None or (name is not None and name != root.name):
+        return 0
+    return root.handle
+
+
+def get_handle_by_name(handle, name):
+    obj = _object(handle)
+    if not isinstance(obj, Module):
+        return 0
+    child = obj.children.get(name)
+    return 0 if child is None else child.handle
+
+
+def get_handle_by_index(handle, index):
+    return 0
+
+
+def get_name_string(handle):
+    return _object(handle).name
+
+
+def get_type(handle):
+    return _object(handle).kind
+
+
+def get_type_string(handle):
+    return _TYPE_STRINGS.get(_object(handle).kind, "unknown")
+
+
+def get_definition_name(handle):
+    obj = _object(handle)
+    return obj.definition if isinstance(obj, Module) else ""
+
+
+def get_definition_file(handle):
+    return ""
+
+
+def get_const(handle):
+    return getattr(_object(handle), "const", False)
+
+
+def get_num_elems(handle):
+    return len(_object(handle))
+
+
+def get_range(handle):
+    return None
+
+
+def iterate(handle, mode):
+    obj = _object(handle)
+    if mode != OBJECTS or not isinstance(obj, Module):
+        return 0
+    it = _kernel.new_handle()
+    _kernel.iterators[it] = iter([child.handle for child in obj.children.values()])
+    return it
+
+
+def next(it):
+    if not it:
+        raise StopIteration
+    try:
+        return builtins.next(_kernel.iterators[it])
+    except StopIteration:
+        del _kernel.iterators[it]
+        raise
+
+
+def get_signal_val_long(handle):
+    signal = _kernel.objects[handle]
+    value = signal.value
+    if signal.kind == INTEGER and value & 0x80000000:
+        value -= 1 << 32
+    return value
+
+
+def get_signal_val_binstr(handle):
+    signal = _signal(handle)
+    if signal.xz is not None:
+        return signal.xz
+    return format(signal.value, "0{}b".format(signal.width))
+
+
+def get_signal_val_real(handle):
+    return float(_signal(handle).value)
+
+
+def get_signal_val_str(handle):
+    return str(_signal(handle).value)
+
+
+def set_signal_val_long(handle, action, value):
+    signal = _kernel.objects[handle]
+    _kernel.set_value(signal, action, value & signal.mask)
+
+
+def set_signal_val_binstr(handle, action, value):
+    signal = _signal(handle)
+    if len(value) != signal.width:
+        raise ValueError("Value of width {} assigned to {} of width {}".format(
+            len(value), signal.path, signal.width))
+    try:
+        _kernel.set_value(signal, action, int(value, 2))
+    except ValueError:
+        # Bits other than 0 and 1 read back as 0
+        bits = "".join(b if b in "01" else "0" for b in value)
+        _kernel.set_value(signal, action, int(bits, 2), value)
+
+
+def set_signal_val_real(handle, action, value):
+    _kernel.set_value(_signal(handle), action, float(value))
+
+
+def set_signal_val_str(handle, action, value):
+    _kernel.set_value(_signal(handle), action, str(value))
+
+
+def get_sim_time():
+    return _kernel.time >> 32, _kernel.time & 0xFFFFFFFF
+
+
+def get_precision():
+    return _PRECISION
+
+
+def set_batch_callback(single, many):
+    if not callable(single) or not callable(many):
+        raise TypeError("set_batch_callback requires two callables")
+    _kernel.batch_single = single
+    _kernel.batch_many = many
+
+
+def register_timed_callback(time, function, *args):
+    if time < 0:
+        raise ValueError("Timer value must be a positive integer")
+    cb = _kernel.new_callback(function, args)
+    _kernel.schedule_event(_kernel.time + time, cb)
+    return cb.handle
+
+
+def register_readonly_callback(function, *args):
+    cb = _kernel.new_callback(function, args)
+    _kernel.readonly.append(cb)
+    return cb.handle
+
+
+def register_rwsynch_callback(function, *args):
+    cb = _kernel.new_callback(function, args)
+    if _kernel._in_readonly:
+        # Too late for this time step, as in a real simulator
+        _kernel.nexttime.append(cb)
+    else:
+        _kernel.readwrite.append(cb)
+    return cb.handle
+
+
+def register_nextstep_callback(function, *args):
+    cb = _kernel.new_callback(function, args)
+    _kernel.nexttime.append(cb)
+    return cb.handle
+
+
+def _register_value_change_callback(signal, function, edge, args, persistent):
+    signal = _signal(signal)
+    cb = _kernel.new_callback(function, args, persistent=persistent, edge=edge, signal=signal)
+    signal._callbacks[cb.handle] = cb
+    return cb.handle
+
+
+def register_value_change_callback(signal, function, edge, *args):
+    return _register_value_change_callback(signal, function, edge, args, False)
+
+
+def register_persistent_value_change_callback(signal, function, edge, *args):
+    return _register_value_change_callback(signal, function, edge, args, True)
+
+
+def deregister_callback(handle):
+    cb = _kernel.callbacks.get(handle)
+    if cb is not None:
+        _kernel.remove_callback(cb)
+
+
+def enable_callback(handle):
+    cb = _kernel.callbacks.get(handle)
+    if cb is None or not cb.persistent:
+        raise ValueError("Only a registered persistent callback can be enabled")
+    cb.enabled = True
+
+
+def disable_callback(handle):
+    cb = _kernel.callbacks.get(handle)
+    if cb is None or not cb.persistent:
+        raise ValueError("Only a registered persistent callback can be disabled")
+    cb.enabled = False
+
+
+def stop_simulator():
+    _kernel.stopped = True
+
+
+def get_gpi_stats():
+    return None
+
+
+def trace_on():
+    raise NotImplementedError("Tracing is not supported by this simulator")
+
+
+def trace_off():
+    raise NotImplementedError("Tracing is not supported by this simulator")
+
+
+def set_trace_depth(depth):
+    raise NotImplementedError("Tracing is not supported by this simulator")
+
+
+def _snapshot_signals():
+    """The signals whose values make up a snapshot of the design.
+
+    Signals driven by a :class:`Clock` are left out, as the clocks keep
+    running when a snapshot is restored, like those driven by a testbench.
+    """
+    objects = list(_kernel.objects.values())
+    clocks = set(process.signal for obj in objects if isinstance(obj, Module)
+                 for process in obj.processes if isinstance(process, Clock))
+    return [obj for obj in objects
+            if isinstance(obj, Signal) and not obj.const and obj not in clocks]
+
+
+def save_snapshot(filename):
+    state = {signal.path: (signal.value, signal.xz, signal.forced) for signal in _snapshot_signals()}
+    with open(filename, "wb") as f:
+        pickle.dump(state, f)
+
+
+def restore_snapshot(filename):
+    with open(filename, "rb") as f:
+        state = pickle.load(f)
+    for signal in _snapshot_signals():
+        value, xz, forced = state[signal.path]
+        signal.forced = forced
+        # Seen as a change, so the callbacks and processes sensitive to it run
+        _kernel.assign(signal, value, xz)
+
+
+def fork():
+    if not hasattr(os, "fork"):
+        raise NotImplementedError("The simulator can't be forked on this platform")
+    return os.fork()
+
+
+###############################################################################
+# Running cocotb
+###############################################################################
+
+def _load_design(spec):
+    import importlib
+    module_name, _, function_name = spec.partition(":")
+    module = importlib.import_module(module_name)
+    return getattr(module, function_name or "design")()
+
+
+def main(argv=None):
+    """Simulate a design with cocotb.
+
+    The test modules and test cases are selected by :envvar:`MODULE` and
+    :envvar:`TESTCASE`, as for other simulators.
+
+    Returns:
+        The exit status: 0 if the simulation ended normally.
+    """
+    import argparse
+
+    parser = argparse.ArgumentParser(description=main.__doc__.splitlines()[0])
+    parser.add_argument("--toplevel", default=os.getenv("TOPLEVEL"),
+                        help="the name of the top level module (default: $TOPLEVEL)")
+    parser.add_argument("--design", default=os.getenv("PYSIM_DESIGN"),
+                        help="the Python module defining the design, as MODULE or MODULE:FUNCTION "
+                             "where FUNCTION returns the top level Module "
+                             "(default: $PYSIM_DESIGN, or the toplevel name, and FUNCTION 'design')")
+    parser.add_argument("--until", type=int, default=None,
+                        help="the time in picoseconds at which to stop the simulation")
+    parser.add_argument("plusargs", nargs="*", help="plusargs passed to cocotb")
+    args = parser.parse_args(argv)
+
+    design = args.design or args.toplevel
+    if design is None:
+        parser.error("no design given")
+    root = _load_design(design)
+    if args.toplevel is not None and root.name != args.toplevel:
+        parser.error("the design's top level is {}, not {}".format(root.name, args.toplevel))
+    elaborate(root)
+
+    os.environ["COCOTB_SIM"] = "1"
+    import cocotb
+
+    cocotb.argv = [sys.argv[0]] + args.plusargs
+    cocotb.argc = len(cocotb.argv)
+    cocotb.SIM_NAME = "pysim"
+    cocotb.SIM_VERSION = cocotb.__version__
+    cocotb.LANGUAGE = os.getenv("TOPLEVEL_LANG")
+
+    cocotb._initialise_testbench(root.name)
+    ok = run(args.until)
+
+    if not _kernel.stopped:
+        # 2 is SIM_FAIL, as sent by the GPI when the simulator ends early
+        cocotb._sim_event(2, "Simulator shutdown prematurely")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    # Run the copy of this module that cocotb will import, rather than this
+    # one which is called __main__
+    import simulator
+    sys.exit(simulator.main())
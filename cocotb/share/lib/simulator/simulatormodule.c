@@ -49,6 +49,7 @@ struct module_state {
 #define GETSTATE(m) ((struct module_state*)PyModule_GetState(m))
 
 typedef int (*gpi_function_t)(const void *);
+typedef int (*gpi_batch_function_t)(const void **, size_t);
 
 PyGILState_STATE TAKE_GIL(void)
 {
@@ -70,10 +71,87 @@ struct sim_time {
 
 static struct sim_time cache_time;
 
+// While a callback is being handled, the module attribute sim_time holds the
+// cached time, so that Python can read it without a call into the GPI. It is
+// None at any other time.
+static PyObject *module_dict = NULL;
+static PyObject *sim_time_name = NULL;
+static PyObject *sim_time_value = NULL;
+static uint64_t sim_time_value_time;
+
+static void publish_sim_time(void)
+{
+    uint64_t now = ((uint64_t)cache_time.high << 32) | cache_time.low;
+
+    if (module_dict == NULL) {
+        return;
+    }
+
+    // Most callbacks happen at the same time as the previous one
+    if (sim_time_value == NULL || sim_time_value_time != now) {
+        PyObject *value = PyLong_FromUnsignedLongLong(now);
+        if (value == NULL) {
+            PyErr_Clear();
+            return;
+        }
+        Py_XDECREF(sim_time_value);
+        sim_time_value = value;
+        sim_time_value_time = now;
+    }
+
+    if (PyDict_SetItem(module_dict, sim_time_name, sim_time_value) < 0) {
+        PyErr_Clear();
+    }
+}
+
+static void unpublish_sim_time(void)
+{
+    if (module_dict != NULL && PyDict_SetItem(module_dict, sim_time_name, Py_None) < 0) {
+        PyErr_Clear();
+    }
+}
+
+// Callbacks whose function is batch_single are delivered together, as one
+// call to batch_many with a list of their first arguments
+static PyObject *batch_single = NULL;
+static PyObject *batch_many = NULL;
+
+// Time spent calling into Python, reported alongside the GPI statistics
+static int stats_enabled = 0;
+
+enum python_stat_id {
+    PYTHON_STAT_CALLBACK = 0,
+    PYTHON_STAT_BATCH,
+    PYTHON_STAT_COUNT
+};
+
+static gpi_stat_t python_stats[PYTHON_STAT_COUNT] = {
+    {"python:callback", 0, 0, 0},
+    {"python:batch", 0, 0, 0},
+};
+
+// Handles are passed in as the same Python int object on every call for as
+// long as their SimHandle exists, so the conversion to a pointer is cached on
+// the identity of that object. The cache holds a reference to each object in
+// it so an address can't be reused by a different int while it is cached.
+#define HANDLE_CACHE_SIZE 256
+
+static struct {
+    PyObject *obj;
+    void *ptr;
+} handle_cache[HANDLE_CACHE_SIZE];
+
 // Converter function for turning a Python long into a sim handle, such that it
 // can be used by PyArg_ParseTuple format O&.
 static int gpi_sim_hdl_converter(PyObject *o, gpi_sim_hdl *data)
 {
+    // Objects are at least 16 byte aligned, so the low bits carry no information
+    size_t slot = ((size_t)(uintptr_t)o >> 4) % HANDLE_CACHE_SIZE;
+    if (handle_cache[slot].obj == o) {
+        *data = (gpi_sim_hdl)handle_cache[slot].ptr;
+        return 1;
+    }
+
     void *p = PyLong_AsVoidPtr(o);
     if ((p == NULL) && PyErr_Occurred()) {
         return 0;
@@ -82,6 +160,13 @@ static int gpi_sim_hdl_converter(PyObject *o, gpi_sim_hdl *data)
         PyErr_SetString(PyExc_ValueError, "handle cannot be 0");
         return 0;
     }
+
+    PyObject *evicted = handle_cache[slot].obj;
+    Py_INCREF(o);
+    handle_cache[slot].obj = o;
+    handle_cache[slot].ptr = p;
+    Py_XDECREF(evicted);
+
     *data = (gpi_sim_hdl)p;
     return 1;
 }
@@ -101,6 +186,96 @@ static int gpi_iterator_hdl_converter(PyObject *o, gpi_iterator_hdl *data)
     return 1;
 }
 
+// Argument parsing for the METH_FASTCALL functions, equivalent to the
+// PyArg_ParseTuple format codes named alongside each function
+static int check_nargs(const char *name, Py_ssize_t nargs, Py_ssize_t expected)
+{
+    if (nargs != expected) {
+        PyErr_Format(PyExc_TypeError, "%s() takes %zd positional arguments but %zd were given",
+                     name, expected, nargs);
+        return 0;
+    }
+    return 1;
+}
+
+// Format i
+static int int_converter(PyObject *o, int *data)
+{
+    long value = PyLong_AsLong(o);
+    if (value == -1 && PyErr_Occurred()) {
+        return 0;
+    }
+    if (value < INT_MIN || value > INT_MAX) {
+        PyErr_SetString(PyExc_OverflowError, "value does not fit in a C int");
+        return 0;
+    }
+    *data = (int)value;
+    return 1;
+}
+
+// Format l
+static int long_converter(PyObject *o, long *data)
+{
+    long value = PyLong_AsLong(o);
+    if (value == -1 && PyErr_Occurred()) {
+        return 0;
+    }
+    *data = value;
+    return 1;
+}
+
+// Format d
+static int double_converter(PyObject *o, double *data)
+{
+    double value = PyFloat_AsDouble(o);
+    if (value == -1.0 && PyErr_Occurred()) {
+        return 0;
+    }
+    *data = value;
+    return 1;
+}
+
+// Format s
+static int string_converter(PyObject *o, const char **data)
+{
+    Py_ssize_t size;
+    const char *str;
+
+    if (!PyUnicode_Check(o)) {
+        PyErr_Format(PyExc_TypeError, "expected str, not %.50s", Py_TYPE(o)->tp_name);
+        return 0;
+    }
+    str = PyUnicode_AsUTF8AndSize(o, &size);
+    if (str == NULL) {
+        return 0;
+    }
+    if ((size_t)size != strlen(str)) {
+        PyErr_SetString(PyExc_ValueError, "embedded null character");
+        return 0;
+    }
+    *data = str;
+    return 1;
+}
+
+// Format O&i, for the set_signal_val_* functions
+static int set_signal_val_converter(const char *name, PyObject *const *args, Py_ssize_t nargs,
+                                    gpi_sim_hdl *hdl, gpi_set_action_t *action)
+{
+    int action_value;
+
+    if (!check_nargs(name, nargs, 3)) {
+        return 0;
+    }
+    if (!gpi_sim_hdl_converter(args[0], hdl)) {
+        return 0;
+    }
+    if (!int_converter(args[1], &action_value)) {
+        return 0;
+    }
+    *action = (gpi_set_action_t)action_value;
+    return 1;
+}
+
 /**
  * @name    Callback Handling
  * @brief   Handle a callback coming from GPI
@@ -137,7 +312,11 @@ int handle_gpi_callback(void *user_data)
         ret = 1;
         goto err;
     }
-    callback_data_p->id_value = COCOTB_INACTIVE_ID;
+
+    // Persistent callbacks stay active until they are de-registered
+    if (!callback_data_p->persistent) {
+        callback_data_p->id_value = COCOTB_INACTIVE_ID;
+    }
 
     /* Cache the sim time */
     gpi_get_sim_time(&cache_time.high, &cache_time.low);
@@ -147,6 +326,8 @@ int handle_gpi_callback(void *user_data)
 
     // Python allowed
 
+    publish_sim_time();
+
     if (!PyCallable_Check(callback_data_p->function)) {
         fprintf(stderr, "Callback fired but function isn't callable?!\n");
         ret = 1;
@@ -154,7 +335,13 @@ int handle_gpi_callback(void *user_data)
     }
 
     // Call the callback
+    uint64_t start_ns = stats_enabled ? gpi_get_stats_time_ns() : 0;
+    callback_data_p->in_call = 1;
     PyObject *pValue = PyObject_Call(callback_data_p->function, callback_data_p->args, callback_data_p->kwargs);
+    callback_data_p->in_call = 0;
+    if (stats_enabled) {
+        gpi_add_stat(&python_stats[PYTHON_STAT_CALLBACK], gpi_get_stats_time_ns() - start_ns);
+    }
 
     // If the return value is NULL a Python exception has occurred
     // The best thing to do here is shutdown as any subsequent
@@ -188,6 +375,7 @@ int handle_gpi_callback(void *user_data)
     }
 
 out:
+    unpublish_sim_time();
     DROP_GIL(gstate);
 
 err:
@@ -202,6 +390,184 @@ err:
     return ret;
 }
 
+/**
+ * @name    Batched Callback Handling
+ * @brief   Handle a batch of callbacks queued by GPI
+ * @ingroup python_c_api
+ *
+ * Makes one call to TAKE_GIL and one call to DROP_GIL for the whole batch.
+ *
+ * Callbacks registered with the function set by set_batch_callback (usually
+ * cocotb.scheduler.react) and a single argument are passed to the batch
+ * function (usually cocotb.scheduler.react_many) as one list. Any others are
+ * handed to handle_gpi_callback one by one afterwards.
+ */
+int handle_gpi_callback_batch(void **user_data, size_t count)
+{
+    int ret = 0;
+    size_t i;
+    size_t n_batched = 0;
+    size_t n_other = 0;
+    p_callback_data *batched;
+    p_callback_data *other;
+
+    batched = (p_callback_data *)malloc(2 * count * sizeof(p_callback_data));
+    if (batched == NULL) {
+        fprintf(stderr, "Failed to allocate a callback batch\n");
+        return 1;
+    }
+    other = batched + count;
+
+    to_python();
+
+    /* Cache the sim time */
+    gpi_get_sim_time(&cache_time.high, &cache_time.low);
+
+    PyGILState_STATE gstate;
+    gstate = TAKE_GIL();
+
+    // Python allowed
+
+    publish_sim_time();
+
+    for (i = 0; i < count; i++) {
+        p_callback_data callback_data_p = (p_callback_data)user_data[i];
+        int matches = 0;
+
+        if (callback_data_p->id_value != COCOTB_ACTIVE_ID) {
+            fprintf(stderr, "Userdata corrupted!\n");
+            ret = 1;
+            continue;
+        }
+
+        if (batch_single != NULL && PyTuple_GET_SIZE(callback_data_p->args) == 1) {
+            matches = PyObject_RichCompareBool(callback_data_p->function, batch_single, Py_EQ);
+            if (matches < 0) {
+                PyErr_Print();
+                matches = 0;
+            }
+        }
+
+        if (matches) {
+            batched[n_batched++] = callback_data_p;
+        } else {
+            other[n_other++] = callback_data_p;
+        }
+    }
+
+    if (n_batched) {
+        PyObject *triggers = PyList_New((Py_ssize_t)n_batched);
+        if (triggers == NULL) {
+            PyErr_Print();
+            gpi_sim_end();
+            sim_ending = 1;
+            goto out;
+        }
+
+        for (i = 0; i < n_batched; i++) {
+            PyObject *trigger = PyTuple_GET_ITEM(batched[i]->args, 0);
+            Py_INCREF(trigger);
+            PyList_SET_ITEM(triggers, (Py_ssize_t)i, trigger);
+
+            // Persistent callbacks stay active until they are de-registered
+            if (!batched[i]->persistent) {
+                batched[i]->id_value = COCOTB_INACTIVE_ID;
+            }
+            batched[i]->in_call = 1;
+        }
+
+        uint64_t start_ns = stats_enabled ? gpi_get_stats_time_ns() : 0;
+        PyObject *pValue = PyObject_CallFunctionObjArgs(batch_many, triggers, NULL);
+        if (stats_enabled) {
+            gpi_add_stat(&python_stats[PYTHON_STAT_BATCH], gpi_get_stats_time_ns() - start_ns);
+        }
+        Py_DECREF(triggers);
+
+        for (i = 0; i < n_batched; i++) {
+            batched[i]->in_call = 0;
+        }
+
+        // As in handle_gpi_callback, an exception leaves Python in an
+        // unknown state so we shut down
+        if (pValue == NULL) {
+            fprintf(stderr, "ERROR: called batch callback function returned NULL\n");
+            if (PyErr_Occurred()) {
+                fprintf(stderr, "Failed to execute callback due to Python exception\n");
+                PyErr_Print();
+            } else {
+                fprintf(stderr, "Failed to execute callback\n");
+            }
+
+            gpi_sim_end();
+            sim_ending = 1;
+            goto out;
+        }
+
+        Py_DECREF(pValue);
+
+        for (i = 0; i < n_batched; i++) {
+            if (batched[i]->id_value == COCOTB_INACTIVE_ID) {
+                Py_DECREF(batched[i]->function);
+                Py_DECREF(batched[i]->args);
+
+                // Free the callback data
+                free(batched[i]);
+            }
+        }
+    }
+
+out:
+    unpublish_sim_time();
+    DROP_GIL(gstate);
+
+    to_simulator();
+
+    if (sim_ending) {
+        free(batched);
+        // This is the last callback of a successful run,
+        // so call the cleanup function as we'll never return
+        // to Python
+        gpi_cleanup();
+        return ret;
+    }
+
+    // handle_gpi_callback does its own cleanup if the simulation ends
+    for (i = 0; i < n_other && !sim_ending; i++) {
+        ret |= handle_gpi_callback(other[i]);
+    }
+
+    free(batched);
+    return ret;
+}
+
+static PyObject *set_batch_callback(PyObject *self, PyObject *args)
+{
+    COCOTB_UNUSED(self);
+    PyObject *single;
+    PyObject *many;
+
+    if (!PyArg_ParseTuple(args, "OO", &single, &many)) {
+        return NULL;
+    }
+
+    if (!PyCallable_Check(single) || !PyCallable_Check(many)) {
+        PyErr_SetString(PyExc_TypeError, "set_batch_callback requires two callables");
+        return NULL;
+    }
+
+    Py_INCREF(single);
+    Py_INCREF(many);
+    Py_XDECREF(batch_single);
+    Py_XDECREF(batch_many);
+    batch_single = single;
+    batch_many = many;
+
+    gpi_register_batch_handler((gpi_function_t)handle_gpi_callback,
+                               (gpi_batch_function_t)handle_gpi_callback_batch);
+
+    Py_RETURN_NONE;
+}
+
 static PyObject *log_msg(PyObject *self, PyObject *args)
 {
     COCOTB_UNUSED(self);
@@ -266,6 +632,8 @@ static PyObject *register_readonly_callback(PyObject *self, PyObject *args)
     callback_data_p->function = function;
     callback_data_p->args = fArgs;
     callback_data_p->kwargs = NULL;
+    callback_data_p->persistent = 0;
+    callback_data_p->in_call = 0;
 
     hdl = gpi_register_readonly_callback((gpi_function_t)handle_gpi_callback, callback_data_p);
 
@@ -319,6 +687,8 @@ static PyObject *register_rwsynch_callback(PyObject *self, PyObject *args)
     callback_data_p->function = function;
     callback_data_p->args = fArgs;
     callback_data_p->kwargs = NULL;
+    callback_data_p->persistent = 0;
+    callback_data_p->in_call = 0;
 
     hdl = gpi_register_readwrite_callback((gpi_function_t)handle_gpi_callback, callback_data_p);
 
@@ -372,6 +742,8 @@ static PyObject *register_nextstep_callback(PyObject *self, PyObject *args)
     callback_data_p->function = function;
     callback_data_p->args = fArgs;
     callback_data_p->kwargs = NULL;
+    callback_data_p->persistent = 0;
+    callback_data_p->in_call = 0;
 
     hdl = gpi_register_nexttime_callback((gpi_function_t)handle_gpi_callback, callback_data_p);
 
@@ -443,6 +815,8 @@ static PyObject *register_timed_callback(PyObject *self, PyObject *args)
     callback_data_p->function = function;
     callback_data_p->args = fArgs;
     callback_data_p->kwargs = NULL;
+    callback_data_p->persistent = 0;
+    callback_data_p->in_call = 0;
 
     hdl = gpi_register_timed_callback((gpi_function_t)handle_gpi_callback, callback_data_p, time_ps);
 
@@ -457,12 +831,11 @@ static PyObject *register_timed_callback(PyObject *self, PyObject *args)
 // Register signal change callback
 // First argument should be the signal handle
 // Second argument is the function to call
+// Third argument is the edge to react to
 // Remaining arguments and keyword arguments are to be passed to the callback
-static PyObject *register_value_change_callback(PyObject *self, PyObject *args) //, PyObject *keywds)
+static PyObject *register_value_change_callback_common(PyObject *const *args, Py_ssize_t nargs,
+                                                        int persistent)
 {
-    COCOTB_UNUSED(self);
-    FENTER
-
     PyObject *fArgs;
     PyObject *function;
     gpi_sim_hdl sig_hdl;
@@ -471,40 +844,42 @@ static PyObject *register_value_change_callback(PyObject *self, PyObject *args)
 
     p_callback_data callback_data_p;
 
-    Py_ssize_t numargs = PyTuple_Size(args);
-
-    if (numargs < 3) {
+    if (nargs < 3) {
         PyErr_SetString(PyExc_TypeError, "Attempt to register value change callback without enough arguments!\n");
         return NULL;
     }
 
-    PyObject *pSihHdl = PyTuple_GetItem(args, 0);
-    if (!gpi_sim_hdl_converter(pSihHdl, &sig_hdl)) {
+    if (!gpi_sim_hdl_converter(args[0], &sig_hdl)) {
         return NULL;
     }
 
     // Extract the callback function
-    function = PyTuple_GetItem(args, 1);
+    function = args[1];
     if (!PyCallable_Check(function)) {
         PyErr_SetString(PyExc_TypeError, "Attempt to register value change callback without passing a callable callback!\n");
         return NULL;
     }
-    Py_INCREF(function);
 
-    PyObject *pedge = PyTuple_GetItem(args, 2);
-    edge = (int)PyLong_AsLong(pedge);
+    if (!int_converter(args[2], &edge)) {
+        return NULL;
+    }
 
     // Remaining args for function
-    fArgs = PyTuple_GetSlice(args, 3, numargs);   // New reference
+    fArgs = PyTuple_New(nargs - 3);   // New reference
     if (fArgs == NULL) {
         return NULL;
     }
-
+    for (Py_ssize_t i = 3; i < nargs; i++) {
+        Py_INCREF(args[i]);
+        PyTuple_SET_ITEM(fArgs, i - 3, args[i]);
+    }
 
     callback_data_p = (p_callback_data)malloc(sizeof(s_callback_data));
     if (callback_data_p == NULL) {
+        Py_DECREF(fArgs);
         return PyErr_NoMemory();
     }
+    Py_INCREF(function);
 
     // Set up the user data (no more Python API calls after this!)
     // Causes segfault?
@@ -513,18 +888,62 @@ static PyObject *register_value_change_callback(PyObject *self, PyObject *args)
     callback_data_p->function = function;
     callback_data_p->args = fArgs;
     callback_data_p->kwargs = NULL;
+    callback_data_p->persistent = persistent;
+    callback_data_p->in_call = 0;
+
+    if (persistent) {
+        hdl = gpi_register_persistent_value_change_callback((gpi_function_t)handle_gpi_callback,
+                                                            callback_data_p,
+                                                            sig_hdl,
+                                                            edge);
+    } else {
+        hdl = gpi_register_value_change_callback((gpi_function_t)handle_gpi_callback,
+                                                 callback_data_p,
+                                                 sig_hdl,
+                                                 edge);
+    }
 
-    hdl = gpi_register_value_change_callback((gpi_function_t)handle_gpi_callback,
-                                             callback_data_p,
-                                             sig_hdl,
-                                             edge);
+    // A persistent callback is only freed on de-registration, which can't
+    // happen without a handle
+    if (hdl == NULL && persistent) {
+        Py_DECREF(callback_data_p->function);
+        Py_DECREF(callback_data_p->args);
+        free(callback_data_p);
+    }
 
     // Check success
-    PyObject *rv = PyLong_FromVoidPtr(hdl);
+    return PyLong_FromVoidPtr(hdl);
+}
+
+
+static PyObject *register_value_change_callback(PyObject *self, PyObject *const *args, Py_ssize_t nargs)
+{
+    COCOTB_UNUSED(self);
+    FENTER
+
+    PyObject *rv = register_value_change_callback_common(args, nargs, 0);
     FEXIT
 
     return rv;
 }
+FASTCALL_WRAPPER(register_value_change_callback)
+
+
+// Same arguments as register_value_change_callback, but the callback stays
+// registered with the simulator after it fires. Delivery is controlled with
+// enable_callback and disable_callback and it is only freed by
+// deregister_callback.
+static PyObject *register_persistent_value_change_callback(PyObject *self, PyObject *const *args, Py_ssize_t nargs)
+{
+    COCOTB_UNUSED(self);
+    FENTER
+
+    PyObject *rv = register_value_change_callback_common(args, nargs, 1);
+    FEXIT
+
+    return rv;
+}
+FASTCALL_WRAPPER(register_persistent_value_change_callback)
 
 
 static PyObject *iterate(PyObject *self, PyObject *args)
@@ -579,14 +998,14 @@ static PyObject *next(PyObject *self, PyObject *args)
 }
 
 
-static PyObject *get_signal_val_binstr(PyObject *self, PyObject *args)
+static PyObject *get_signal_val_binstr(PyObject *self, PyObject *const *args, Py_ssize_t nargs)
 {
     COCOTB_UNUSED(self);
     gpi_sim_hdl hdl;
     const char *result;
     PyObject *retstr;
 
-    if (!PyArg_ParseTuple(args, "O&", gpi_sim_hdl_converter, &hdl)) {
+    if (!check_nargs("get_signal_val_binstr", nargs, 1) || !gpi_sim_hdl_converter(args[0], &hdl)) {
         return NULL;
     }
 
@@ -595,15 +1014,16 @@ static PyObject *get_signal_val_binstr(PyObject *self, PyObject *args)
 
     return retstr;
 }
+FASTCALL_WRAPPER(get_signal_val_binstr)
 
-static PyObject *get_signal_val_str(PyObject *self, PyObject *args)
+static PyObject *get_signal_val_str(PyObject *self, PyObject *const *args, Py_ssize_t nargs)
 {
     COCOTB_UNUSED(self);
     gpi_sim_hdl hdl;
     const char *result;
     PyObject *retstr;
 
-    if (!PyArg_ParseTuple(args, "O&", gpi_sim_hdl_converter, &hdl)) {
+    if (!check_nargs("get_signal_val_str", nargs, 1) || !gpi_sim_hdl_converter(args[0], &hdl)) {
         return NULL;
     }
 
@@ -612,15 +1032,16 @@ static PyObject *get_signal_val_str(PyObject *self, PyObject *args)
 
     return retstr;
 }
+FASTCALL_WRAPPER(get_signal_val_str)
 
-static PyObject *get_signal_val_real(PyObject *self, PyObject *args)
+static PyObject *get_signal_val_real(PyObject *self, PyObject *const *args, Py_ssize_t nargs)
 {
     COCOTB_UNUSED(self);
     gpi_sim_hdl hdl;
     double result;
     PyObject *retval;
 
-    if (!PyArg_ParseTuple(args, "O&", gpi_sim_hdl_converter, &hdl)) {
+    if (!check_nargs("get_signal_val_real", nargs, 1) || !gpi_sim_hdl_converter(args[0], &hdl)) {
         return NULL;
     }
 
@@ -629,16 +1050,17 @@ static PyObject *get_signal_val_real(PyObject *self, PyObject *args)
 
     return retval;
 }
+FASTCALL_WRAPPER(get_signal_val_real)
 
 
-static PyObject *get_signal_val_long(PyObject *self, PyObject *args)
+static PyObject *get_signal_val_long(PyObject *self, PyObject *const *args, Py_ssize_t nargs)
 {
     COCOTB_UNUSED(self);
     gpi_sim_hdl hdl;
     long result;
     PyObject *retval;
 
-    if (!PyArg_ParseTuple(args, "O&", gpi_sim_hdl_converter, &hdl)) {
+    if (!check_nargs("get_signal_val_long", nargs, 1) || !gpi_sim_hdl_converter(args[0], &hdl)) {
         return NULL;
     }
 
@@ -647,66 +1069,75 @@ static PyObject *get_signal_val_long(PyObject *self, PyObject *args)
 
     return retval;
 }
+FASTCALL_WRAPPER(get_signal_val_long)
 
-static PyObject *set_signal_val_binstr(PyObject *self, PyObject *args)
+static PyObject *set_signal_val_binstr(PyObject *self, PyObject *const *args, Py_ssize_t nargs)
 {
     COCOTB_UNUSED(self);
     gpi_sim_hdl hdl;
     const char *binstr;
     gpi_set_action_t action;
 
-    if (!PyArg_ParseTuple(args, "O&is", gpi_sim_hdl_converter, &hdl, &action, &binstr)) {
+    if (!set_signal_val_converter("set_signal_val_binstr", args, nargs, &hdl, &action) ||
+            !string_converter(args[2], &binstr)) {
         return NULL;
     }
 
     gpi_set_signal_value_binstr(hdl, binstr, action);
     Py_RETURN_NONE;
 }
+FASTCALL_WRAPPER(set_signal_val_binstr)
 
-static PyObject *set_signal_val_str(PyObject *self, PyObject *args)
+static PyObject *set_signal_val_str(PyObject *self, PyObject *const *args, Py_ssize_t nargs)
 {
     COCOTB_UNUSED(self);
     gpi_sim_hdl hdl;
     gpi_set_action_t action;
     const char *str;
 
-    if (!PyArg_ParseTuple(args, "O&is", gpi_sim_hdl_converter, &hdl, &action, &str)) {
+    if (!set_signal_val_converter("set_signal_val_str", args, nargs, &hdl, &action) ||
+            !string_converter(args[2], &str)) {
         return NULL;
     }
 
     gpi_set_signal_value_str(hdl, str, action);
     Py_RETURN_NONE;
 }
+FASTCALL_WRAPPER(set_signal_val_str)
 
-static PyObject *set_signal_val_real(PyObject *self, PyObject *args)
+static PyObject *set_signal_val_real(PyObject *self, PyObject *const *args, Py_ssize_t nargs)
 {
     COCOTB_UNUSED(self);
     gpi_sim_hdl hdl;
     double value;
     gpi_set_action_t action;
 
-    if (!PyArg_ParseTuple(args, "O&id", gpi_sim_hdl_converter, &hdl, &action, &value)) {
+    if (!set_signal_val_converter("set_signal_val_real", args, nargs, &hdl, &action) ||
+            !double_converter(args[2], &value)) {
         return NULL;
     }
 
     gpi_set_signal_value_real(hdl, value, action);
     Py_RETURN_NONE;
 }
+FASTCALL_WRAPPER(set_signal_val_real)
 
-static PyObject *set_signal_val_long(PyObject *self, PyObject *args)
+static PyObject *set_signal_val_long(PyObject *self, PyObject *const *args, Py_ssize_t nargs)
 {
     COCOTB_UNUSED(self);
     gpi_sim_hdl hdl;
     long value;
     gpi_set_action_t action;
 
-    if (!PyArg_ParseTuple(args, "O&il", gpi_sim_hdl_converter, &hdl, &action, &value)) {
+    if (!set_signal_val_converter("set_signal_val_long", args, nargs, &hdl, &action) ||
+            !long_converter(args[2], &value)) {
         return NULL;
     }
 
     gpi_set_signal_value_long(hdl, value, action);
     Py_RETURN_NONE;
 }
+FASTCALL_WRAPPER(set_signal_val_long)
 
 static PyObject *get_definition_name(PyObject *self, PyObject *args)
 {
@@ -956,22 +1387,217 @@ static PyObject *stop_simulator(PyObject *self, PyObject *args)
 }
 
 
-static PyObject *deregister_callback(PyObject *self, PyObject *args)
+static PyObject *deregister_callback(PyObject *self, PyObject *const *args, Py_ssize_t nargs)
 {
     COCOTB_UNUSED(self);
     gpi_sim_hdl hdl;
 
     FENTER
 
-    if (!PyArg_ParseTuple(args, "O&", gpi_sim_hdl_converter, &hdl)) {
+    if (!check_nargs("deregister_callback", nargs, 1) || !gpi_sim_hdl_converter(args[0], &hdl)) {
         return NULL;
     }
 
+    // Fetch the user data before the GPI handle is released
+    p_callback_data callback_data_p = (p_callback_data)gpi_get_callback_data(hdl);
+
     gpi_deregister_callback(hdl);
 
+    // A persistent callback never goes inactive by firing, so it is released
+    // here, or by handle_gpi_callback if we are being called from it
+    if (callback_data_p != NULL && callback_data_p->id_value == COCOTB_ACTIVE_ID &&
+            callback_data_p->persistent) {
+        callback_data_p->id_value = COCOTB_INACTIVE_ID;
+        if (!callback_data_p->in_call) {
+            Py_DECREF(callback_data_p->function);
+            Py_DECREF(callback_data_p->args);
+            free(callback_data_p);
+        }
+    }
+
     FEXIT
     Py_RETURN_NONE;
 }
+FASTCALL_WRAPPER(deregister_callback)
+
+static PyObject *set_callback_enabled(const char *name, PyObject *const *args, Py_ssize_t nargs,
+                                      int enabled)
+{
+    gpi_sim_hdl hdl;
+
+    if (!check_nargs(name, nargs, 1) || !gpi_sim_hdl_converter(args[0], &hdl)) {
+        return NULL;
+    }
+
+    gpi_set_callback_enabled(hdl, enabled);
+
+    Py_RETURN_NONE;
+}
+
+static PyObject *enable_callback(PyObject *self, PyObject *const *args, Py_ssize_t nargs)
+{
+    COCOTB_UNUSED(self);
+    return set_callback_enabled("enable_callback", args, nargs, 1);
+}
+FASTCALL_WRAPPER(enable_callback)
+
+static PyObject *disable_callback(PyObject *self, PyObject *const *args, Py_ssize_t nargs)
+{
+    COCOTB_UNUSED(self);
+    return set_callback_enabled("disable_callback", args, nargs, 0);
+}
+FASTCALL_WRAPPER(disable_callback)
+
+// Returns None unless COCOTB_GPI_STATS is set, otherwise a dictionary of the
+// call statistics collected so far, keyed on the GPI entry point, callback
+// reason or Python call they count
+static PyObject *get_gpi_stats(PyObject *self, PyObject *args)
+{
+    COCOTB_UNUSED(self);
+    COCOTB_UNUSED(args);
+    const gpi_stat_t *gpi_stats = NULL;
+    size_t n_gpi_stats = gpi_get_stats(&gpi_stats);
+
+    if (!n_gpi_stats) {
+        Py_RETURN_NONE;
+    }
+
+    PyObject *stats = PyDict_New();
+    if (stats == NULL) {
+        return NULL;
+    }
+
+    for (size_t i = 0; i < n_gpi_stats + PYTHON_STAT_COUNT; i++) {
+        const gpi_stat_t *stat = i < n_gpi_stats ? &gpi_stats[i] : &python_stats[i - n_gpi_stats];
+        PyObject *entry = Py_BuildValue("{s:K,s:K,s:K}",
+                                        "calls", (unsigned long long)stat->calls,
+                                        "total_ns", (unsigned long long)stat->total_ns,
+                                        "max_ns", (unsigned long long)stat->max_ns);
+        if (entry == NULL || PyDict_SetItemString(stats, stat->name, entry) < 0) {
+            Py_XDECREF(entry);
+            Py_DECREF(stats);
+            return NULL;
+        }
+        Py_DECREF(entry);
+    }
+
+    return stats;
+}
+
+// Turns the return code of a trace control function into a result
+static PyObject *trace_result(int rc, const char *action)
+{
+    if (!gpi_has_trace_control()) {
+        PyErr_SetString(PyExc_NotImplementedError, "Tracing can't be controlled on this simulator");
+        return NULL;
+    }
+    if (rc != 0) {
+        PyErr_Format(PyExc_RuntimeError, "Failed to %s", action);
+        return NULL;
+    }
+    Py_RETURN_NONE;
+}
+
+static PyObject *trace_on(PyObject *self, PyObject *args)
+{
+    COCOTB_UNUSED(self);
+    COCOTB_UNUSED(args);
+
+    return trace_result(gpi_trace_on(), "turn tracing on");
+}
+
+static PyObject *trace_off(PyObject *self, PyObject *args)
+{
+    COCOTB_UNUSED(self);
+    COCOTB_UNUSED(args);
+
+    return trace_result(gpi_trace_off(), "turn tracing off");
+}
+
+static PyObject *set_trace_depth(PyObject *self, PyObject *args)
+{
+    COCOTB_UNUSED(self);
+    int levels;
+
+    if (!PyArg_ParseTuple(args, "i", &levels)) {
+        return NULL;
+    }
+
+    return trace_result(gpi_set_trace_depth(levels), "set the trace depth");
+}
+
+// Turns the return code of a snapshot control function into a result
+static PyObject *snapshot_result(int rc, const char *action, const char *filename)
+{
+    if (!gpi_has_snapshot_control()) {
+        PyErr_SetString(PyExc_NotImplementedError, "Snapshots are not supported on this simulator");
+        return NULL;
+    }
+    if (rc != 0) {
+        PyErr_Format(PyExc_RuntimeError, "Failed to %s %s", action, filename);
+        return NULL;
+    }
+    Py_RETURN_NONE;
+}
+
+static PyObject *save_snapshot(PyObject *self, PyObject *args)
+{
+    COCOTB_UNUSED(self);
+    const char *filename;
+
+    if (!PyArg_ParseTuple(args, "s", &filename)) {
+        return NULL;
+    }
+
+    return snapshot_result(gpi_save_snapshot(filename), "save a snapshot to", filename);
+}
+
+static PyObject *restore_snapshot(PyObject *self, PyObject *args)
+{
+    COCOTB_UNUSED(self);
+    const char *filename;
+
+    if (!PyArg_ParseTuple(args, "s", &filename)) {
+        return NULL;
+    }
+
+    return snapshot_result(gpi_restore_snapshot(filename), "restore a snapshot from", filename);
+}
+
+static PyObject *fork_simulator(PyObject *self, PyObject *args)
+{
+    COCOTB_UNUSED(self);
+    COCOTB_UNUSED(args);
+
+    if (!gpi_has_fork_control()) {
+        PyErr_SetString(PyExc_NotImplementedError, "The simulator can't be forked");
+        return NULL;
+    }
+
+    // Lets the interpreter, and its at-fork hooks, prepare for the fork and
+    // recover from it, as os.fork() does
+#if PY_VERSION_HEX >= 0x03070000
+    PyOS_BeforeFork();
+#endif
+    int pid = gpi_fork();
+#if PY_VERSION_HEX >= 0x03070000
+    if (pid == 0) {
+        PyOS_AfterFork_Child();
+    } else {
+        PyOS_AfterFork_Parent();
+    }
+#else
+    if (pid == 0) {
+        PyOS_AfterFork();
+    }
+#endif
+
+    if (pid < 0) {
+        PyErr_SetString(PyExc_RuntimeError, "Failed to fork the simulator");
+        return NULL;
+    }
+    return PyLong_FromLong(pid);
+}
 
 static PyObject *log_level(PyObject *self, PyObject *args)
 {
@@ -1027,6 +1653,12 @@ static int simulator_traverse(PyObject *m, visitproc visit, void *arg) {
 
 static int simulator_clear(PyObject *m) {
     Py_CLEAR(GETSTATE(m)->error);
+    for (size_t i = 0; i < HANDLE_CACHE_SIZE; i++) {
+        Py_CLEAR(handle_cache[i].obj);
+    }
+    Py_CLEAR(module_dict);
+    Py_CLEAR(sim_time_name);
+    Py_CLEAR(sim_time_value);
     return 0;
 }
 
@@ -1059,5 +1691,23 @@ PyMODINIT_FUNC PyInit_simulator(void)
     }
 
     add_module_constants(simulator);
+
+    sim_time_name = PyUnicode_InternFromString("sim_time");
+    if (sim_time_name == NULL) {
+        Py_DECREF(simulator);
+        return NULL;
+    }
+    Py_INCREF(Py_None);
+    if (PyModule_AddObject(simulator, "sim_time", Py_None) < 0) {
+        Py_DECREF(Py_None);
+        Py_DECREF(simulator);
+        return NULL;
+    }
+    module_dict = PyModule_GetDict(simulator);
+    Py_INCREF(module_dict);
+
+    const gpi_stat_t *gpi_stats;
+    stats_enabled = gpi_get_stats(&gpi_stats) != 0;
+
     return simulator;
 }
@@ -49,21 +49,46 @@ typedef struct t_callback_data {
     PyObject *args;                     // The arguments to call the function with
     PyObject *kwargs;                   // Keyword arguments to call the function with
     gpi_sim_hdl cb_hdl;
+    int persistent;                     // Stays registered after firing, until de-registered
+    int in_call;                        // Set while the function is being called
 } s_callback_data, *p_callback_data;
 
+// The functions on the hot path between Python and the simulator take their
+// arguments as a C array (METH_FASTCALL), which saves building an argument
+// tuple for every call. METH_FASTCALL is only part of the public API from
+// Python 3.7, so older versions call them through a METH_VARARGS wrapper.
+#if PY_VERSION_HEX >= 0x03070000
+#define FASTCALL_DECLARE(name) \
+    static PyObject *name(PyObject *self, PyObject *const *args, Py_ssize_t nargs)
+#define FASTCALL_WRAPPER(name)
+#define FASTCALL_METHOD(name, doc) \
+    {#name, (PyCFunction)(void (*)(void))name, METH_FASTCALL, doc}
+#else
+#define FASTCALL_DECLARE(name) \
+    static PyObject *name(PyObject *self, PyObject *const *args, Py_ssize_t nargs); \
+    static PyObject *name##_varargs(PyObject *self, PyObject *args)
+#define FASTCALL_WRAPPER(name) \
+    static PyObject *name##_varargs(PyObject *self, PyObject *args) \
+    { \
+        return name(self, &PyTuple_GET_ITEM(args, 0), PyTuple_GET_SIZE(args)); \
+    }
+#define FASTCALL_METHOD(name, doc) \
+    {#name, name##_varargs, METH_VARARGS, doc}
+#endif
+
 static PyObject *error_out(PyObject *m, PyObject *args);
 static PyObject *log_msg(PyObject *self, PyObject *args);
 
 // Raise an exception on failure
 // Return None if for example get bin_string on enum?
-static PyObject *get_signal_val_long(PyObject *self, PyObject *args);
-static PyObject *get_signal_val_real(PyObject *self, PyObject *args);
-static PyObject *get_signal_val_str(PyObject *self, PyObject *args);
-static PyObject *get_signal_val_binstr(PyObject *self, PyObject *args);
-static PyObject *set_signal_val_long(PyObject *self, PyObject *args);
-static PyObject *set_signal_val_real(PyObject *self, PyObject *args);
-static PyObject *set_signal_val_str(PyObject *self, PyObject *args);
-static PyObject *set_signal_val_binstr(PyObject *self, PyObject *args);
+FASTCALL_DECLARE(get_signal_val_long);
+FASTCALL_DECLARE(get_signal_val_real);
+FASTCALL_DECLARE(get_signal_val_str);
+FASTCALL_DECLARE(get_signal_val_binstr);
+FASTCALL_DECLARE(set_signal_val_long);
+FASTCALL_DECLARE(set_signal_val_real);
+FASTCALL_DECLARE(set_signal_val_str);
+FASTCALL_DECLARE(set_signal_val_binstr);
 static PyObject *get_definition_name(PyObject *self, PyObject *args);
 static PyObject *get_definition_file(PyObject *self, PyObject *args);
 static PyObject *get_handle_by_name(PyObject *self, PyObject *args);
@@ -76,7 +101,8 @@ static PyObject *get_type_string(PyObject *self, PyObject *args);
 static PyObject *get_num_elems(PyObject *self, PyObject *args);
 static PyObject *get_range(PyObject *self, PyObject *args);
 static PyObject *register_timed_callback(PyObject *self, PyObject *args);
-static PyObject *register_value_change_callback(PyObject *self, PyObject *args);
+FASTCALL_DECLARE(register_value_change_callback);
+FASTCALL_DECLARE(register_persistent_value_change_callback);
 static PyObject *register_readonly_callback(PyObject *self, PyObject *args);
 static PyObject *register_nextstep_callback(PyObject *self, PyObject *args);
 static PyObject *register_rwsynch_callback(PyObject *self, PyObject *args);
@@ -87,20 +113,30 @@ static PyObject *next(PyObject *self, PyObject *args);
 
 static PyObject *get_sim_time(PyObject *self, PyObject *args);
 static PyObject *get_precision(PyObject *self, PyObject *args);
-static PyObject *deregister_callback(PyObject *self, PyObject *args);
+FASTCALL_DECLARE(deregister_callback);
+FASTCALL_DECLARE(enable_callback);
+FASTCALL_DECLARE(disable_callback);
 
 static PyObject *log_level(PyObject *self, PyObject *args);
+static PyObject *get_gpi_stats(PyObject *self, PyObject *args);
+static PyObject *trace_on(PyObject *self, PyObject *args);
+static PyObject *trace_off(PyObject *self, PyObject *args);
+static PyObject *set_trace_depth(PyObject *self, PyObject *args);
+static PyObject *save_snapshot(PyObject *self, PyObject *args);
+static PyObject *restore_snapshot(PyObject *self, PyObject *args);
+static PyObject *fork_simulator(PyObject *self, PyObject *args);
+static PyObject *set_batch_callback(PyObject *self, PyObject *args);
 
 static PyMethodDef SimulatorMethods[] = {
     {"log_msg", log_msg, METH_VARARGS, "Log a message"},
-    {"get_signal_val_long", get_signal_val_long, METH_VARARGS, "Get the value of a signal as a long"},
-    {"get_signal_val_str", get_signal_val_str, METH_VARARGS, "Get the value of a signal as an ASCII string"},
-    {"get_signal_val_binstr", get_signal_val_binstr, METH_VARARGS, "Get the value of a signal as a binary string"},
-    {"get_signal_val_real", get_signal_val_real, METH_VARARGS, "Get the value of a signal as a double precision float"},
-    {"set_signal_val_long", set_signal_val_long, METH_VARARGS, "Set the value of a signal using a long"},
-    {"set_signal_val_str", set_signal_val_str, METH_VARARGS, "Set the value of a signal using an NUL-terminated 8-bit string"},
-    {"set_signal_val_binstr", set_signal_val_binstr, METH_VARARGS, "Set the value of a signal using a string with a character per bit"},
-    {"set_signal_val_real", set_signal_val_real, METH_VARARGS, "Set the value of a signal using a double precision float"},
+    FASTCALL_METHOD(get_signal_val_long, "Get the value of a signal as a long"),
+    FASTCALL_METHOD(get_signal_val_str, "Get the value of a signal as an ASCII string"),
+    FASTCALL_METHOD(get_signal_val_binstr, "Get the value of a signal as a binary string"),
+    FASTCALL_METHOD(get_signal_val_real, "Get the value of a signal as a double precision float"),
+    FASTCALL_METHOD(set_signal_val_long, "Set the value of a signal using a long"),
+    FASTCALL_METHOD(set_signal_val_str, "Set the value of a signal using an NUL-terminated 8-bit string"),
+    FASTCALL_METHOD(set_signal_val_binstr, "Set the value of a signal using a string with a character per bit"),
+    FASTCALL_METHOD(set_signal_val_real, "Set the value of a signal using a double precision float"),
     {"get_definition_name", get_definition_name, METH_VARARGS, "Get the name of a GPI object's definition"},
     {"get_definition_file", get_definition_file, METH_VARARGS, "Get the file that sources the object's definition"},
     {"get_handle_by_name", get_handle_by_name, METH_VARARGS, "Get handle of a named object"},
@@ -113,7 +149,8 @@ static PyMethodDef SimulatorMethods[] = {
     {"get_num_elems", get_num_elems, METH_VARARGS, "Get the number of elements contained in the handle"},
     {"get_range", get_range, METH_VARARGS, "Get the range of elements (tuple) contained in the handle, returns None if not indexable"},
     {"register_timed_callback", register_timed_callback, METH_VARARGS, "Register a timed callback"},
-    {"register_value_change_callback", register_value_change_callback, METH_VARARGS, "Register a signal change callback"},
+    FASTCALL_METHOD(register_value_change_callback, "Register a signal change callback"),
+    FASTCALL_METHOD(register_persistent_value_change_callback, "Register a signal change callback that stays registered after firing"),
     {"register_readonly_callback", register_readonly_callback, METH_VARARGS, "Register a callback for the read-only section"},
     {"register_nextstep_callback", register_nextstep_callback, METH_VARARGS, "Register a callback for the NextSimTime callback"},
     {"register_rwsynch_callback", register_rwsynch_callback, METH_VARARGS, "Register a callback for the read-write section"},
@@ -121,11 +158,21 @@ static PyMethodDef SimulatorMethods[] = {
     {"iterate", iterate, METH_VARARGS, "Get an iterator handle to loop over all members in an object"},
     {"next", next, METH_VARARGS, "Get the next object from the iterator"},
     {"log_level", log_level, METH_VARARGS, "Set the log level for GPI"},
+    {"set_batch_callback", set_batch_callback, METH_VARARGS, "Set the function that receives batches of callbacks in place of another"},
 
     // FIXME METH_NOARGS => initialization from incompatible pointer type
     {"get_sim_time", get_sim_time, METH_VARARGS, "Get the current simulation time as an int tuple"},
     {"get_precision", get_precision, METH_VARARGS, "Get the precision of the simulator"},
-    {"deregister_callback", deregister_callback, METH_VARARGS, "De-register a callback"},
+    FASTCALL_METHOD(deregister_callback, "De-register a callback"),
+    FASTCALL_METHOD(enable_callback, "Resume delivery of a persistent callback"),
+    FASTCALL_METHOD(disable_callback, "Suspend delivery of a persistent callback without de-registering it"),
+    {"get_gpi_stats", get_gpi_stats, METH_NOARGS, "Get the GPI call statistics, or None if they are not being collected"},
+    {"trace_on", trace_on, METH_NOARGS, "Start or resume writing the waveform trace"},
+    {"trace_off", trace_off, METH_NOARGS, "Pause writing the waveform trace"},
+    {"set_trace_depth", set_trace_depth, METH_VARARGS, "Set the number of levels of hierarchy to trace, before the trace starts"},
+    {"save_snapshot", save_snapshot, METH_VARARGS, "Save the state of the design to a file"},
+    {"restore_snapshot", restore_snapshot, METH_VARARGS, "Restore the state of the design from a file saved by save_snapshot"},
+    {"fork", fork_simulator, METH_NOARGS, "Fork the simulator process, returning the process id of the child in the parent and 0 in the child"},
     {"error_out", error_out, METH_NOARGS, NULL},
     {NULL, NULL, 0, NULL}        /* Sentinel */
 };
@@ -6,10 +6,32 @@
 #include "verilated.h"
 #include "verilated_vpi.h"
 
+#include <gpi.h>
+#include <gpi_logging.h>
+
+#include <cerrno>
+#include <cstdio>
+#include <cstring>
 #include <memory>
 
+#ifndef _WIN32
+# include <unistd.h>
+#endif
+
+#if COCOTB_VERILATOR_SAVABLE
+# include <verilated_save.h>
+#endif
+
 #if VM_TRACE
-# include <verilated_vcd_c.h>
+# if VM_TRACE_FST
+#  include <verilated_fst_c.h>
+typedef VerilatedFstC TraceFile;
+#  define TRACE_FILE_NAME "dump.fst"
+# else
+#  include <verilated_vcd_c.h>
+typedef VerilatedVcdC TraceFile;
+#  define TRACE_FILE_NAME "dump.vcd"
+# endif
 #endif
 
 vluint64_t main_time = 0;       // Current simulation time
@@ -23,6 +45,159 @@ extern "C" {
 void vlog_startup_routines_bootstrap(void);
 }
 
+// All value changes found after an evaluation happened at the same point of
+// the simulation, so deliver them to Python as one batch
+static void call_value_cbs() {
+    gpi_begin_callback_batch();
+    VerilatedVpi::callValueCbs();
+    gpi_end_callback_batch();
+}
+
+#if VM_TRACE
+// The trace file is only opened at the first time step that is traced, so
+// the depth can be changed until then, and a trace that is turned off from
+// the start only covers the time after it is turned on.
+static Vtop *trace_model = nullptr;
+static std::unique_ptr<TraceFile> trace_file;
+static bool trace_enabled = true;
+static bool trace_forked = false;   // in a process forked by fork_model
+static int trace_depth = 99;
+
+static int trace_on() {
+    if (trace_forked) {
+        LOG_ERROR("The trace file belongs to the parent process, so a forked process can't be traced");
+        return -1;
+    }
+    trace_enabled = true;
+    return 0;
+}
+
+static int trace_off() {
+    trace_enabled = false;
+    if (trace_file) {
+        trace_file->flush();
+    }
+    return 0;
+}
+
+static int set_trace_depth(int levels) {
+    if (trace_file) {
+        LOG_ERROR("The trace depth can't be changed after tracing has started");
+        return -1;
+    }
+    if (levels < 1) {
+        LOG_ERROR("The trace depth must be at least 1, not %d", levels);
+        return -1;
+    }
+    trace_depth = levels;
+    return 0;
+}
+
+static const gpi_trace_control_t trace_control = {
+    trace_on,
+    trace_off,
+    set_trace_depth
+};
+
+static void trace_dump() {
+    if (!trace_enabled) {
+        return;
+    }
+    if (!trace_file) {
+        trace_file.reset(new TraceFile);
+        trace_model->trace(trace_file.get(), trace_depth);
+        trace_file->open(TRACE_FILE_NAME);
+    }
+    trace_file->dump(main_time);
+}
+#endif
+
+#if COCOTB_VERILATOR_SAVABLE
+// Snapshots are taken and restored from callbacks, between evaluations of the
+// model. The simulation time is not part of a snapshot, so that it only moves
+// forward and the timed callbacks which are already registered stay valid.
+static Vtop *snapshot_model = nullptr;
+
+static int save_snapshot(const char *filename) {
+    VerilatedSave os;
+    os.open(filename);
+    if (!os.isOpen()) {
+        LOG_ERROR("Failed to open %s to save a snapshot", filename);
+        return -1;
+    }
+    os << *snapshot_model;
+    os.close();
+    return 0;
+}
+
+static int restore_snapshot(const char *filename) {
+    VerilatedRestore os;
+    os.open(filename);
+    if (!os.isOpen()) {
+        LOG_ERROR("Failed to open %s to restore a snapshot", filename);
+        return -1;
+    }
+    os >> *snapshot_model;
+    os.close();
+    return 0;
+}
+
+static const gpi_snapshot_control_t snapshot_control = {
+    save_snapshot,
+    restore_snapshot
+};
+#endif
+
+// The whole process is forked, model and Python interpreter alike, so the
+// child continues the simulation from the same state. A model evaluated by
+// several threads can't be, as only the thread calling fork() is copied.
+#if !defined(_WIN32) && !VL_THREADED
+# define COCOTB_VERILATOR_FORK 1
+
+static int fork_model() {
+# if VM_TRACE
+    if (trace_file) {
+        trace_file->flush();
+    }
+# endif
+    fflush(NULL);
+    pid_t pid = fork();
+    if (pid < 0) {
+        LOG_ERROR("Failed to fork: %s", strerror(errno));
+        return -1;
+    }
+# if VM_TRACE
+    if (pid == 0) {
+        // Left open for the parent, which is still writing to it
+        trace_file.release();
+        trace_enabled = false;
+        trace_forked = true;
+    }
+# endif
+    return static_cast<int>(pid);
+}
+
+static const gpi_fork_control_t fork_control = {
+    fork_model
+};
+#endif
+
+// The model has no events of its own to schedule, so when no timed callback
+// fired in this step nothing can change before the next one is due, and the
+// steps in between are skipped. Otherwise the callbacks may have written to
+// signals, which are evaluated in the next step as usual.
+static vluint64_t next_time(bool timed_cbs_fired) {
+    vluint64_t next = main_time + 1;
+    if (!timed_cbs_fired) {
+        QData deadline = VerilatedVpi::cbNextDeadline();
+        // ~0 means no timed callbacks are registered, so step as before
+        if (deadline != ~0ULL && deadline > next) {
+            next = deadline;
+        }
+    }
+    return next;
+}
+
 int main(int argc, char** argv) {
     Verilated::commandArgs(argc, argv);
 #ifdef VERILATOR_SIM_DEBUG
@@ -31,17 +206,24 @@ int main(int argc, char** argv) {
     std::unique_ptr<Vtop> top(new Vtop(""));
     Verilated::fatalOnVpiError(false); // otherwise it will fail on systemtf
 
-    vlog_startup_routines_bootstrap();
-    VerilatedVpi::callCbs(cbStartOfSimulation);
-
 #if VM_TRACE
     Verilated::traceEverOn(true);
+    trace_model = top.get();
+    gpi_register_trace_control(&trace_control);
+#endif
+
+#if COCOTB_VERILATOR_FORK
+    gpi_register_fork_control(&fork_control);
+#endif
 
-    std::unique_ptr<VerilatedVcdC> tfp(new VerilatedVcdC);
-    top->trace(tfp.get(), 99);
-    tfp->open("dump.vcd");
+#if COCOTB_VERILATOR_SAVABLE
+    snapshot_model = top.get();
+    gpi_register_snapshot_control(&snapshot_control);
 #endif
 
+    vlog_startup_routines_bootstrap();
+    VerilatedVpi::callCbs(cbStartOfSimulation);
+
     while (!Verilated::gotFinish()) {
         bool again = true;
 
@@ -52,26 +234,27 @@ int main(int argc, char** argv) {
 
             // Call Value Change callbacks as eval()
             // can modify signals values
-            VerilatedVpi::callValueCbs();
+            call_value_cbs();
 
             // Call registered Read-Write callbacks
             again = VerilatedVpi::callCbs(cbReadWriteSynch);
 
             // Call Value Change callbacks as cbReadWriteSynch
             // can modify signals values
-            VerilatedVpi::callValueCbs();
+            call_value_cbs();
         }
 
         // Call ReadOnly callbacks
         VerilatedVpi::callCbs(cbReadOnlySynch);
 
         // Call registered timed callbacks (e.g. clock timer)
+        bool timed_cbs_due = VerilatedVpi::cbNextDeadline() <= main_time;
         VerilatedVpi::callTimedCbs();
 
 #if VM_TRACE
-        tfp->dump(main_time);
+        trace_dump();
 #endif
-        main_time++;
+        main_time = next_time(timed_cbs_due);
 
         // Call registered NextSimTime
         // It should be called in new slot before everything else
@@ -81,7 +264,10 @@ int main(int argc, char** argv) {
     VerilatedVpi::callCbs(cbEndOfSimulation);
 
 #if VM_TRACE
-    tfp->close();
+    if (trace_file) {
+        trace_file->close();
+        trace_file.reset();
+    }
 #endif
 
     return 0;
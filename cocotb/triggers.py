@@ -35,6 +35,9 @@ if "COCOTB_SIM" in os.environ:
 else:
     simulator = None
 
+# Keep edge callbacks registered with the simulator between firings
+_persistent_edge_callbacks = "COCOTB_PERSISTENT_EDGES" in os.environ
+
 from cocotb.log import SimLog
 from cocotb.utils import (
     get_sim_steps, get_time_from_sim_steps, ParametrizedSingleton,
@@ -319,13 +322,32 @@ class _EdgeBase(GPITrigger, metaclass=_ParameterizedSingletonAndABC):
     def prime(self, callback):
         """Register notification of a value change via a callback"""
         if self.cbhdl == 0:
-            self.cbhdl = simulator.register_value_change_callback(
+            if _persistent_edge_callbacks:
+                register = simulator.register_persistent_value_change_callback
+            else:
+                register = simulator.register_value_change_callback
+            self.cbhdl = register(
                 self.signal._handle, callback, type(self)._edge_type, self
             )
             if self.cbhdl == 0:
                 raise TriggerException("Unable set up %s Trigger" % (str(self)))
+        elif _persistent_edge_callbacks and not self.primed:
+            simulator.enable_callback(self.cbhdl)
         super(_EdgeBase, self).prime(callback)
 
+    def unprime(self):
+        """Disable a primed trigger, can be re-primed.
+
+        A persistent callback is only disabled, so that priming the trigger
+        again does not have to go back to the simulator.
+        """
+        if _persistent_edge_callbacks:
+            if self.cbhdl != 0 and self.primed:
+                simulator.disable_callback(self.cbhdl)
+            Trigger.unprime(self)
+        else:
+            super(_EdgeBase, self).unprime()
+
     def __repr__(self):
         return "{}({!r})".format(type(self).__name__, self.signal)
 
@@ -29,7 +29,6 @@ from __future__ import print_function, division
 
 """Collection of handy functions."""
 
-import ctypes
 import math
 import os
 import sys
@@ -64,9 +63,11 @@ def get_sim_time(units=None):
     Returns:
         The simulation time in the specified units.
     """
-    timeh, timel = simulator.get_sim_time()
-
-    result = (timeh << 32 | timel)
+    # Set by the simulator module while a callback is being handled
+    result = simulator.sim_time
+    if result is None:
+        timeh, timel = simulator.get_sim_time()
+        result = (timeh << 32 | timel)
 
     if units is not None:
         result = get_time_from_sim_steps(result, units)
@@ -164,6 +165,7 @@ def pack(ctypes_obj):
     Returns:
         New Python string containing the bytes from memory holding *ctypes_obj*.
     """
+    import ctypes
     return ctypes.string_at(ctypes.addressof(ctypes_obj),
                             ctypes.sizeof(ctypes_obj))
 
@@ -186,6 +188,7 @@ def unpack(ctypes_obj, string, bytes=None):
             are not equal.
         :exc:`MemoryError`: If *bytes* is longer than size of *ctypes_obj*.
     """
+    import ctypes
     if bytes is None:
         if len(string) != ctypes.sizeof(ctypes_obj):
             raise ValueError("Attempt to unpack a string of size %d into a \
@@ -28,11 +28,19 @@
 from xml.etree.ElementTree import Element, SubElement
 import xml.etree.ElementTree as ET
 
+import html
 import mmap
+import os
 from io import StringIO
 
 TRUNCATE_LINES = 100
 
+# The amount copied at a time when the file is rewritten
+_COPY_SIZE = 1 << 20
+
+# Added to the name of a results file until all of the results are written
+PARTIAL_SUFFIX = ".partial"
+
 
 # file from  http://stackoverflow.com/questions/136168/get-last-n-lines-of-a-file-with-python-similar-to-tail
 class File(StringIO):
@@ -63,26 +71,139 @@ class File(StringIO):
         return line_list[-lines_2find:]
 
 
+def read_testcases(filename):
+    """Return the test cases in the results file *filename*.
+
+    The file may have been left incomplete by a process which was killed, in
+    which case the test cases which could be read are returned.
+    """
+    testcases = []
+    try:
+        for _, element in ET.iterparse(filename):
+            if element.tag == "testcase":
+                testcases.append(element)
+    except (OSError, ET.ParseError):
+        pass
+    return testcases
+
+
+def _quoteattr(value):
+    """Quote *value* as an attribute, like :func:`xml.sax.saxutils.quoteattr`.
+
+    That module imports :mod:`urllib.request`, which is slow to import.
+    """
+    value = html.escape(value, quote=True)
+    return '"{}"'.format(value.replace("\n", "&#10;").replace("\r", "&#13;").replace("\t", "&#9;"))
+
+
+def _start_tag(element, level):
+    attributes = "".join(" {}={}".format(k, _quoteattr(v)) for k, v in element.items())
+    return "{}<{}{}>\n".format("  " * level, element.tag, attributes).encode("UTF-8")
+
+
+def _copy(src, dst, size):
+    while size > 0:
+        data = src.read(min(size, _COPY_SIZE))
+        if not data:
+            break
+        dst.write(data)
+        size -= len(data)
+
+
 class XUnitReporter(object):
+    """Writes test results to *filename* in the JUnit XML format.
+
+    Each element is written as soon as it is added, followed by the closing
+    tags, which the next element overwrites. The file is therefore a complete
+    document with the results of the tests run so far even if the simulator
+    crashes or is killed, and the test cases are not kept in memory. Adding
+    to the last test case, for instance with :meth:`add_failure`, writes it
+    again.
+
+    Until :meth:`write` is called the file is named with
+    :data:`PARTIAL_SUFFIX` added, so that it is not mistaken for the results
+    of a complete run.
+
+    Only the last test suite can be added to, and only the last element
+    changed. Changes to the attributes of the test suites are written by
+    :meth:`write`.
+    """
 
     def __init__(self, filename="results.xml"):
         self.results = Element("testsuites", name="results")
         self.filename = filename
+        self.last_testsuite = None
+        self.last_testcase = None
+        self._path = filename + PARTIAL_SUFFIX
+        self._file = open(self._path, "wb", buffering=0)
+        self._file.write(b"<?xml version='1.0' encoding='UTF-8'?>\n")
+        self._start_tags = []       # (offset, length, element, level) of each start tag written
+        self._stale = False         # whether the attributes of a start tag have changed since
+        self._last_element = None   # the last element written, and where it starts
+        self._last_offset = None
+        self._write_start_tag(self.results, 0)
+
+    def _write_start_tag(self, element, level):
+        tag = _start_tag(element, level)
+        self._start_tags.append((self._file.tell(), len(tag), element, level))
+        self._file.write(tag)
+        self._last_element = None
+        self._write_end()
+
+    def _write_end(self):
+        """Write the closing tags at the current position, which is the end of the elements."""
+        self._end = self._file.tell()
+        end = b"</testsuites>\n"
+        if self.last_testsuite is not None:
+            end = b"  </testsuite>\n" + end
+        self._file.write(end)
+        self._file.truncate()
+
+    def _write_element(self, element, level):
+        self.indent(element, level)
+        element.tail = None
+        self._last_element = element
+        self._last_offset = self._file.tell()
+        data = "  " * level + ET.tostring(element, encoding="unicode") + "\n"
+        self._file.write(data.encode("UTF-8"))
+        self._write_end()
+
+    def _append(self, element, testsuite):
+        if testsuite is not None and testsuite is not self.last_testsuite:
+            raise ValueError("Only the last test suite can be added to")
+        self._file.seek(self._end)
+        self._write_element(element, 2)
+
+    def _changed(self, element):
+        if element is not self._last_element:
+            raise ValueError("Only the last element added can be changed")
+        self._file.seek(self._last_offset)
+        self._write_element(element, 2)
 
     def add_testsuite(self, **kwargs):
+        self._file.seek(self._end)
+        if self.last_testsuite is not None:
+            self._file.write(b"  </testsuite>\n")
         self.last_testsuite = SubElement(self.results, "testsuite", **kwargs)
+        self.last_testcase = None
+        self._write_start_tag(self.last_testsuite, 1)
         return self.last_testsuite
 
     def add_testcase(self, testsuite=None, **kwargs):
-        if testsuite is None:
-            testsuite = self.last_testsuite
-        self.last_testcase = SubElement(testsuite, "testcase", **kwargs)
+        self.last_testcase = Element("testcase", **kwargs)
+        self._append(self.last_testcase, testsuite)
         return self.last_testcase
 
+    def append(self, element, testsuite=None):
+        """Add a complete *element*, such as a test case read from another results file."""
+        if element.tag == "testcase":
+            self.last_testcase = element
+        self._append(element, testsuite)
+        return element
+
     def add_property(self, testsuite=None, **kwargs):
-        if testsuite is None:
-            testsuite = self.last_testsuite
-        self.last_property = SubElement(testsuite, "property", **kwargs)
+        self.last_property = Element("property", **kwargs)
+        self._append(self.last_property, testsuite)
         return self.last_property
 
     def update_testsuite(self, testsuite=None, **kwargs):
@@ -90,10 +211,12 @@ class XUnitReporter(object):
             testsuite = self.last_testsuite
         for k in kwargs:
             testsuite.set(k, str(kwargs[k]))
+        self._stale = True
 
     def update_testsuites(self, **kwargs):
         for k in kwargs:
             self.results.set(k, str(kwargs[k]))
+        self._stale = True
 
     def add_log(self, logfile, testcase=None):
         if testcase is None:
@@ -108,16 +231,19 @@ class XUnitReporter(object):
                                ((lines - (TRUNCATE_LINES*2)))) + tail)
         else:
             log.text = "".join(f.readlines())
+        self._changed(testcase)
 
     def add_failure(self, testcase=None, **kwargs):
         if testcase is None:
             testcase = self.last_testcase
-        log = SubElement(testcase, "failure", **kwargs)
+        SubElement(testcase, "failure", **kwargs)
+        self._changed(testcase)
 
     def add_skipped(self, testcase=None, **kwargs):
         if testcase is None:
             testcase = self.last_testcase
-        log = SubElement(testcase, "skipped", **kwargs)
+        SubElement(testcase, "skipped", **kwargs)
+        self._changed(testcase)
 
     def indent(self, elem, level=0):
         i = "\n" + level*"  "
@@ -135,5 +261,42 @@ class XUnitReporter(object):
                 elem.tail = i
 
     def write(self):
-        self.indent(self.results)
-        ET.ElementTree(self.results).write(self.filename, encoding="UTF-8")
+        """Finish the file, giving it its name.
+
+        The elements have already been written when they were added, but the
+        attributes of the test suites may have changed since.
+        """
+        if self._stale:
+            self._rewrite_start_tags()
+        if self._path != self.filename:
+            os.replace(self._path, self.filename)
+            self._path = self.filename
+
+    def close(self):
+        """Close the file, leaving it as it is.
+
+        Call :meth:`write` first to finish it.
+        """
+        self._file.close()
+
+    def _rewrite_start_tags(self):
+        # Copied, so that the elements do not have to be read into memory
+        tmp_filename = self._path + ".tmp"
+        start_tags = []
+        with open(self._path, "rb") as src, open(tmp_filename, "wb") as dst:
+            for offset, length, element, level in self._start_tags:
+                _copy(src, dst, offset - src.tell())
+                tag = _start_tag(element, level)
+                start_tags.append((dst.tell(), len(tag), element, level))
+                dst.write(tag)
+                src.seek(offset + length)
+            shift = dst.tell() - src.tell()
+            _copy(src, dst, os.fstat(src.fileno()).st_size - src.tell())
+        self._file.close()
+        os.replace(tmp_filename, self._path)
+        self._file = open(self._path, "r+b", buffering=0)
+        self._start_tags = start_tags
+        self._end += shift
+        if self._last_offset is not None:
+            self._last_offset += shift
+        self._stale = False
@@ -84,6 +84,8 @@ setup(
     entry_points={
         'console_scripts': [
             'cocotb-config=cocotb.config:main',
+            'cocotb-logview=cocotb.logview:main',
+            'cocotb-run=cocotb.runner:main',
         ]
     },
     platforms='any',
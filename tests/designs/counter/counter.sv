@@ -0,0 +1,28 @@
+// Copyright cocotb contributors
+// Licensed under the Revised BSD License, see LICENSE for details.
+// SPDX-License-Identifier: BSD-3-Clause
+
+// The counter of tests/test_cases/test_pysim/pysim_counter.py in HDL, for the
+// tests which run on the stand-in simulator and on Verilator. Unlike the
+// stand-in one, it has no clock of its own.
+
+`timescale 1 ns / 1 ps
+
+module counter (
+    input  wire       clk,
+    input  wire       reset,
+    input  wire       enable,
+    output reg  [7:0] count,
+    output wire       wrapped
+);
+
+    always @(posedge clk) begin
+        if (reset)
+            count <= 8'd0;
+        else
+            count <= count + {7'd0, enable};
+    end
+
+    assign wrapped = count == 8'd0;
+
+endmodule
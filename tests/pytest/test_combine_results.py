@@ -0,0 +1,128 @@
+# Copyright cocotb contributors
+# Licensed under the Revised BSD License, see LICENSE for details.
+# SPDX-License-Identifier: BSD-3-Clause
+
+"""Tests of bin/combine_results.py against a merge of whole element trees"""
+
+import json
+import os
+import subprocess
+import sys
+import xml.etree.ElementTree as ET
+
+import pytest
+
+SCRIPT = os.path.join(os.path.dirname(__file__), "..", "..", "bin", "combine_results.py")
+
+RESULTS = {
+    "a": """<?xml version='1.0' encoding='UTF-8'?>
+<testsuites name="results">
+  <testsuite name="all" package="all" tests="2">
+    <property name="random_seed" value="1" />
+    <testcase name="t1" classname="m1" time="1.5" sim_time_ns="100" />
+    <testcase name="t2" classname="m1" time="0.5" sim_time_ns="50" message="a &gt; b">
+      <failure message="x &lt; 1" />
+      <system-out>output &lt;with&gt; markup, café</system-out>
+    </testcase>
+  </testsuite>
+</testsuites>
+""",
+    "b": """<?xml version='1.0' encoding='UTF-8'?>
+<testsuites name="results">
+  <testsuite name="all" package="all" tests="1">
+    <testcase name="t3" classname="m2" time="2" sim_time_ns="10"><skipped /></testcase>
+  </testsuite>
+  <testsuite name="other" package="pkg">
+    <testcase name="u1" classname="m3" time="1" />
+  </testsuite>
+</testsuites>
+""",
+    "c/d": """<?xml version='1.0' encoding='UTF-8'?>
+<testsuites name="results">
+  <testsuite name="empty" package="pkg" />
+  <testsuite name="other" package="pkg">
+    <testcase name="u2" classname="m3" time="1"><failure /></testcase>
+  </testsuite>
+</testsuites>
+""",
+}
+
+
+def write_results(directory, results):
+    for subdir, text in results.items():
+        os.makedirs(str(directory / subdir))
+        with open(str(directory / subdir / "results.xml"), "w", encoding="UTF-8") as f:
+            f.write(text)
+
+
+def reference(directory):
+    """Merge the results files as the script did before it streamed them."""
+    merged = ET.Element("testsuites", name="results")
+    for root, _, files in os.walk(str(directory)):
+        if "results.xml" not in files:
+            continue
+        for ts in ET.parse(os.path.join(root, "results.xml")).iter("testsuite"):
+            for existing in merged:
+                if existing.get("name") == ts.get("name") and existing.get("package") == ts.get("package"):
+                    existing.extend(list(ts))
+                    break
+            else:
+                merged.append(ts)
+    return merged
+
+
+def canonical(element):
+    return (element.tag, sorted(element.items()), (element.text or "").strip(),
+            [canonical(child) for child in element])
+
+
+def combine(directory, *args):
+    output = str(directory / "combined.xml")
+    summary = str(directory / "summary.json")
+    proc = subprocess.run(
+        [sys.executable, SCRIPT, "--directory", str(directory), "--output_file", output,
+         "--json_summary", summary] + list(args),
+        stdout=subprocess.PIPE, universal_newlines=True)
+    with open(summary) as f:
+        return proc, ET.parse(output).getroot(), json.load(f)
+
+
+@pytest.mark.parametrize("jobs", ["1", "2"])
+def test_same_as_tree_merge(tmp_path, jobs):
+    write_results(tmp_path / "in", RESULTS)
+    expected = reference(tmp_path / "in")
+    proc, merged, summary = combine(tmp_path / "in", "--jobs", jobs)
+
+    assert canonical(merged) == canonical(expected)
+    cases = list(expected.iter("testcase"))
+    assert "Ran a total of 3 TestSuites and 5 TestCases" in proc.stdout
+    assert proc.stdout.count("Failure in testsuite") == 2
+    assert proc.returncode == 1
+
+    assert summary["files"] == 3
+    assert summary["testsuites"] == 3
+    assert summary["testcases"] == len(cases)
+    assert summary["failures"] == sum(1 for case in cases if case.find("failure") is not None)
+    assert summary["skipped"] == 1
+    assert summary["sim_time_ns"] == 160.0
+    assert summary["real_time_s"] == 6.0
+    assert [(s["name"], s["package"], s["testcases"]) for s in summary["suites"]] == \
+        [(ts.get("name"), ts.get("package"), len(ts.findall("testcase"))) for ts in expected]
+
+
+def test_unreadable_file(tmp_path):
+    results = dict(RESULTS)
+    results["bad"] = RESULTS["b"][:100]
+    write_results(tmp_path / "in", results)
+    proc, merged, summary = combine(tmp_path / "in", "--suppress_rc")
+
+    assert "Unable to read {}".format(tmp_path / "in" / "bad" / "results.xml") in proc.stdout
+    assert proc.returncode == 0
+    # The other files are still merged
+    assert (summary["files"], summary["testsuites"], summary["testcases"]) == (4, 3, 5)
+    assert sum(1 for _ in merged.iter("testcase")) == 5
+
+    write_results(tmp_path / "bad_only", {"bad": RESULTS["b"][:100]})
+    proc, merged, summary = combine(tmp_path / "bad_only")
+    assert proc.returncode == 1
+    assert summary["testcases"] == 0
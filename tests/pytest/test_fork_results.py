@@ -0,0 +1,60 @@
+# Copyright cocotb contributors
+# Licensed under the Revised BSD License, see LICENSE for details.
+# SPDX-License-Identifier: BSD-3-Clause
+
+"""Tests of adding the results of forked processes to those of the parent"""
+
+import os
+import xml.etree.ElementTree as ET
+
+import pytest
+
+from cocotb.regression import RegressionManager
+from cocotb.xunit_reporter import XUnitReporter
+
+pytestmark = pytest.mark.skipif(not hasattr(os, "fork"), reason="needs os.fork")
+
+
+class FakeTest(object):
+    def __init__(self, module, funcname):
+        self.module = module
+        self.funcname = funcname
+        self.__name__ = funcname
+        self._seed = None
+
+
+def exited_child():
+    pid = os.fork()
+    if pid == 0:
+        os._exit(0)
+    return pid
+
+
+def test_same_name_in_two_modules(tmp_path):
+    child_file = str(tmp_path / "child.xml")
+    child = XUnitReporter(filename=child_file)
+    child.add_testsuite(name="all", package="all")
+    child.add_testcase(name="test_a", classname="m1", time="1", sim_time_ns="10", ratio_time="10")
+    child.add_testcase(name="test_a", classname="m2", time="2", sim_time_ns="20", ratio_time="10")
+    child.add_failure(message="failed")
+    child.write()
+    child.close()
+
+    manager = RegressionManager("top", [])
+    manager.test_results = []
+    manager.count = 1
+    manager.failures = 0
+    manager.xunit = XUnitReporter(filename=str(tmp_path / "results.xml"))
+    manager.xunit.add_testsuite(name="all", package="all")
+    manager._fork_dir = str(tmp_path / "forked")
+    manager._children = [(exited_child(), [FakeTest("m1", "test_a"), FakeTest("m2", "test_a")], child_file)]
+    manager._collect_children()
+    manager.xunit.write()
+    manager.xunit.close()
+
+    assert [(r["test"], r["pass"], r["sim"]) for r in manager.test_results] == [
+        ("m1.test_a", True, 10.0), ("m2.test_a", False, 20.0)]
+    assert manager.failures == 1
+    testcases = ET.parse(manager.xunit.filename).getroot().iter("testcase")
+    assert [(case.get("classname"), case.find("failure") is not None) for case in testcases] == [
+        ("m1", False), ("m2", True)]
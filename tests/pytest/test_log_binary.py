@@ -0,0 +1,130 @@
+# Copyright cocotb contributors
+# Licensed under the Revised BSD License, see LICENSE for details.
+# SPDX-License-Identifier: BSD-3-Clause
+
+"""Tests of the binary log sink, its reader and cocotb-logview"""
+
+import enum
+import logging
+import os
+import sys
+
+import pytest
+
+import cocotb.logview
+from cocotb.log import SimLogBinaryHandler, read_binary_log
+from cocotb.utils import get_sim_steps
+
+
+class Color(enum.IntEnum):
+    RED = 1
+
+
+def make_record(msg, *args, name="test", level=logging.INFO, sim_time_ns=0, exc_info=None):
+    record = logging.LogRecord(name, level, __file__, 42, msg, args, exc_info, func="make_record")
+    record.created_sim_time = get_sim_steps(sim_time_ns, "ns")
+    return record
+
+
+def write_log(filename, records):
+    handler = SimLogBinaryHandler(str(filename))
+    for record in records:
+        handler.handle(record)
+    handler.close()
+
+
+def test_round_trip(tmp_path):
+    filename = tmp_path / "test.clog"
+    items = [1, 2]
+    try:
+        raise ValueError("bad value")
+    except ValueError:
+        exc_info = sys.exc_info()
+    records = [
+        make_record("no arguments"),
+        make_record("%d %d %s %r %s %s %s", 1, 2**70, 0.5, b"\x00", None, True, "text", sim_time_ns=10),
+        make_record("state %r", Color.RED),
+        make_record("items %s", items),
+        make_record("failed", name="test.child", level=logging.ERROR, exc_info=exc_info),
+    ]
+    write_log(filename, records)
+
+    read = list(read_binary_log(str(filename)))
+    assert [r.getMessage() for r in read] == [r.getMessage() for r in records]
+    assert read[1].args == (1, 2**70, 0.5, b"\x00", None, True, "text")
+    assert read[2].getMessage() == "state <Color.RED: 1>"
+    assert [r.created_sim_time for r in read] == [r.created_sim_time for r in records]
+    assert [(r.name, r.levelno, r.lineno, r.funcName) for r in read] == \
+        [(r.name, r.levelno, r.lineno, r.funcName) for r in records]
+    assert read[0].exc_text is None
+    assert read[4].exc_text.endswith("ValueError: bad value")
+
+
+def test_truncated(tmp_path):
+    filename = tmp_path / "test.clog"
+    write_log(filename, [make_record("message %d", i) for i in range(3)])
+    data = filename.read_bytes()
+    filename.write_bytes(data[:-1])
+    assert [r.getMessage() for r in read_binary_log(str(filename))] == ["message 0", "message 1"]
+
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="needs os.fork")
+def test_forked_process_writes_own_file(tmp_path):
+    filename = tmp_path / "test.clog"
+    handler = SimLogBinaryHandler(str(filename))
+    handler.handle(make_record("before %d", 1))
+    pid = os.fork()
+    if pid == 0:
+        try:
+            handler.handle(make_record("child %d", 2))
+            handler.close()
+        finally:
+            os._exit(0)
+    os.waitpid(pid, 0)
+    handler.handle(make_record("parent %d", 3))
+    handler.close()
+
+    def messages(name):
+        return [r.getMessage() for r in read_binary_log(str(name))]
+    assert messages(filename) == ["before 1", "parent 3"]
+    # With a string table of its own
+    assert messages("{}.{}".format(filename, pid)) == ["child 2"]
+
+
+def test_not_a_binary_log(tmp_path):
+    filename = tmp_path / "test.clog"
+    filename.write_bytes(b"not a log")
+    with pytest.raises(ValueError):
+        list(read_binary_log(str(filename)))
+
+
+@pytest.fixture
+def logfile(tmp_path):
+    filename = tmp_path / "test.clog"
+    write_log(filename, [
+        make_record("a at 0", name="a", sim_time_ns=0),
+        make_record("a.b at 10", name="a.b", sim_time_ns=10),
+        make_record("ab at 10", name="ab", level=logging.WARNING, sim_time_ns=10),
+        make_record("c at 20", name="c", level=logging.ERROR, sim_time_ns=20),
+        make_record("a at 30", name="a", sim_time_ns=30),
+    ])
+    return str(filename)
+
+
+def logview(monkeypatch, capsys, *args):
+    """Return the messages printed by cocotb-logview, which end each line."""
+    monkeypatch.setattr(sys, "argv", ["cocotb-logview", "--no-colour"] + list(args))
+    cocotb.logview.main()
+    return [line.split("make_record", 1)[1].strip() for line in capsys.readouterr().out.splitlines()]
+
+
+@pytest.mark.parametrize("args, expected", [
+    ((), ["a at 0", "a.b at 10", "ab at 10", "c at 20", "a at 30"]),
+    (("--start", "10", "--end", "20"), ["a.b at 10", "ab at 10", "c at 20"]),
+    (("--start", "0.015", "--units", "us"), ["c at 20", "a at 30"]),
+    (("--logger", "a"), ["a at 0", "a.b at 10", "a at 30"]),
+    (("--logger", "a.b", "--logger", "c"), ["a.b at 10", "c at 20"]),
+    (("--level", "warning"), ["ab at 10", "c at 20"]),
+])
+def test_logview_filters(monkeypatch, capsys, logfile, args, expected):
+    assert logview(monkeypatch, capsys, logfile, *args) == expected
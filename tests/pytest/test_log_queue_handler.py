@@ -0,0 +1,150 @@
+# Copyright cocotb contributors
+# Licensed under the Revised BSD License, see LICENSE for details.
+# SPDX-License-Identifier: BSD-3-Clause
+
+"""Tests of the asynchronous log handler"""
+
+import gc
+import io
+import logging
+import threading
+import weakref
+
+import pytest
+
+import cocotb.log
+from cocotb.log import SimLogQueueHandler
+
+
+@pytest.fixture
+def stream():
+    return io.StringIO()
+
+
+def make_logger(handler):
+    log = logging.getLogger("test_log_queue_handler.{}".format(id(handler)))
+    log.propagate = False
+    log.setLevel(logging.INFO)
+    log.handlers = [handler]
+    return log
+
+
+class RecordingHandler(logging.Handler):
+    def __init__(self, records):
+        super().__init__()
+        self.records = records
+
+    def emit(self, record):
+        self.records.append(record)
+
+
+@pytest.fixture
+def queued(stream):
+    target = logging.StreamHandler(stream)
+    target.setFormatter(logging.Formatter("%(message)s"))
+    handler = SimLogQueueHandler(target, capacity=100, batch_size=8)
+    yield make_logger(handler), handler
+    handler.close()
+
+
+def test_prepare_keeps_immutable_args():
+    handler = SimLogQueueHandler(logging.NullHandler())
+    try:
+        record = logging.makeLogRecord(dict(msg="%s %d", args=("a", 1)))
+        handler.prepare(record)
+        assert record.msg == "%s %d"
+        assert record.args == ("a", 1)
+    finally:
+        handler.close()
+
+
+def test_mutable_args_are_captured(queued, stream):
+    log, handler = queued
+    items = [1, 2]
+    log.info("items %s", items)
+    items.append(3)
+    handler.flush()
+    assert stream.getvalue() == "items [1, 2]\n"
+
+
+def test_exception_is_captured(queued, stream):
+    log, handler = queued
+    try:
+        raise ValueError("bad value")
+    except ValueError:
+        log.exception("failed")
+    handler.flush()
+    lines = stream.getvalue().splitlines()
+    assert lines[0] == "failed"
+    assert lines[-1] == "ValueError: bad value"
+
+
+def test_record_unchanged_for_later_handlers(queued):
+    log, handler = queued
+    later = []
+    log.addHandler(RecordingHandler(later))
+    items = [1, 2]
+    try:
+        raise ValueError("bad value")
+    except ValueError:
+        log.exception("items %s", items)
+    record, = later
+    assert record.msg == "items %s"
+    assert record.args == (items,)
+    assert record.exc_info[0] is ValueError
+
+
+def test_closed_handler_not_kept():
+    handler = SimLogQueueHandler(logging.NullHandler())
+    assert handler in cocotb.log._queue_handlers
+    handler.close()
+    assert handler not in cocotb.log._queue_handlers
+    ref = weakref.ref(handler)
+    del handler
+    gc.collect()
+    assert ref() is None
+
+
+def test_flush_writes_in_order(queued, stream):
+    log, handler = queued
+    for i in range(1000):
+        log.info("message %d", i)
+    handler.flush()
+    assert stream.getvalue() == "".join("message {}\n".format(i) for i in range(1000))
+
+
+class BlockingHandler(logging.Handler):
+    """Records the messages handled, each once *unblock* is set."""
+
+    def __init__(self):
+        super().__init__()
+        self.unblock = threading.Event()
+        self.messages = []
+
+    def emit(self, record):
+        self.unblock.wait()
+        self.messages.append(record.getMessage())
+
+
+def test_logging_blocks_while_full():
+    target = BlockingHandler()
+    handler = SimLogQueueHandler(target, capacity=2, batch_size=1)
+    log = make_logger(handler)
+    try:
+        # The first record is taken by the writer, which then waits
+        log.info("message 0")
+        log.info("message 1")
+        log.info("message 2")
+
+        logger_thread = threading.Thread(target=log.info, args=("message 3",))
+        logger_thread.start()
+        logger_thread.join(0.2)
+        assert logger_thread.is_alive(), "logging did not block with the buffer full"
+
+        target.unblock.set()
+        logger_thread.join()
+        handler.flush()
+        assert target.messages == ["message {}".format(i) for i in range(4)]
+    finally:
+        target.unblock.set()
+        handler.close()
@@ -0,0 +1,127 @@
+# Copyright cocotb contributors
+# Licensed under the Revised BSD License, see LICENSE for details.
+# SPDX-License-Identifier: BSD-3-Clause
+
+"""Tests of how cocotb-run splits tests into shards and merges their results"""
+
+from cocotb._result_cache import ResultCache
+from cocotb._timing_db import TimingDatabase
+from cocotb.runner import Shard, last_failed, make_shards, merge_results, partition, read_results
+
+
+def test_partition_deals_out_tests():
+    tests = ["t1", "t2", "t3", "t4", "t5"]
+    assert partition(tests, 2) == [["t1", "t3", "t5"], ["t2", "t4"]]
+    assert partition(tests, 8) == [["t1"], ["t2"], ["t3"], ["t4"], ["t5"]]
+    assert partition([], 4) == []
+
+
+def test_partition_balances_durations():
+    durations = {"a": 5.0, "b": 4.0, "c": 3.0, "d": 3.0, "e": 1.0}
+    shards = partition(sorted(durations), 2, durations)
+    assert shards == [["a", "d"], ["b", "c", "e"]]
+    assert partition(["a"], 3, durations) == [["a"]]
+
+
+def test_make_shards_builds_first():
+    found = [("m1", ["t1", "t2", "t3", "t4", "t5"]), ("m2", ["u1", "u2"])]
+    shards = make_shards(found, 2)
+    assert [(s.index, s.module, s.tests) for s in shards] == [
+        (0, "m1", ["t1"]),
+        (1, "m1", ["t2", "t4"]),
+        (2, "m1", ["t3", "t5"]),
+        (3, "m2", ["u1"]),
+        (4, "m2", ["u2"]),
+    ]
+    assert [s.tests for s in make_shards(found, 2, build_first=False)] == [
+        ["t1", "t3", "t5"], ["t2", "t4"], ["u1"], ["u2"]]
+
+
+def test_make_shards_with_timing(tmp_path):
+    timing = TimingDatabase(str(tmp_path / "timing.db"))
+    for test, real_time in [("t1", 4.0), ("t2", 1.0), ("t3", 3.0)]:
+        timing.add("m1", test, real_time, 100.0, 100.0 / real_time, True)
+    try:
+        shards = make_shards([("m1", ["t1", "t2", "t3", "t4"])], 2, timing=timing)
+    finally:
+        timing.close()
+    # t2 is the shortest, and t4 has no history so is expected to take the median
+    assert [(s.tests, s.expected) for s in shards] == [
+        (["t2"], 1.0),
+        (["t1"], 4.0),
+        (["t3", "t4"], 6.0),
+    ]
+
+
+def test_last_failed(tmp_path):
+    cache = ResultCache(str(tmp_path / "results.db"))
+    try:
+        found = [("m1", ["t1", "t2", "t3"]), ("m2", ["u1"])]
+        cache.add("m1", "t1", None, "build", "source", True)
+        cache.add("m1", "t2[seed=1]", 1, "build", "source", True)
+        cache.add("m1", "t2[seed=2]", 2, "build", "source", False)
+        cache.add("m2", "u1", None, "build", "source", True)
+        assert last_failed(found, cache) == [("m1", ["t2"])]
+
+        cache.add("m1", "t2[seed=2]", 2, "build", "source", True)
+        assert last_failed(found, cache) == found
+    finally:
+        cache.close()
+
+
+def write_results(filename, *tests):
+    cases = "".join('<testcase name="{}" classname="m1" time="1.0"/>'.format(test) for test in tests)
+    with open(filename, "w") as f:
+        f.write('<testsuites name="results"><testsuite name="all" package="all">{}'
+                '</testsuite></testsuites>'.format(cases))
+
+
+def make_shard(tmp_path, index, tests):
+    shard = Shard(index, "m1", tests)
+    shard.results_file = str(tmp_path / (shard.name + ".xml"))
+    shard.log_file = str(tmp_path / (shard.name + ".log"))
+    return shard
+
+
+def failures(merged):
+    return {case.get("name"): case.find("failure").get("message")
+            for case in merged.iter("testcase") if case.find("failure") is not None}
+
+
+def test_merge_results(tmp_path):
+    shards = [make_shard(tmp_path, 0, ["t1"]), make_shard(tmp_path, 1, ["t2", "t3"])]
+    write_results(shards[0].results_file, "t1")
+    write_results(shards[1].results_file, "t2", "t3")
+    for shard in shards:
+        read_results(shard)
+
+    merged = merge_results(shards)
+    suites = list(merged.iter("testsuite"))
+    assert len(suites) == 1
+    assert [case.get("name") for case in suites[0].iter("testcase")] == ["t1", "t2", "t3"]
+    assert failures(merged) == {}
+
+
+def test_merge_results_without_results_file(tmp_path):
+    shards = [make_shard(tmp_path, 0, ["t1"]), make_shard(tmp_path, 1, ["t2", "t3"])]
+    write_results(shards[0].results_file, "t1")
+    for shard in shards:
+        read_results(shard)
+    assert shards[1].results is None
+
+    merged = merge_results(shards)
+    message = "shard_1 did not report a result, see {}".format(shards[1].log_file)
+    assert failures(merged) == {"t2": message, "t3": message}
+    assert sum(1 for _ in merged.iter("testcase")) == 3
+
+
+def test_merge_results_with_partial_file(tmp_path):
+    # The simulator crashed after t2 finished
+    shard = make_shard(tmp_path, 0, ["t2", "t3"])
+    write_results(shard.results_file + ".partial", "t2")
+    read_results(shard)
+    assert shard.results_file.endswith(".xml.partial")
+
+    merged = merge_results([shard])
+    assert [case.get("name") for case in merged.iter("testcase")] == ["t2", "t3"]
+    assert list(failures(merged)) == ["t3"]
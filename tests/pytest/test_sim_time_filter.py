@@ -0,0 +1,49 @@
+# Copyright cocotb contributors
+# Licensed under the Revised BSD License, see LICENSE for details.
+# SPDX-License-Identifier: BSD-3-Clause
+
+"""Tests of stamping log records with the simulation time"""
+
+import logging
+import threading
+
+import cocotb.log
+from cocotb.log import SimTimeContextFilter
+
+
+def make_record():
+    return logging.LogRecord("test", logging.INFO, __file__, 1, "message", (), None)
+
+
+def filter_in_thread(time_filter):
+    record = make_record()
+    thread = threading.Thread(target=time_filter.filter, args=(record,))
+    thread.start()
+    thread.join()
+    return record
+
+
+def test_main_thread(monkeypatch):
+    monkeypatch.setattr(cocotb.log, "get_sim_time", lambda: 1234)
+    record = make_record()
+    SimTimeContextFilter().filter(record)
+    assert record.created_sim_time == 1234
+
+
+def test_other_thread_uses_last_time(monkeypatch):
+    calls = []
+
+    def get_sim_time():
+        calls.append(threading.current_thread())
+        return 100 * len(calls)
+
+    monkeypatch.setattr(cocotb.log, "get_sim_time", get_sim_time)
+    time_filter = SimTimeContextFilter()
+
+    # Nothing has been logged by the main thread yet
+    assert filter_in_thread(time_filter).created_sim_time is None
+
+    time_filter.filter(make_record())
+    time_filter.filter(make_record())
+    assert filter_in_thread(time_filter).created_sim_time == 200
+    assert calls == [threading.main_thread()] * 2
@@ -0,0 +1,79 @@
+# Copyright cocotb contributors
+# Licensed under the Revised BSD License, see LICENSE for details.
+# SPDX-License-Identifier: BSD-3-Clause
+
+"""Tests of the database of test times"""
+
+import pytest
+
+from cocotb import _timing_db
+from cocotb._timing_db import HISTORY, MIN_REAL_TIME, TimingDatabase, expected_durations
+from cocotb.regression import RegressionManager
+
+
+@pytest.fixture
+def timing(tmp_path):
+    db = TimingDatabase(str(tmp_path / "timing.db"))
+    yield db
+    db.close()
+
+
+def test_add_keeps_recent_history(timing, monkeypatch):
+    # All of the runs finish at the same time
+    monkeypatch.setattr(_timing_db.time, "time", lambda: 1000.0)
+    for i in range(HISTORY + 5):
+        timing.add("m1", "t1", float(i), 10.0, 1.0, True)
+    timing.add("m1", "t2", 1.0, 10.0, 1.0, True)
+
+    rows = timing._db.execute("SELECT real_time FROM runs WHERE test = 't1' ORDER BY rowid").fetchall()
+    assert [real_time for real_time, in rows] == [float(i) for i in range(5, HISTORY + 5)]
+    assert timing._db.execute("SELECT COUNT(*) FROM runs WHERE test = 't2'").fetchone() == (1,)
+
+
+def test_durations_of_passing_runs(timing):
+    for real_time, passed in [(1.0, True), (2.0, True), (6.0, True), (100.0, False)]:
+        timing.add("m1", "t1", real_time, 10.0, 1.0, passed)
+    timing.add("m2", "t1", 50.0, 10.0, 1.0, True)
+    assert timing.durations("m1") == {"t1": 2.0}
+    assert timing.durations("m3") == {}
+
+
+def test_ratio_regression(timing):
+    real_time = MIN_REAL_TIME + 1
+    assert timing.ratio_regression("m1", "t1", real_time, 10.0, 0.25) is None, "no history"
+    for ratio in (90.0, 100.0, 110.0):
+        timing.add("m1", "t1", real_time, ratio * real_time, ratio, True)
+    timing.add("m1", "t1", real_time, 0.0, 1.0, False)
+
+    assert timing.ratio_regression("m1", "t1", real_time, 74.0, 0.25) == 100.0
+    assert timing.ratio_regression("m1", "t1", real_time, 76.0, 0.25) is None
+    assert timing.ratio_regression("m1", "t1", MIN_REAL_TIME / 2, 10.0, 0.25) is None, "too short"
+
+
+def test_expected_durations():
+    assert expected_durations({"a": 1.0, "b": 3.0, "c": 8.0}, ["a", "d"]) == {"a": 1.0, "d": 3.0}
+    assert expected_durations({}, ["a"]) == {"a": 1.0}
+
+
+class FakeTest(object):
+    def __init__(self, module, funcname, stage, _id):
+        self.module = module
+        self.funcname = funcname
+        self.stage = stage
+        self._id = _id
+
+
+def test_sort_queue_by_duration(timing):
+    for module, test, real_time in [("m1", "short", 1.0), ("m1", "long", 5.0), ("m2", "medium", 3.0)]:
+        timing.add(module, test, real_time, 10.0, 1.0, True)
+    manager = RegressionManager("top", [])
+    manager._timing = timing
+    manager._queue = [
+        FakeTest("m1", "short", 0, 1),
+        FakeTest("m1", "long", 0, 2),
+        FakeTest("m1", "new", 0, 3),  # expected to take the median of m1, 3 s
+        FakeTest("m2", "medium", 0, 4),
+        FakeTest("m2", "later", 1, 5),
+    ]
+    manager._sort_queue_by_duration()
+    assert [test.funcname for test in manager._queue] == ["long", "new", "medium", "short", "later"]
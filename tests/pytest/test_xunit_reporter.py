@@ -0,0 +1,102 @@
+# Copyright cocotb contributors
+# Licensed under the Revised BSD License, see LICENSE for details.
+# SPDX-License-Identifier: BSD-3-Clause
+
+"""Tests of writing results as each test finishes"""
+
+import os
+import xml.etree.ElementTree as ET
+
+import pytest
+
+from cocotb.xunit_reporter import PARTIAL_SUFFIX, XUnitReporter, read_testcases
+
+
+@pytest.fixture
+def reporter(tmp_path):
+    xunit = XUnitReporter(filename=str(tmp_path / "results.xml"))
+    yield xunit
+    xunit.close()
+
+
+def written(filename):
+    return [(case.get("name"), [child.tag for child in case])
+            for case in ET.parse(filename).getroot().iter("testcase")]
+
+
+def test_partial_until_written(reporter):
+    partial = reporter.filename + PARTIAL_SUFFIX
+    reporter.add_testsuite(name="all", package="all")
+    reporter.add_testcase(name="t1", classname="m1")
+    assert not os.path.exists(reporter.filename)
+    # A complete document after every test case
+    assert written(partial) == [("t1", [])]
+    reporter.add_testcase(name="t2", classname="m1")
+    assert written(partial) == [("t1", []), ("t2", [])]
+
+    reporter.write()
+    assert not os.path.exists(partial)
+    assert written(reporter.filename) == [("t1", []), ("t2", [])]
+
+
+def test_attributes_escaped(reporter):
+    name = 'a<b> & "c" \'d\'\n\te'
+    reporter.add_testsuite(name="all", package="all")
+    reporter.add_testcase(name=name, classname="m1")
+    reporter.write()
+    assert written(reporter.filename) == [(name, [])]
+
+
+def test_update_testsuite_rewrites_start_tags(reporter):
+    reporter.add_testsuite(name="all", package="all", tests="0")
+    reporter.add_property(name="random_seed", value="1")
+    reporter.add_testcase(name="t1", classname="m1")
+    reporter.update_testsuite(tests="1000000", time="1.5")
+    reporter.update_testsuites(time="1.5")
+    reporter.write()
+
+    root = ET.parse(reporter.filename).getroot()
+    assert root.get("time") == "1.5"
+    suite = root.find("testsuite")
+    assert suite.get("tests") == "1000000"
+    assert suite.get("time") == "1.5"
+    assert [child.tag for child in suite] == ["property", "testcase"]
+
+    # Elements can still be added and changed after the rewrite
+    reporter.add_testcase(name="t2", classname="m1")
+    reporter.add_failure(message="failed")
+    reporter.update_testsuite(tests="2")
+    reporter.write()
+    assert ET.parse(reporter.filename).getroot().find("testsuite").get("tests") == "2"
+    assert written(reporter.filename) == [("t1", []), ("t2", ["failure"])]
+
+
+def test_add_failure_rewrites_last_testcase(reporter):
+    reporter.add_testsuite(name="all", package="all")
+    first = reporter.add_testcase(name="t1", classname="m1")
+    reporter.add_testcase(name="t2", classname="m1")
+    reporter.add_failure(message="failed")
+    reporter.add_skipped()
+    reporter.write()
+    assert written(reporter.filename) == [("t1", []), ("t2", ["failure", "skipped"])]
+
+    with pytest.raises(ValueError):
+        reporter.add_failure(first)
+
+
+def test_read_testcases_truncated(reporter):
+    reporter.add_testsuite(name="all", package="all")
+    for name in ("t1", "t2", "t3"):
+        reporter.add_testcase(name=name, classname="m1")
+    reporter.add_failure(message="failed")
+    reporter.write()
+    assert [case.get("name") for case in read_testcases(reporter.filename)] == ["t1", "t2", "t3"]
+
+    with open(reporter.filename, "rb") as f:
+        data = f.read()
+    truncated = reporter.filename + ".truncated"
+    with open(truncated, "wb") as f:
+        # Cut short in the middle of the failure of t3
+        f.write(data[:data.index(b"<failure") + 5])
+    assert [case.get("name") for case in read_testcases(truncated)] == ["t1", "t2"]
+    assert read_testcases(reporter.filename + ".missing") == []
@@ -53,7 +53,7 @@ from cocotb.result import (
 )
 from cocotb.utils import get_sim_time
 
-from cocotb.binary import BinaryValue
+from cocotb.binary import BinaryValue, BinaryArray, BinaryRepresentation
 
 
 @contextlib.contextmanager
@@ -677,6 +677,37 @@ def test_logging_with_args(dut):
 
     yield Timer(100)  # Make it do something with time
 
+
+class ListHandler(logging.Handler):
+    def __init__(self):
+        super(ListHandler, self).__init__()
+        self.messages = []
+
+    def emit(self, record):
+        self.messages.append(record.getMessage())
+
+
+@cocotb.test()
+def test_gpi_log_level(dut):
+    """SimBaseLog.setLevel changes what the GPI logs, although it caches the levels"""
+    import simulator
+    log = logging.getLogger("cocotb.test_gpi_log_level")
+    handler = ListHandler()
+    log.addHandler(handler)
+    try:
+        for level, message in [(logging.INFO, "enabled"), (logging.WARNING, "disabled"),
+                               (logging.INFO, "enabled again")]:
+            log.setLevel(level)
+            # Logged at INFO by the GPI, the second time with the cached level
+            for _ in range(2):
+                simulator.log_msg(log.name, __file__, "test_gpi_log_level", 0, message)
+    finally:
+        log.removeHandler(handler)
+        log.setLevel(logging.NOTSET)
+    assert handler.messages == ["enabled"] * 2 + ["enabled again"] * 2
+
+    yield Timer(1)
+
 @cocotb.test()
 def test_clock_cycles(dut):
     """
@@ -771,6 +802,46 @@ def test_binary_value_compat(dut):
     yield Timer(100)  # Make it do something with time
 
 
+@cocotb.test()
+def test_binary_array(dut):
+    """
+    Test the BinaryArray container for batches of samples
+    """
+    arr = BinaryArray(8, binaryRepresentation=BinaryRepresentation.TWOS_COMPLEMENT)
+    arr.extend([5, -5, BinaryValue("10000000"), "0000x001"])
+    assert len(arr) == 4
+    assert arr.x_mask == [False, False, False, True]
+    assert not arr.is_resolvable
+    assert arr[:3].integers == [5, -5, -128]
+    assert arr[:3].unsigned_integers == [5, 251, 128]
+    assert arr[1].signed_integer == -5
+    assert arr.binstr(3) == "0000x001"
+
+    with assert_raises(ValueError):
+        arr.integers
+
+    other = BinaryArray(8, [5, -5, -128, "0000x001"],
+                        binaryRepresentation=BinaryRepresentation.TWOS_COMPLEMENT)
+    assert arr == other
+    assert arr == [5, -5, "10000000", "0000x001"]
+    assert arr != [5, -5, -128, 1]
+    assert BinaryArray(2, ["01", "10"]) == ["01", "10"]
+    assert BinaryArray(2, ["01", "10"]) == [1, 2]
+    other = BinaryArray(8, [5, 4, -128, "00000001"],
+                        binaryRepresentation=BinaryRepresentation.TWOS_COMPLEMENT)
+    assert arr.mismatches(other) == [1, 3]
+
+    with assert_raises(ValueError):
+        arr.append(256)
+    with assert_raises(ValueError):
+        arr.append("0101")
+
+    wide = BinaryArray(72, [2**71, 1])
+    assert wide.signed_integers == [-2**71, 1]
+
+    yield Timer(100)  # Make it do something with time
+
+
 @cocotb.test()
 def join_finished(dut):
     """
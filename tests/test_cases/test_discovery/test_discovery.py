@@ -89,6 +89,24 @@ def discover_value_not_in_dut(dut):
     yield Timer(0)
 
 
+@cocotb.test()
+def repeated_lookup(dut):
+    """Look up the same names in the GPI more than once, found and not"""
+    import simulator
+    yield Timer(0)
+    for _ in range(3):
+        hdl = simulator.get_handle_by_name(dut._handle, "stream_in_data")
+        if hdl is None or simulator.get_name_string(hdl) != "stream_in_data":
+            raise TestFailure("stream_in_data not found again")
+        if simulator.get_handle_by_name(dut._handle, "fake_signal") is not None:
+            raise TestFailure("fake_signal found")
+    # Other names missing from the same scope don't hide the ones that exist
+    for i in range(100):
+        simulator.get_handle_by_name(dut._handle, "fake_signal_%d" % i)
+    if simulator.get_handle_by_name(dut._handle, "stream_in_ready") is None:
+        raise TestFailure("stream_in_ready not found after misses")
+
+
 @cocotb.test()
 def access_signal(dut):
     """Access a signal using the assignment mechanism"""
@@ -0,0 +1,82 @@
+# Copyright cocotb contributors
+# Licensed under the Revised BSD License, see LICENSE for details.
+# SPDX-License-Identifier: BSD-3-Clause
+
+"""Tests of forking the simulation after an init test
+
+The six tests after ``test_init`` are shared out between the three processes
+in turn, so the first process runs tests 0 and 3, the second 1 and 4, and the
+third 2 and 5.
+"""
+
+import os
+
+import cocotb
+from cocotb.clock import Clock
+from cocotb.triggers import ClockCycles, RisingEdge
+
+INIT_CYCLES = 300
+JOBS = 3
+
+PARENT_PID = os.getpid()
+ran = []  # the tests run in this process
+
+
+def start_clock(dut):
+    # The counter of the stand-in simulator has a clock of its own
+    if cocotb.SIM_NAME != "pysim":
+        cocotb.fork(Clock(dut.clk, 10, "ns").start())
+
+
+async def _run(dut, index):
+    start_clock(dut)
+    assert ran == ([] if index < JOBS else [index - JOBS])
+    assert (os.getpid() == PARENT_PID) == (index % JOBS == 0)
+    # Restored to the state after test_init, whatever the test before did
+    assert dut.count.value.integer == INIT_CYCLES % 256
+    dut.enable <= 1
+    await ClockCycles(dut.clk, 5 + index)
+    ran.append(index)
+
+
+@cocotb.test()
+async def test_init(dut):
+    """Run once, before the processes are forked"""
+    start_clock(dut)
+    dut.reset <= 1
+    dut.enable <= 1
+    await RisingEdge(dut.clk)
+    dut.reset <= 0
+    await ClockCycles(dut.clk, INIT_CYCLES)
+    dut.enable <= 0
+    await RisingEdge(dut.clk)
+
+
+@cocotb.test()
+async def test_0(dut):
+    await _run(dut, 0)
+
+
+@cocotb.test()
+async def test_1(dut):
+    await _run(dut, 1)
+
+
+@cocotb.test()
+async def test_2(dut):
+    await _run(dut, 2)
+
+
+@cocotb.test()
+async def test_3(dut):
+    await _run(dut, 3)
+
+
+@cocotb.test()
+async def test_4(dut):
+    await _run(dut, 4)
+
+
+@cocotb.test()
+async def test_5(dut):
+    await _run(dut, 5)
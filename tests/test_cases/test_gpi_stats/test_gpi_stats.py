@@ -0,0 +1,26 @@
+# Copyright cocotb contributors
+# Licensed under the Revised BSD License, see LICENSE for details.
+# SPDX-License-Identifier: BSD-3-Clause
+"""
+Tests of the GPI call statistics collected when COCOTB_GPI_STATS is set
+"""
+import cocotb
+from cocotb.triggers import Timer
+
+import simulator
+
+
+@cocotb.test()
+def test_signal_access_counted(dut):
+    """Reads and writes of a signal are counted against their GPI entry points"""
+    before = simulator.get_gpi_stats()
+    for i in range(10):
+        dut.stream_in_data <= i
+        yield Timer(1, 'ns')
+        dut.stream_in_data.value.integer
+    after = simulator.get_gpi_stats()
+
+    for name in ("gpi_set_signal_value_long", "gpi_get_signal_value_binstr", "callback:timed", "python:callback"):
+        assert after[name]["calls"] >= before[name]["calls"] + 10, name
+        assert after[name]["total_ns"] >= before[name]["total_ns"]
+        assert after[name]["max_ns"] <= after[name]["total_ns"]
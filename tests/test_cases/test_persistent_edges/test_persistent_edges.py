@@ -0,0 +1,45 @@
+# Copyright cocotb contributors
+# Licensed under the Revised BSD License, see LICENSE for details.
+# SPDX-License-Identifier: BSD-3-Clause
+"""
+Tests of edge triggers whose simulator callbacks stay registered between edges
+"""
+import cocotb
+from cocotb.clock import Clock
+from cocotb.triggers import RisingEdge, FallingEdge, Edge, Timer, First
+from cocotb.utils import get_sim_time
+
+
+@cocotb.test()
+def test_edge_count(dut):
+    """Re-waiting on the same edge sees every edge exactly once"""
+    cocotb.fork(Clock(dut.clk, 10, 'ns').start())
+    yield RisingEdge(dut.clk)
+    start = get_sim_time('ns')
+    for _ in range(20):
+        yield RisingEdge(dut.clk)
+    assert get_sim_time('ns') - start == 200
+
+
+@cocotb.test()
+def test_disabled_edges_not_delivered(dut):
+    """Edges that occur while nothing waits are not delivered later"""
+    cocotb.fork(Clock(dut.clk, 10, 'ns').start())
+    yield RisingEdge(dut.clk)
+    yield Timer(93, 'ns')
+    yield FallingEdge(dut.clk)
+    assert get_sim_time('ns') % 10 == 5
+    yield RisingEdge(dut.clk)
+    assert get_sim_time('ns') % 10 == 0
+
+
+@cocotb.test()
+def test_edge_in_first(dut):
+    """An edge that loses a First is disabled and can be waited on again"""
+    cocotb.fork(Clock(dut.clk, 10, 'ns').start())
+    yield RisingEdge(dut.clk)
+    for _ in range(5):
+        fired = yield First(Edge(dut.clk), Timer(1, 'ns'))
+        assert isinstance(fired, Timer)
+        yield Edge(dut.clk)
+    yield RisingEdge(dut.clk)
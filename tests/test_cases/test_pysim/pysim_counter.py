@@ -0,0 +1,32 @@
+# Copyright cocotb contributors
+# Licensed under the Revised BSD License, see LICENSE for details.
+# SPDX-License-Identifier: BSD-3-Clause
+
+"""A free-running counter for the stand-in simulator.
+
+``count`` is incremented on every rising edge of ``clk`` when ``enable`` is
+high, ``wrapped`` is high while ``count`` is zero and ``sub.doubled`` is
+twice ``count``.
+"""
+
+import simulator
+
+
+def design():
+    top = simulator.Module("counter")
+    clk = top.add(simulator.Signal("clk"))
+    reset = top.add(simulator.Signal("reset"))
+    enable = top.add(simulator.Signal("enable", init=1))
+    count = top.add(simulator.Signal("count", width=8))
+    wrapped = top.add(simulator.Signal("wrapped", kind=simulator.NET))
+    top.add(simulator.Signal("WIDTH", kind=simulator.INTEGER, init=8, const=True))
+    top.add(simulator.Signal("ratio", kind=simulator.REAL, init=0.5))
+
+    sub = top.add(simulator.Module("sub", definition="doubler"))
+    doubled = sub.add(simulator.Signal("doubled", width=9, kind=simulator.NET))
+
+    top.add(simulator.Clock(clk, period=10000))
+    top.add(simulator.Register(count, clk, lambda: count.value + enable.value, reset=reset))
+    top.add(simulator.Assign(wrapped, lambda: count.value == 0, [count]))
+    sub.add(simulator.Assign(doubled, lambda: count.value * 2, [count]))
+    return top
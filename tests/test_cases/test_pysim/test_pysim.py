@@ -0,0 +1,136 @@
+# Copyright cocotb contributors
+# Licensed under the Revised BSD License, see LICENSE for details.
+# SPDX-License-Identifier: BSD-3-Clause
+
+"""Tests of the pure-Python stand-in simulator, running pysim_counter."""
+
+import cocotb
+from cocotb.clock import Clock
+from cocotb.handle import ModifiableObject, RealObject, ConstantObject
+from cocotb.triggers import (
+    Timer, RisingEdge, FallingEdge, Edge, ReadOnly, ReadWrite, NextTimeStep, ClockCycles
+)
+from cocotb.utils import get_sim_time
+
+
+@cocotb.test()
+async def test_hierarchy(dut):
+    """The netlist is visible through handles"""
+    assert isinstance(dut.count, ModifiableObject)
+    assert len(dut.count) == 8
+    assert isinstance(dut.ratio, RealObject)
+    assert isinstance(dut.WIDTH, ConstantObject)
+    assert dut.WIDTH.value == 8
+    assert dut.sub.get_definition_name() == "doubler"
+    names = {handle._name for handle in dut}
+    assert {"clk", "reset", "enable", "count", "wrapped", "sub"} <= names
+
+
+@cocotb.test()
+async def test_clock_and_registers(dut):
+    """The netlist clock drives the register and the combinational logic"""
+    await RisingEdge(dut.clk)
+    await ReadOnly()
+    start = dut.count.value.integer
+    for i in range(1, 10):
+        await RisingEdge(dut.clk)
+        await ReadOnly()
+        assert dut.count.value.integer == (start + i) % 256
+        assert dut.sub.doubled.value.integer == 2 * dut.count.value.integer
+        assert dut.wrapped.value.integer == (dut.count.value.integer == 0)
+
+
+@cocotb.test()
+async def test_register_samples_before_update(dut):
+    """Value change callbacks see the register outputs from before the edge"""
+    await RisingEdge(dut.clk)
+    before = dut.count.value.integer
+    await ReadOnly()
+    assert dut.count.value.integer == (before + 1) % 256
+
+
+@cocotb.test()
+async def test_writes(dut):
+    """Writes are applied in the ReadWrite phase and seen by the netlist"""
+    await FallingEdge(dut.clk)
+    dut.enable <= 0
+    await ReadWrite()
+    assert dut.enable.value.integer == 0
+    held = dut.count.value.integer
+    await ClockCycles(dut.clk, 3)
+    await ReadOnly()
+    assert dut.count.value.integer == held
+
+    await FallingEdge(dut.clk)
+    dut.enable <= 1
+    dut.reset <= 1
+    await RisingEdge(dut.clk)
+    await ReadOnly()
+    assert dut.count.value.integer == 0
+    await FallingEdge(dut.clk)
+    dut.reset <= 0
+
+
+@cocotb.test()
+async def test_timing(dut):
+    """Timers and phases happen at the expected times"""
+    start = get_sim_time("ps")
+    await Timer(25, "ns")
+    assert get_sim_time("ps") == start + 25000
+    await NextTimeStep()
+    await Timer(1, "ps")
+    await ReadWrite()
+    await ReadOnly()
+    now = get_sim_time("ps")
+    await Timer(1, "ps")
+    assert get_sim_time("ps") == now + 1
+
+
+@cocotb.test()
+async def test_python_clock(dut):
+    """A clock can also be driven from Python"""
+    dut.ratio <= 1.5
+    clock = cocotb.fork(Clock(dut.enable, 3, "ns").start())
+    await Edge(dut.enable)
+    last = get_sim_time("ps")
+    for _ in range(10):
+        await Edge(dut.enable)
+        assert get_sim_time("ps") - last == 1500
+        last = get_sim_time("ps")
+    clock.kill()
+    assert dut.ratio.value == 1.5
+    # Leave the counter running for the tests which follow
+    dut.enable <= 1
+    await ReadWrite()
+
+
+
+@cocotb.test()
+async def test_batch_rewait(dut):
+    """A trigger waited on again while a batch is handled does not fire for a change in that batch"""
+    dut.reset <= 0
+    dut.enable <= 1
+    await Timer(1, "ns")
+    tasks = {}
+    rewaits = []
+
+    async def wait_then_rewait(mine, other):
+        await Edge(mine)
+        # The other task is waiting for the change in this same batch
+        tasks[other].kill()
+        start = get_sim_time("ps")
+        await Edge(other)
+        rewaits.append((start, get_sim_time("ps")))
+
+    tasks[dut.reset] = cocotb.fork(wait_then_rewait(dut.reset, dut.enable))
+    tasks[dut.enable] = cocotb.fork(wait_then_rewait(dut.enable, dut.reset))
+    await Timer(1, "ns")
+    # Written in the same phase, so they change in the same delta cycle
+    dut.reset <= 1
+    dut.enable <= 0
+    await Timer(1, "ns")
+    dut.reset <= 0
+    dut.enable <= 1
+    await Timer(1, "ns")
+    (start, end), = rewaits
+    assert end > start
@@ -0,0 +1,41 @@
+# Copyright cocotb contributors
+# Licensed under the Revised BSD License, see LICENSE for details.
+# SPDX-License-Identifier: BSD-3-Clause
+
+"""Check which tests each run of the Makefile ran, and their results"""
+
+import sys
+import xml.etree.ElementTree as ET
+
+EXPECTED = {
+    "first.xml": {"test_stable": "passed", "test_flaky": "failed"},
+    # test_stable passed with the same seed, HDL and test module
+    "changed.xml": {"test_stable": "skipped", "test_flaky": "failed"},
+    "results.xml": {"test_stable": "skipped", "test_flaky": "passed"},
+}
+
+
+def outcomes(filename):
+    rv = {}
+    for testcase in ET.parse(filename).iter("testcase"):
+        if testcase.find("skipped") is not None:
+            rv[testcase.get("name")] = "skipped"
+        elif testcase.find("failure") is not None:
+            rv[testcase.get("name")] = "failed"
+        else:
+            rv[testcase.get("name")] = "passed"
+    return rv
+
+
+def main():
+    rc = 0
+    for filename, expected in EXPECTED.items():
+        actual = outcomes(filename)
+        if actual != expected:
+            print("{}: expected {}, got {}".format(filename, expected, actual))
+            rc = 1
+    return rc
+
+
+if __name__ == "__main__":
+    sys.exit(main())
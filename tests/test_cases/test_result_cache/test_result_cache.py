@@ -0,0 +1,25 @@
+# Copyright cocotb contributors
+# Licensed under the Revised BSD License, see LICENSE for details.
+# SPDX-License-Identifier: BSD-3-Clause
+
+"""Tests run several times against one result cache, see the Makefile"""
+
+import os
+
+import cocotb
+from cocotb.triggers import ClockCycles
+
+RUN = os.environ["RESULT_CACHE_RUN"]
+
+
+@cocotb.test()
+async def test_stable(dut):
+    """Passes every time it runs"""
+    await ClockCycles(dut.clk, 2)
+
+
+@cocotb.test()
+async def test_flaky(dut):
+    """Fails until the last run"""
+    await ClockCycles(dut.clk, 2)
+    assert RUN == "last-failed", "failing in the {} run".format(RUN)
@@ -0,0 +1,55 @@
+# Copyright cocotb contributors
+# Licensed under the Revised BSD License, see LICENSE for details.
+# SPDX-License-Identifier: BSD-3-Clause
+
+"""Tests of running each test with several seeds, and of reset hooks"""
+
+import random
+
+import cocotb
+from cocotb.triggers import ClockCycles, ReadOnly, RisingEdge
+
+resets = 0
+runs = []  # (test name, seed) of each test run so far
+
+
+@cocotb.reset_hook()
+async def reset_counter(dut):
+    global resets
+    resets += 1
+    dut.reset <= 1
+    await RisingEdge(dut.clk)
+    dut.reset <= 0
+    await ReadOnly()
+
+
+def _record_run(name):
+    seed = cocotb.regression_manager._running_test._seed
+    runs.append((name, seed))
+    assert resets == len(runs), "the reset hook was not run before every test"
+    return seed
+
+
+@cocotb.test()
+async def test_reseeded(dut):
+    """The random number generator is reseeded before each run"""
+    seed = _record_run("test_reseeded")
+    assert random.random() == random.Random(seed).random()
+
+
+@cocotb.test()
+async def test_counter_reset(dut):
+    """Each run starts from a reset counter, whatever earlier runs did"""
+    _record_run("test_counter_reset")
+    assert dut.count.value.integer == 0
+    await ClockCycles(dut.clk, random.randint(1, 20))
+
+
+@cocotb.test()
+async def test_runs(dut):
+    """Every test is run once with each seed, in order"""
+    _record_run("test_runs")
+    seeds = [100, 101, 102]
+    expected = [(name, seed) for name in ("test_reseeded", "test_counter_reset") for seed in seeds]
+    assert runs[:6] == expected
+    assert [seed for _, seed in runs[6:]] == seeds[:len(runs) - 6]
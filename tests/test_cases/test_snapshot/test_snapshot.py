@@ -0,0 +1,52 @@
+# Copyright cocotb contributors
+# Licensed under the Revised BSD License, see LICENSE for details.
+# SPDX-License-Identifier: BSD-3-Clause
+
+"""Tests of restoring a snapshot of the design saved after an init test"""
+
+import cocotb
+from cocotb.clock import Clock
+from cocotb.triggers import ClockCycles, ReadOnly, RisingEdge
+
+INIT_CYCLES = 2000
+
+
+def start_clock(dut):
+    # The counter of the stand-in simulator has a clock of its own
+    if cocotb.SIM_NAME != "pysim":
+        cocotb.fork(Clock(dut.clk, 10, "ns").start())
+
+
+@cocotb.test()
+async def test_counts_on(dut):
+    """The design starts in the state test_init left it in, and is changed"""
+    start_clock(dut)
+    assert dut.count.value.integer == INIT_CYCLES % 256
+    assert dut.enable.value.integer == 0
+    dut.enable <= 1
+    await ClockCycles(dut.clk, 10)
+
+
+@cocotb.test()
+async def test_restored(dut):
+    """The changes of the test before are undone"""
+    start_clock(dut)
+    assert dut.count.value.integer == INIT_CYCLES % 256
+    assert dut.enable.value.integer == 0
+    await ClockCycles(dut.clk, 10)
+    await ReadOnly()
+    assert dut.count.value.integer == INIT_CYCLES % 256
+
+
+# Defined last, to check that it is run first
+@cocotb.test()
+async def test_init(dut):
+    """A long initialisation, only run once"""
+    start_clock(dut)
+    dut.reset <= 1
+    dut.enable <= 1
+    await RisingEdge(dut.clk)
+    dut.reset <= 0
+    await ClockCycles(dut.clk, INIT_CYCLES)
+    dut.enable <= 0
+    await RisingEdge(dut.clk)
@@ -0,0 +1,68 @@
+# Copyright cocotb contributors
+# Licensed under the Revised BSD License, see LICENSE for details.
+# SPDX-License-Identifier: BSD-3-Clause
+
+"""Tests of the modes of TestFactory, and of lazily generated tests"""
+
+import itertools
+
+import cocotb
+from cocotb.regression import TestFactory
+
+runs = {}  # name of each generated test run -> its options
+
+
+@cocotb.coroutine
+async def run_test(dut, a, b, c, d):
+    runs[cocotb.regression_manager._running_test.funcname] = (a, b, c, d)
+
+
+def _factory():
+    tf = TestFactory(run_test)
+    tf.add_option("a", [0, 1, 2])
+    tf.add_option("b", [0, 1, 2])
+    tf.add_option("c", [0, 1])
+    tf.add_option("d", [0, 1, 2])
+    return tf
+
+
+_factory().generate_tests(postfix="_lazy", lazy=True)
+_factory().generate_tests(postfix="_pairwise", mode="pairwise", lazy=True)
+_factory().generate_tests(postfix="_random", mode="random", count=5, seed=7)
+
+
+def _runs(postfix):
+    return {name: options for name, options in runs.items() if name.startswith("run_test" + postfix + "_")}
+
+
+@cocotb.test()
+async def test_lazy(dut):
+    """Every combination is run, and none of them is added to the module"""
+    lazy = _runs("_lazy")
+    assert len(lazy) == 54
+    assert sorted(lazy.values()) == list(itertools.product([0, 1, 2], [0, 1, 2], [0, 1], [0, 1, 2]))
+    assert not any(name.startswith("run_test_lazy") for name in globals())
+    # The test is named after the position of its options in the product
+    assert lazy["run_test_lazy_001"] == (0, 0, 0, 0)
+    assert lazy["run_test_lazy_054"] == (2, 2, 1, 2)
+
+
+@cocotb.test()
+async def test_pairwise(dut):
+    """Every pair of values of two options is run, in fewer tests than the product"""
+    pairwise = _runs("_pairwise")
+    assert len(pairwise) < 54
+    for i, j in itertools.combinations(range(4), 2):
+        pairs = {(options[i], options[j]) for options in pairwise.values()}
+        assert len(pairs) == len({options[i] for options in _runs("_lazy").values()}) * \
+            len({options[j] for options in _runs("_lazy").values()})
+    for name, options in pairwise.items():
+        assert _runs("_lazy")[name.replace("_pairwise", "_lazy")] == options
+
+
+@cocotb.test()
+async def test_random(dut):
+    """The requested number of different combinations is run"""
+    sampled = _runs("_random")
+    assert len(sampled) == 5
+    assert sorted(sampled) == sorted(name for name in globals() if name.startswith("run_test_random_"))
@@ -0,0 +1,57 @@
+# Copyright cocotb contributors
+# Licensed under the Revised BSD License, see LICENSE for details.
+# SPDX-License-Identifier: BSD-3-Clause
+
+"""Tests of ending tests which hang with COCOTB_WATCHDOG_TIMEOUT"""
+
+import json
+import sys
+import threading
+
+import cocotb
+from cocotb.result import RealTimeoutError
+from cocotb.triggers import NullTrigger, RisingEdge
+
+stuck = threading.Event()
+
+
+@cocotb.test(expect_error=RealTimeoutError)
+async def test_zero_time_loop(dut):
+    """A loop which never advances the simulation time is ended"""
+    while True:
+        await NullTrigger()
+
+
+@cocotb.test(expect_error=RealTimeoutError)
+async def test_busy_loop(dut):
+    """A loop in the code of the test is interrupted"""
+    while True:
+        pass
+
+
+@cocotb.test(expect_error=RealTimeoutError)
+async def test_busy_library_loop(dut):
+    """A loop which spends its time in the standard library is interrupted in the code of the test"""
+    while True:
+        json.loads(json.dumps(list(range(1000))))
+
+
+@cocotb.test(expect_error=RealTimeoutError)
+async def test_stuck_external(dut):
+    """A wait for an external function which never returns is abandoned"""
+    @cocotb.external
+    def wait_forever():
+        stuck.wait()
+
+    await wait_forever()
+
+
+@cocotb.test()
+async def test_after_hangs(dut):
+    """The regression moves on after the tests which hung"""
+    assert not cocotb.scheduler._pending_threads
+    # The tracing used to interrupt the busy loops has been removed
+    assert sys.gettrace() is None
+    await RisingEdge(dut.clk)
+    # Let the abandoned thread finish
+    stuck.set()